@@ -0,0 +1,117 @@
+"""
+Language identification benchmark.
+
+Compares the text classifier against the previous per-character Python
+heuristic (speed on growing transcripts, accuracy on sample sentences)
+and, when a Whisper model is configured, times audio identification.
+
+Usage:
+    python benchmarks/language_id.py [--audio sample.wav] [--runs 200]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.language_id import get_language_identifier  # noqa: E402
+
+SAMPLES = {
+    "bg": "Здравей, мисля, че трябва да се срещнем утре и да обсъдим проекта, какво мислиш?",
+    "cs": "Ahoj, myslím, že bychom se měli zítra sejít a probrat ten projekt, co myslíš?",
+    "da": "Hej, jeg synes, at vi skal mødes i morgen og tale om projektet, hvad synes du?",
+    "de": "Hallo, ich denke, wir sollten uns morgen treffen und über das Projekt sprechen.",
+    "el": "Γεια σου, νομίζω ότι πρέπει να συναντηθούμε αύριο και να μιλήσουμε για το έργο.",
+    "en": "So I was thinking that we should meet tomorrow and talk about the project.",
+    "es": "Hola, creo que deberíamos vernos mañana para hablar del proyecto, ¿qué te parece?",
+    "et": "Tere, ma arvan, et me peaksime homme kohtuma ja projekti arutama, mis sa arvad?",
+    "fi": "Hei, minusta meidän pitäisi tavata huomenna ja puhua projektista, mitä mieltä olet?",
+    "fr": "Salut, je pense que nous devrions nous voir demain pour parler du projet.",
+    "hr": "Bok, mislim da bismo se trebali sutra naći i razgovarati o projektu, što ti misliš?",
+    "hu": "Szia, azt hiszem, holnap találkoznunk kellene, hogy megbeszéljük a projektet.",
+    "it": "Ciao, penso che dovremmo vederci domani per parlare del progetto, che ne pensi?",
+    "lt": "Labas, manau, kad turėtume rytoj susitikti ir aptarti projektą, ką manai?",
+    "lv": "Sveiki, es domāju, ka mums vajadzētu rīt satikties un pārrunāt projektu.",
+    "mt": "Bonġu, naħseb li għandna niltaqgħu għada biex nitkellmu dwar il-proġett.",
+    "nl": "Hoi, ik denk dat we morgen moeten afspreken om over het project te praten.",
+    "pl": "Cześć, myślę, że powinniśmy spotkać się jutro i porozmawiać o projekcie.",
+    "pt": "Olá, acho que devemos nos encontrar amanhã para falar sobre o projeto.",
+    "ro": "Salut, cred că ar trebui să ne întâlnim mâine și să discutăm despre proiect.",
+    "ru": "Привет, я думаю, что нам нужно встретиться завтра и обсудить проект.",
+    "sk": "Ahoj, myslím, že by sme sa mali zajtra stretnúť a prebrať ten projekt.",
+    "sl": "Živjo, mislim, da bi se morali jutri dobiti in se pogovoriti o projektu.",
+    "sv": "Hej, jag tycker att vi borde träffas i morgon och prata om projektet.",
+    "uk": "Привіт, я думаю, що нам треба зустрітися завтра і обговорити проєкт.",
+}
+
+
+def legacy_detect(text: str) -> str:
+    """The previous en/ru heuristic, kept for comparison."""
+    if not text:
+        return "en"
+    cyrillic_count = sum(1 for c in text if "\u0400" <= c <= "\u04ff")
+    total_alpha = sum(1 for c in text if c.isalpha())
+    if total_alpha == 0:
+        return "en"
+    return "ru" if cyrillic_count / total_alpha > 0.3 else "en"
+
+
+def time_call(fn, arg, runs: int) -> float:
+    """Mean call time in microseconds."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(arg)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark language identification")
+    parser.add_argument("--audio", type=Path, help="16kHz WAV for audio mode timing")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    identifier = get_language_identifier()
+
+    print("Accuracy on sample sentences")
+    legacy_correct = sum(legacy_detect(text) == lang for lang, text in SAMPLES.items())
+    text_correct = 0
+    for lang, text in SAMPLES.items():
+        detection = identifier.detect_text(text)
+        text_correct += detection.language == lang
+        mark = "" if detection.language == lang else "  <-- wrong"
+        print(f"  {lang}: {detection.language} ({detection.confidence:.2f}){mark}")
+    print(f"  legacy: {legacy_correct}/{len(SAMPLES)}, text classifier: {text_correct}/{len(SAMPLES)}")
+
+    print("\nSpeed (mean per call)")
+    print(f"  {'chars':>8}  {'legacy':>10}  {'text':>10}")
+    base = " ".join(SAMPLES.values())
+    for size in (100, 1_000, 10_000, 100_000):
+        text = (base * (size // len(base) + 1))[:size]
+        runs = max(5, args.runs * 1_000 // size)
+        legacy_us = time_call(legacy_detect, text, runs)
+        text_us = time_call(identifier.detect_text, text, runs)
+        print(f"  {size:>8}  {legacy_us:>8.0f}us  {text_us:>8.0f}us")
+
+    if args.audio:
+        import soundfile as sf
+        if not identifier.spoken_model.is_configured:
+            print("\nAudio mode: set LANGUAGE_ID_ENCODER_PATH and LANGUAGE_ID_DECODER_PATH")
+            return
+        samples, sample_rate = sf.read(str(args.audio), dtype="float32")
+        identifier.spoken_model.load_model()
+        runs = max(1, args.runs // 20)
+        start = time.perf_counter()
+        for _ in range(runs):
+            language = identifier.spoken_model.identify(
+                samples[:int(identifier.settings.language_id_audio_seconds * sample_rate)],
+                sample_rate
+            )
+        elapsed_ms = (time.perf_counter() - start) / runs * 1000
+        print(f"\nAudio mode: {language} in {elapsed_ms:.0f}ms "
+              f"({identifier.settings.language_id_audio_seconds:.0f}s of audio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Transport benchmark: multipart /transcribe vs raw /transcribe/raw.
+
+Sends the same clip through both endpoints of a running service over
+keep-alive connections and reports throughput, latency percentiles and
+the per-request overhead outside transcription (latency minus the
+service's processing_time_ms). Every request pads the clip with a few
+silent samples so identical requests don't coalesce.
+
+Usage:
+    python benchmarks/transport.py [--url http://localhost:3010] [--audio clip.wav]
+                                   [--requests 200] [--concurrency 4]
+"""
+
+import argparse
+import http.client
+import io
+import json
+import statistics
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import soundfile as sf
+
+
+def load_clip(audio: Optional[Path]) -> tuple[np.ndarray, int]:
+    """16-bit (frames, channels) samples of the clip, or a 3 second 16kHz tone."""
+    if audio is not None:
+        samples, sample_rate = sf.read(str(audio), dtype="int16", always_2d=True)
+        return samples, sample_rate
+    t = np.arange(3 * 16000) / 16000
+    tone = (0.1 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+    return tone.reshape(-1, 1), 16000
+
+
+def multipart_request(samples: np.ndarray, sample_rate: int) -> tuple[str, bytes, dict]:
+    """A /transcribe request carrying the samples as a WAV upload."""
+    wav = io.BytesIO()
+    sf.write(wav, samples, sample_rate, format="WAV", subtype="PCM_16")
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="audio"; filename="clip.wav"\r\n'
+        f"Content-Type: audio/wav\r\n\r\n"
+    ).encode() + wav.getvalue() + f"\r\n--{boundary}--\r\n".encode()
+    return "/transcribe", body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def raw_request(samples: np.ndarray, sample_rate: int) -> tuple[str, bytes, dict]:
+    """A /transcribe/raw request carrying the samples as headerless PCM."""
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "X-Audio-Format": "pcm_s16le",
+        "X-Sample-Rate": str(sample_rate),
+        "X-Channels": str(samples.shape[1]),
+    }
+    return "/transcribe/raw", samples.astype("<i2").tobytes(), headers
+
+
+def run(url: str, build, samples: np.ndarray, sample_rate: int, requests: int, concurrency: int) -> dict:
+    """Send requests from concurrency keep-alive connections and collect timings."""
+    target = urlsplit(url)
+    bodies = [
+        build(np.concatenate([samples, np.zeros((i + 1, samples.shape[1]), dtype=samples.dtype)]), sample_rate)
+        for i in range(requests)
+    ]
+    latencies: list[float] = []
+    overheads: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    next_index = iter(range(requests))
+
+    def worker() -> None:
+        nonlocal errors
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+        for index in iter(lambda: next(next_index, None), None):
+            path, body, headers = bodies[index]
+            start = time.perf_counter()
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if response.status != 200:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                overheads.append(elapsed - json.loads(payload)["data"]["processing_time_ms"])
+        connection.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    if not latencies:
+        return {"errors": errors}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests_per_second": len(latencies) / wall,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "overhead_ms": statistics.mean(overheads),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark multipart vs raw transcription requests")
+    parser.add_argument("--url", default="http://localhost:3010")
+    parser.add_argument("--audio", type=Path, help="Clip to send (a 3 second tone if not set)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    samples, sample_rate = load_clip(args.audio)
+    print(
+        f"{samples.shape[0] / sample_rate:.1f}s clip at {sample_rate}Hz x{samples.shape[1]}, "
+        f"{args.requests} requests, concurrency {args.concurrency}"
+    )
+
+    transports = {"multipart": multipart_request, "raw": raw_request}
+    for build in transports.values():
+        run(args.url, build, samples, sample_rate, args.warmup, 1)
+
+    print(f"{'transport':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'overhead ms':>14}{'errors':>8}")
+    for name, build in transports.items():
+        stats = run(args.url, build, samples, sample_rate, args.requests, args.concurrency)
+        if "p50_ms" not in stats:
+            print(f"{name:<12}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{'-':>14}{stats['errors']:>8}")
+            continue
+        print(
+            f"{name:<12}{stats['requests_per_second']:>10.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+            f"{stats['p99_ms']:>10.1f}{stats['overhead_ms']:>14.2f}{stats['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Command-line batch transcription.
+
+Runs local audio files through the same batch path as
+POST /transcribe/batch and writes one JSON line per file. Files are
+spread over a pool of worker processes, each with its own model and a
+share of the CPU threads. The output file doubles as the checkpoint:
+rerunning with the same output skips files that already succeeded.
+
+Usage:
+    python cli.py /path/to/audio [--recursive] --output results.jsonl [--workers 4]
+    python cli.py --manifest files.txt --output results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional, TextIO
+
+from config import get_settings
+from ml_models.registry import get_model_registry
+from services.audio_processor import get_audio_processor
+from services.memory_governor import get_memory_governor
+from services.temp_storage import get_temp_space_manager
+from services.transcription import TranscriptionError, get_transcription_service, parse_hotwords
+
+logger = logging.getLogger("cli")
+
+
+def find_audio_files(directory: Path, recursive: bool) -> list[Path]:
+    """
+    Find supported audio files in a directory.
+
+    Args:
+        directory: Directory to scan
+        recursive: Also scan subdirectories
+
+    Returns:
+        Sorted list of audio file paths
+    """
+    audio_processor = get_audio_processor()
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        path for path in directory.glob(pattern)
+        if path.is_file() and audio_processor.validate_format(path.name)
+    )
+
+
+def read_manifest(manifest: Path) -> list[Path]:
+    """
+    Read audio paths from a manifest.
+
+    Accepts plain text (one path per line) or JSONL with a "path" field.
+    Relative paths are resolved against the manifest's directory.
+
+    Args:
+        manifest: Manifest file
+
+    Returns:
+        List of audio file paths
+    """
+    paths = []
+    for line in manifest.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            line = json.loads(line)["path"]
+        path = Path(line)
+        paths.append(path if path.is_absolute() else manifest.parent / path)
+    return paths
+
+
+def load_completed(output: Path) -> set[str]:
+    """
+    Get files that already succeeded in a previous run.
+
+    Lines cut short by an interrupted run are ignored.
+
+    Args:
+        output: JSONL output of the previous run
+
+    Returns:
+        Set of file keys to skip
+    """
+    completed: set[str] = set()
+    if not output.exists():
+        return completed
+
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("success"):
+                completed.add(record["file"])
+    return completed
+
+
+def _init_worker(num_threads: int, workers: int) -> None:
+    """Set up a worker process with its share of the inference threads, memory budget and temp quota."""
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    get_model_registry().num_threads = num_threads
+    get_memory_governor().budget_bytes //= workers
+    # Workers share TEMP_DIR (or tmpfs, i.e. RAM), so each gets a share of the quota
+    get_temp_space_manager().quota_bytes //= workers
+
+
+def _transcribe_group(items: list[tuple[str, Path]], options: dict) -> list[dict]:
+    """
+    Transcribe a group of files and return their result lines.
+
+    Runs inside a worker process (or inline with a single worker).
+    """
+    transcription_service = get_transcription_service()
+    lines = []
+
+    with get_temp_space_manager().namespace() as temp_ns:
+        for item in transcription_service.transcribe_many(items, temp_namespace=temp_ns, **options):
+            if item.error is not None:
+                lines.append({
+                    "file": item.name,
+                    "success": False,
+                    "error": {"code": item.error.code, "message": item.error.message}
+                })
+            else:
+                line = {
+                    "file": item.name,
+                    "success": True,
+                    "text": item.result.text,
+                    "language": item.result.language,
+                    "duration": item.result.duration,
+                    "processing_time_ms": item.result.processing_time_ms,
+                    "model": item.result.model
+                }
+                if item.result.partial:
+                    line["failed_spans"] = item.result.failed_spans
+                lines.append(line)
+
+    return lines
+
+
+def _failed_group(items: list[tuple[str, Path]], error: BaseException) -> list[dict]:
+    """Result lines for a group whose worker failed as a whole."""
+    logger.error(f"A group of {len(items)} files failed: {error}")
+    return [
+        {
+            "file": name,
+            "success": False,
+            "error": {"code": "TRANSCRIPTION_FAILED", "message": str(error) or type(error).__name__}
+        }
+        for name, _ in items
+    ]
+
+
+class _Progress:
+    """Tracks completed files and audio throughput."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.start_time = time.time()
+        self._last_report = self.start_time
+
+    def add(self, line: dict) -> None:
+        self.done += 1
+        if line["success"]:
+            self.audio_seconds += line["duration"]
+        else:
+            self.failed += 1
+
+    @property
+    def speed(self) -> float:
+        """Audio hours transcribed per wall-clock hour."""
+        elapsed = time.time() - self.start_time
+        return self.audio_seconds / elapsed if elapsed > 0 else 0.0
+
+    def report(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_report < 10:
+            return
+        self._last_report = now
+        logger.info(
+            f"{self.done}/{self.total} files ({self.failed} failed), "
+            f"{self.audio_seconds / 3600:.2f} audio hours, "
+            f"{self.speed:.1f} audio-h/wall-h"
+        )
+
+
+def run_batch(
+    items: list[tuple[str, Path]],
+    output: TextIO,
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
+    files_per_task: int = 16,
+    **options
+) -> _Progress:
+    """
+    Transcribe files across a process pool, writing results as they arrive.
+
+    Args:
+        items: (key, path) pairs; key is written as "file" in the output
+        output: Stream receiving one JSON line per file (flushed per group)
+        workers: Worker processes (1 runs inline)
+        threads_per_worker: Inference threads per worker (CPU count / workers if not set)
+        files_per_task: Files sent to a worker at a time
+        **options: language, model, decoding_method, hotwords
+
+    Returns:
+        Final progress counters
+    """
+    progress = _Progress(len(items))
+    groups = [items[i:i + files_per_task] for i in range(0, len(items), files_per_task)]
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"{len(items)} files, {workers} workers x {threads} threads")
+
+    def write(lines: list[dict]) -> None:
+        for line in lines:
+            output.write(json.dumps(line, ensure_ascii=False) + "\n")
+            progress.add(line)
+        output.flush()
+        if output is not sys.stdout:
+            # Durable checkpoint: finished files survive a crash or kill
+            os.fsync(output.fileno())
+        progress.report()
+
+    if workers <= 1:
+        get_model_registry().num_threads = threads
+        for group in groups:
+            try:
+                lines = _transcribe_group(group, options)
+            except Exception as e:
+                lines = _failed_group(group, e)
+            write(lines)
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(threads, workers)
+        ) as pool:
+            queue = iter(groups)
+            running: dict[Future, list[tuple[str, Path]]] = {}
+
+            def submit_next() -> None:
+                group = next(queue, None)
+                if group is not None:
+                    running[pool.submit(_transcribe_group, group, options)] = group
+
+            # Two groups per worker keeps every worker busy without queuing everything
+            for _ in range(workers * 2):
+                submit_next()
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    group = running.pop(future)
+                    submit_next()
+                    try:
+                        lines = future.result()
+                    except Exception as e:
+                        # One bad group doesn't end the run; its files are retried on resume
+                        lines = _failed_group(group, e)
+                    write(lines)
+
+    progress.report(force=True)
+    return progress
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Transcribe a directory or manifest of audio files")
+    parser.add_argument("directory", type=Path, nargs="?", help="Directory with audio files")
+    parser.add_argument("-m", "--manifest", type=Path, help="Text or JSONL manifest of audio paths")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Scan subdirectories")
+    parser.add_argument("-o", "--output", type=Path, help="JSONL output file, also used to resume (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--threads-per-worker", type=int, help="Inference threads per worker (CPU count / workers)")
+    parser.add_argument("--files-per-task", type=int, default=16, help="Files handed to a worker at a time")
+    parser.add_argument("--language", help="Language code (auto-detect if not specified)")
+    parser.add_argument("--model", help="Model name (routed by duration if not specified)")
+    parser.add_argument("--decoding-method", help="greedy_search or modified_beam_search")
+    parser.add_argument("--hotwords", help="Comma separated phrases to bias recognition towards")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    if args.manifest:
+        items = [(str(path), path) for path in read_manifest(args.manifest)]
+    elif args.directory and args.directory.is_dir():
+        files = find_audio_files(args.directory, args.recursive)
+        items = [(str(path.relative_to(args.directory)), path) for path in files]
+    else:
+        parser.error("Provide a directory or --manifest")
+
+    get_settings()
+
+    if args.output:
+        completed = load_completed(args.output)
+        if completed:
+            items = [item for item in items if item[0] not in completed]
+            logger.info(f"Resuming: {len(completed)} files already done, {len(items)} left")
+
+    hotwords = parse_hotwords(args.hotwords)
+    try:
+        decoding_method = get_transcription_service().resolve_decoding_method(args.decoding_method, hotwords)
+    except TranscriptionError as e:
+        parser.error(e.message)
+
+    options = {
+        "language": args.language,
+        "model": args.model,
+        "decoding_method": decoding_method,
+        "hotwords": hotwords,
+    }
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    if output is not sys.stdout and output.tell() > 0:
+        with open(args.output, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Start fresh after a line torn by an interrupted run
+                output.write("\n")
+    try:
+        progress = run_batch(
+            items,
+            output,
+            workers=max(1, args.workers),
+            threads_per_worker=args.threads_per_worker,
+            files_per_task=max(1, args.files_per_task),
+            **options
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        get_model_registry().unload_all()
+
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ Environment-based settings with validation.
 
 from pathlib import Path
 from functools import lru_cache
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -19,18 +20,93 @@ class Settings(BaseSettings):
         default=Path("/models"),
         description="Directory containing ONNX model files"
     )
+    default_model_name: str = Field(
+        default="parakeet-tdt-0.6b-v3",
+        description="Registry name of the model in model_dir"
+    )
+    extra_models: dict[str, Path] = Field(
+        default_factory=dict,
+        description="Additional named models (name -> model directory)"
+    )
+    model_duration_routes: dict[str, float] = Field(
+        default_factory=dict,
+        description="Route audio up to N seconds long to the named model"
+    )
+    model_language_routes: dict[str, str] = Field(
+        default_factory=dict,
+        description="Route audio in a language to the named model (language -> model name)"
+    )
+    model_memory_budget_mb: int = Field(
+        default=4096,
+        ge=256,
+        description="Memory budget for loaded models (LRU eviction above it)"
+    )
+    models_root: Path = Field(
+        default=Path("/models"),
+        description="Directory a hot-swapped model_dir must be inside"
+    )
+    admin_token: Optional[str] = Field(
+        default=None,
+        description="Token required (X-Admin-Token) to hot-swap models; swapping is disabled if not set"
+    )
 
     # Audio processing
     chunk_size_seconds: int = Field(
         default=60,
         ge=10,
         le=300,
-        description="Chunk size for long audio processing"
+        description="Chunk size for long audio processing (fixed size when adaptive chunking is off)"
+    )
+    adaptive_chunking: bool = Field(
+        default=True,
+        description="Pick chunk length and parallelism per file from load and measured speed"
+    )
+    min_chunk_seconds: int = Field(
+        default=15,
+        ge=5,
+        le=300,
+        description="Shortest chunk the adaptive planner uses (idle service)"
+    )
+    max_chunk_seconds: int = Field(
+        default=120,
+        ge=10,
+        le=300,
+        description="Longest chunk the adaptive planner uses (saturated service, batches)"
+    )
+    decode_workers: int = Field(
+        default=0,
+        ge=0,
+        le=64,
+        description="Concurrent recognizer calls (0 = CPU count / NUM_THREADS)"
+    )
+    chunk_retries: int = Field(
+        default=1,
+        ge=0,
+        le=5,
+        description="Retries for a chunk that fails to decode before its span is reported as failed"
+    )
+    checkpoint_dir: Path = Field(
+        default=Path("/app/checkpoints"),
+        description="Directory for decoded chunk checkpoints of long transcriptions"
+    )
+    checkpoint_min_seconds: int = Field(
+        default=300,
+        ge=0,
+        description="Checkpoint chunk results of audio at least this long (0 = off)"
+    )
+    checkpoint_ttl_seconds: int = Field(
+        default=3600,
+        ge=60,
+        description="Checkpoints not written to for this long are removed"
     )
     sample_rate: int = Field(
         default=16000,
         description="Target sample rate for audio"
     )
+    resample_quality: Literal["soxr", "polyphase", "linear"] = Field(
+        default="soxr",
+        description="Resampler: soxr (high quality), polyphase (scipy) or linear (fastest)"
+    )
     max_audio_duration_seconds: int = Field(
         default=7200,  # 2 hours
         description="Maximum audio duration in seconds"
@@ -40,11 +116,113 @@ class Settings(BaseSettings):
         description="Maximum file size in MB"
     )
 
+    # Preprocessing
+    remove_dc_offset: bool = Field(
+        default=True,
+        description="Subtract the mean from audio before inference"
+    )
+    trim_silence: bool = Field(
+        default=True,
+        description="Trim leading and trailing silence before inference"
+    )
+    trim_top_db: float = Field(
+        default=40.0,
+        gt=0,
+        description="Frames this many dB below the loudest frame count as silence"
+    )
+    trim_frame_ms: int = Field(
+        default=25,
+        ge=5,
+        le=200,
+        description="Frame length for silence detection"
+    )
+    trim_padding_ms: int = Field(
+        default=200,
+        ge=0,
+        description="Audio kept around the trimmed span"
+    )
+    normalization: Literal["none", "peak", "rms"] = Field(
+        default="none",
+        description="Loudness normalization before inference"
+    )
+    normalization_target_dbfs: float = Field(
+        default=-3.0,
+        le=0,
+        description="Target peak or RMS level in dBFS"
+    )
+    normalization_max_gain_db: float = Field(
+        default=30.0,
+        ge=0,
+        description="Maximum gain applied by normalization"
+    )
+
+    # Batch transcription
+    batch_max_files: int = Field(
+        default=500,
+        ge=1,
+        description="Maximum audio files per batch request"
+    )
+    batch_max_total_mb: int = Field(
+        default=1024,
+        ge=1,
+        description="Maximum total upload (or uncompressed archive) size per batch request"
+    )
+    batch_decode_workers: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="Files decoded and resampled concurrently in a batch"
+    )
+    coalesce_requests: bool = Field(
+        default=True,
+        description="Let identical concurrent uploads share one transcription"
+    )
+
+    # Memory admission
+    memory_budget_mb: int = Field(
+        default=0,
+        ge=0,
+        description="Memory the process may use, models included (0 = 80% of the container or host memory)"
+    )
+    memory_admission_timeout_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="How long a request waits for memory before 503"
+    )
+
     # Temp directory
     temp_dir: Path = Field(
         default=Path("/app/temp"),
         description="Directory for temporary files"
     )
+    temp_quota_mb: int = Field(
+        default=2048,
+        ge=64,
+        description="Temp space quota shared by all requests (admission control)"
+    )
+    temp_admission_timeout_seconds: float = Field(
+        default=5.0,
+        ge=0,
+        description="How long a request waits for temp quota before 503"
+    )
+    temp_prefer_tmpfs: bool = Field(
+        default=True,
+        description="Place temp files on tmpfs when it can hold the whole quota"
+    )
+    tmpfs_dir: Path = Field(
+        default=Path("/dev/shm"),
+        description="tmpfs mount used when temp_prefer_tmpfs is set"
+    )
+    temp_orphan_max_age_seconds: int = Field(
+        default=3 * 3600,
+        ge=60,
+        description="Temp files older than this are reaped even if their owner is alive"
+    )
+    temp_reap_interval_seconds: int = Field(
+        default=300,
+        ge=10,
+        description="Interval between orphaned temp file sweeps"
+    )
 
     # Server configuration
     host: str = Field(default="0.0.0.0", description="Server host")
@@ -57,6 +235,92 @@ class Settings(BaseSettings):
         le=32,
         description="Number of threads for ONNX inference"
     )
+    onnx_provider: str = Field(
+        default="cpu",
+        description="ONNX Runtime execution provider (cpu, cuda, coreml, ...)"
+    )
+    model_quantization: Literal["int8", "fp16", "fp32"] = Field(
+        default="int8",
+        description="Model file variant to load (encoder.int8.onnx, encoder.fp16.onnx, encoder.onnx)"
+    )
+    decoding_method: Literal["greedy_search", "modified_beam_search"] = Field(
+        default="greedy_search",
+        description="Default decoding method (overridable per request)"
+    )
+    beam_size: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="Active paths for modified_beam_search"
+    )
+    bpe_vocab_path: Optional[Path] = Field(
+        default=None,
+        description="BPE vocabulary used to tokenize hotwords (hotwords disabled if not set)"
+    )
+    hotwords_score: float = Field(
+        default=1.5,
+        description="Bonus score per hotword token during beam search"
+    )
+    max_hotwords: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum hotword phrases per request"
+    )
+    decode_batch_size: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Utterances decoded together in one batch"
+    )
+    auto_tune_threads: bool = Field(
+        default=False,
+        description="Benchmark thread counts on startup and use the fastest"
+    )
+    auto_tune_candidates: list[int] = Field(
+        default_factory=list,
+        description="Thread counts to benchmark (derived from CPU count if empty)"
+    )
+    calibration_audio_path: Optional[Path] = Field(
+        default=None,
+        description="Calibration clip for auto-tuning (synthetic audio if not set)"
+    )
+    auto_tune_clip_seconds: int = Field(
+        default=10,
+        ge=1,
+        le=60,
+        description="Calibration clip length used for auto-tuning"
+    )
+
+    # Language identification
+    language_id_mode: Literal["text", "audio"] = Field(
+        default="text",
+        description="Identify language from the transcript, or from the opening audio before decoding"
+    )
+    language_id_languages: list[str] = Field(
+        default=[
+            "bg", "hr", "cs", "da", "nl", "en", "et", "fi", "fr", "de", "el", "hu", "it",
+            "lv", "lt", "mt", "pl", "pt", "ro", "sk", "sl", "es", "sv", "ru", "uk"
+        ],
+        description="Languages the identifier may report"
+    )
+    default_language: str = Field(
+        default="en",
+        description="Language reported when there is nothing to identify"
+    )
+    language_id_encoder_path: Optional[Path] = Field(
+        default=None,
+        description="Whisper encoder for audio language identification"
+    )
+    language_id_decoder_path: Optional[Path] = Field(
+        default=None,
+        description="Whisper decoder for audio language identification"
+    )
+    language_id_audio_seconds: float = Field(
+        default=5.0,
+        ge=1.0,
+        le=30.0,
+        description="Opening audio used for audio language identification"
+    )
 
     # Supported formats
     supported_formats: list[str] = Field(
@@ -68,39 +332,46 @@ class Settings(BaseSettings):
         env_prefix = ""
         case_sensitive = False
 
+    def model_paths(self, model_dir: Optional[Path] = None) -> dict[str, Path]:
+        """Get model file paths (encoder, decoder, joiner, tokens) for a model directory."""
+        model_dir = model_dir or self.model_dir
+        suffix = {"int8": ".int8.onnx", "fp16": ".fp16.onnx", "fp32": ".onnx"}[self.model_quantization]
+        return {
+            "encoder": model_dir / f"encoder{suffix}",
+            "decoder": model_dir / f"decoder{suffix}",
+            "joiner": model_dir / f"joiner{suffix}",
+            "tokens": model_dir / "tokens.txt",
+        }
+
     @property
     def encoder_path(self) -> Path:
-        return self.model_dir / "encoder.int8.onnx"
+        return self.model_paths()["encoder"]
 
     @property
     def decoder_path(self) -> Path:
-        return self.model_dir / "decoder.int8.onnx"
+        return self.model_paths()["decoder"]
 
     @property
     def joiner_path(self) -> Path:
-        return self.model_dir / "joiner.int8.onnx"
+        return self.model_paths()["joiner"]
 
     @property
     def tokens_path(self) -> Path:
-        return self.model_dir / "tokens.txt"
+        return self.model_paths()["tokens"]
 
     def ensure_directories(self) -> None:
         """Create required directories if they don't exist."""
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
-    def validate_model_files(self) -> None:
+    def validate_model_files(self, model_dir: Optional[Path] = None) -> None:
         """Check that all model files exist."""
-        required_files = [
-            self.encoder_path,
-            self.decoder_path,
-            self.joiner_path,
-            self.tokens_path,
-        ]
+        model_dir = model_dir or self.model_dir
+        required_files = list(self.model_paths(model_dir).values())
         missing = [f for f in required_files if not f.exists()]
         if missing:
             raise RuntimeError(
                 f"Missing model files: {[str(f) for f in missing]}\n"
-                f"Expected in: {self.model_dir}"
+                f"Expected in: {model_dir}"
             )
 
 
@@ -4,21 +4,57 @@ ML Service for Audio Transcription.
 FastAPI application with Sherpa-ONNX ASR.
 """
 
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
 import sys
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+import time
+import uuid
+from contextlib import ExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncGenerator, Awaitable, Iterator, Optional
 
+import anyio
 import psutil
 import uvicorn
-from fastapi import FastAPI, File, HTTPException, UploadFile, Form
+from fastapi import FastAPI, File, HTTPException, UploadFile, Form, Header, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
 
 from config import get_settings
-from ml_models.asr import get_asr_model
-from services.audio_processor import get_audio_processor, cleanup_temp_directory, AudioProcessingError
-from services.transcription import get_transcription_service, TranscriptionError
+from ml_models.registry import get_model_registry, ModelRegistryError
+from services.audio_processor import (
+    get_audio_processor,
+    cleanup_temp_directory,
+    pcm_wav_header,
+    AudioProcessingError,
+    RAW_PCM_FORMATS
+)
+from services.cancellation import (
+    CancelToken,
+    CLIENT_DISCONNECTED,
+    DEADLINE_EXCEEDED,
+    get_cancellation_stats
+)
+from services.checkpoints import get_checkpoint_store
+from services.chunk_planner import get_chunk_planner
+from services.coalescing import get_single_flight, request_key
+from services.decode_batching import get_decode_batcher
+from services.language_id import get_language_identifier
+from services.memory_governor import get_memory_governor
+from services.temp_storage import get_temp_space_manager, TempNamespace, TempSpaceError
+from services.transcription import (
+    cancelled_error,
+    get_transcription_service,
+    parse_hotwords,
+    TranscriptionError,
+    TranscriptionResult
+)
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +65,12 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# How often a waiting request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Raw request bodies are written to disk in blocks of this size
+RAW_WRITE_BUFFER_BYTES = 1024 * 1024
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
@@ -36,12 +78,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     Application lifespan handler.
 
     Startup:
-    - Clean temp directory
-    - Load ASR model
+    - Reap orphaned temp files
+    - Load default ASR model (and spoken language ID model in audio mode)
+    - Start periodic temp reaper
 
     Shutdown:
-    - Unload model
-    - Clean temp directory
+    - Unload models
+    - Reap remaining temp files
     """
     settings = get_settings()
 
@@ -49,46 +92,82 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("=" * 50)
     logger.info("ML Service starting...")
     logger.info(f"Model dir: {settings.model_dir}")
+    logger.info(f"Models: {', '.join(get_model_registry().names())}")
+    logger.info(f"Quantization: {settings.model_quantization}, provider: {settings.onnx_provider}")
     logger.info(f"Chunk size: {settings.chunk_size_seconds}s")
-    logger.info(f"Temp directory: {settings.temp_dir}")
+    logger.info(f"Language ID: {settings.language_id_mode} mode")
+    logger.info(f"Temp directory: {get_temp_space_manager().root}")
+    logger.info(f"Temp quota: {settings.temp_quota_mb}MB")
+    logger.info(f"Memory budget: {get_memory_governor().budget_bytes // (1024 ** 2)}MB")
     logger.info("=" * 50)
 
-    # Clean temp directory on startup
-    logger.info("Cleaning temp directory...")
+    # Reap temp files left by crashed workers (live workers' files are kept)
+    logger.info("Reaping orphaned temp files...")
     files_removed = cleanup_temp_directory()
-    logger.info(f"Removed {files_removed} temporary files")
+    logger.info(f"Removed {files_removed} orphaned temp entries")
+
+    # Auto-tune inference threads for this host
+    if settings.auto_tune_threads:
+        logger.info("Auto-tuning inference threads...")
+        try:
+            get_model_registry().tune_threads()
+        except Exception as e:
+            logger.warning(f"Thread auto-tuning failed: {e}")
 
     # Load ASR model
     logger.info("Loading ASR model (this may take a few minutes)...")
     try:
-        asr_model = get_asr_model()
-        asr_model.load_model()
+        get_model_registry().load()
         logger.info("ASR model loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load ASR model: {e}")
         logger.error("Service will start but transcription will fail")
 
+    language_identifier = get_language_identifier()
+    if language_identifier.audio_enabled:
+        logger.info("Loading spoken language ID model...")
+        try:
+            language_identifier.spoken_model.load_model()
+        except Exception as e:
+            logger.error(f"Failed to load spoken language ID model: {e}")
+            logger.error("Language will be identified from transcripts")
+
     logger.info("=" * 50)
     logger.info("ML Service ready!")
     logger.info("=" * 50)
 
+    reaper_task = asyncio.create_task(_reap_temp_periodically())
+
     yield
 
     # Shutdown
     logger.info("ML Service shutting down...")
+    reaper_task.cancel()
 
-    # Unload model
+    # Unload models
     try:
-        asr_model = get_asr_model()
-        asr_model.unload_model()
+        get_model_registry().unload_all()
+        get_language_identifier().spoken_model.unload_model()
     except Exception as e:
-        logger.warning(f"Error unloading model: {e}")
+        logger.warning(f"Error unloading models: {e}")
 
     # Final cleanup
     cleanup_temp_directory()
     logger.info("ML Service stopped")
 
 
+async def _reap_temp_periodically() -> None:
+    """Reap orphaned temp files and expired checkpoints every TEMP_REAP_INTERVAL_SECONDS."""
+    settings = get_settings()
+    while True:
+        await asyncio.sleep(settings.temp_reap_interval_seconds)
+        try:
+            await run_in_threadpool(cleanup_temp_directory)
+            await run_in_threadpool(get_checkpoint_store().reap)
+        except Exception as e:
+            logger.warning(f"Temp reaper failed: {e}")
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Audio Transcription ML Service",
@@ -110,12 +189,33 @@ app.add_middleware(
 
 
 # Response models
+class FailedSpan(BaseModel):
+    """Audio whose chunks failed to decode (missing from the text)."""
+    start: float
+    end: float
+
+
 class TranscriptionData(BaseModel):
     """Transcription result data."""
     text: str
     language: str
     duration: float
     processing_time_ms: int
+    model: str
+    partial: bool = False
+    failed_spans: list[FailedSpan] = []
+
+    @classmethod
+    def from_result(cls, result: TranscriptionResult) -> "TranscriptionData":
+        return cls(
+            text=result.text,
+            language=result.language,
+            duration=result.duration,
+            processing_time_ms=result.processing_time_ms,
+            model=result.model,
+            partial=result.partial,
+            failed_spans=[FailedSpan(start=start, end=end) for start, end in result.failed_spans]
+        )
 
 
 class TranscriptionResponse(BaseModel):
@@ -143,17 +243,90 @@ class ModelStatus(BaseModel):
     name: str
 
 
+class RegistryModelStatus(BaseModel):
+    """Registered model information."""
+    name: str
+    model_dir: str
+    loaded: bool
+    in_flight: int
+    draining: int
+    footprint_mb: float
+
+
+class ModelsResponse(BaseModel):
+    """Model registry listing."""
+    default: str
+    budget_mb: int
+    models: list[RegistryModelStatus]
+
+
+class RuntimeStatus(BaseModel):
+    """ONNX Runtime configuration."""
+    provider: str
+    quantization: str
+    num_threads: int
+    auto_tuned: bool
+    tuning_timings_ms: dict[str, float]
+
+
 class MemoryStatus(BaseModel):
     """Memory status information."""
     used_gb: float
     available_gb: float
+    budget_mb: float
+    rss_mb: float
+    reserved_mb: float
+    waiting: int
+    degraded_total: int
+    rejected_total: int
+
+
+class TempStatus(BaseModel):
+    """Temp space information."""
+    root: str
+    tmpfs: bool
+    active_requests: int
+    reserved_mb: float
+    quota_mb: int
+    free_disk_mb: float
+
+
+class DecodeStatus(BaseModel):
+    """Decode workers and measured speed."""
+    workers: int
+    busy: int
+    waiting: int
+    queued_audio_seconds: float
+    rtf: float
+    adaptive_chunking: bool
+    batched_requests_total: int
+
+
+class CoalescingStatus(BaseModel):
+    """Shared in-flight transcriptions."""
+    in_flight: int
+    coalesced_total: int
+
+
+class CancellationStatus(BaseModel):
+    """Requests that stopped waiting and work that was aborted."""
+    client_disconnected: int
+    deadline_exceeded: int
+    aborted_jobs: int
+    skipped_audio_seconds: float
 
 
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
     model: ModelStatus
+    models: list[RegistryModelStatus]
+    runtime: RuntimeStatus
+    decode: DecodeStatus
+    coalescing: CoalescingStatus
+    cancellation: CancellationStatus
     memory: MemoryStatus
+    temp: TempStatus
 
 
 @app.get("/")
@@ -165,6 +338,10 @@ async def root() -> dict:
         "version": "1.0.0",
         "endpoints": {
             "transcribe": "POST /transcribe",
+            "transcribe_raw": "POST /transcribe/raw",
+            "transcribe_batch": "POST /transcribe/batch",
+            "models": "GET /models",
+            "swap_model": "POST /models/{name}/swap",
             "health": "GET /health",
             "docs": "GET /docs"
         }
@@ -181,10 +358,28 @@ async def root() -> dict:
     }
 )
 async def transcribe_audio(
+    request: Request,
     audio: UploadFile = File(..., description="Audio file to transcribe"),
     language: Optional[str] = Form(
         default=None,
         description="Language code (auto-detect if not specified)"
+    ),
+    decoding_method: Optional[str] = Form(
+        default=None,
+        description="greedy_search or modified_beam_search (beam search if hotwords are given)"
+    ),
+    hotwords: Optional[str] = Form(
+        default=None,
+        description="Comma or newline separated phrases to bias recognition towards"
+    ),
+    model: Optional[str] = Form(
+        default=None,
+        description="Model name (routed by audio duration if not specified)"
+    ),
+    x_request_timeout: Optional[float] = Header(
+        default=None,
+        gt=0,
+        description="Seconds the client will wait; work stops once they are up"
     )
 ) -> TranscriptionResponse:
     """
@@ -193,11 +388,14 @@ async def transcribe_audio(
     Accepts audio files in mp3, wav, ogg, m4a, flac formats.
     Supports chunking for long audio files.
 
+    Decoding stops at the next chunk boundary if the client disconnects or
+    X-Request-Timeout passes.
+
     Returns transcribed text with metadata.
     """
+    deadline = time.monotonic() + x_request_timeout if x_request_timeout else None
     settings = get_settings()
     audio_processor = get_audio_processor()
-    transcription_service = get_transcription_service()
 
     # Validate filename
     if not audio.filename:
@@ -239,70 +437,628 @@ async def transcribe_audio(
             }
         )
 
-    from pathlib import Path
-    saved_path: Optional[Path] = None
+    options = {
+        "language": language,
+        "model": model,
+        "decoding_method": decoding_method,
+        "hotwords": parse_hotwords(hotwords),
+    }
+
+    try:
+        result = await _transcribe_coalesced(
+            request, run_in_threadpool(_save_upload, audio, options), options, deadline
+        )
+    except Exception as e:
+        raise _transcription_http_error(e)
+
+    return TranscriptionResponse(
+        success=True,
+        data=TranscriptionData.from_result(result)
+    )
+
+
+@app.post(
+    "/transcribe/raw",
+    response_class=Response,
+    responses={
+        200: {"model": TranscriptionResponse, "description": "Compact JSON transcription result"},
+        400: {"model": ErrorResponse, "description": "Invalid audio format"},
+        413: {"model": ErrorResponse, "description": "File too large"},
+        500: {"model": ErrorResponse, "description": "Transcription failed"}
+    }
+)
+async def transcribe_raw(
+    request: Request,
+    x_audio_format: str = Header(
+        description="pcm_s16le or f32le (headerless, interleaved), or a container format such as opus or ogg"
+    ),
+    x_sample_rate: Optional[int] = Header(
+        default=None,
+        ge=8000,
+        le=192000,
+        description="Sample rate of PCM audio (SAMPLE_RATE if not specified)"
+    ),
+    x_channels: int = Header(default=1, ge=1, le=8, description="Channels of PCM audio"),
+    x_language: Optional[str] = Header(default=None, description="Language code (auto-detect if not specified)"),
+    x_model: Optional[str] = Header(default=None, description="Model name (routed by audio duration if not specified)"),
+    x_decoding_method: Optional[str] = Header(
+        default=None,
+        description="greedy_search or modified_beam_search (beam search if hotwords are given)"
+    ),
+    x_hotwords: Optional[str] = Header(
+        default=None,
+        description="Comma separated phrases to bias recognition towards"
+    ),
+    x_request_timeout: Optional[float] = Header(
+        default=None,
+        gt=0,
+        description="Seconds the client will wait; work stops once they are up"
+    )
+) -> Response:
+    """
+    Transcribe audio sent as the raw request body.
+
+    A lean alternative to /transcribe for high request rates: the body is
+    the audio itself (no multipart parsing), options travel in headers and
+    the result is serialized without response model validation. Headerless
+    PCM at 16kHz mono skips conversion entirely.
+
+    Transcription is shared with /transcribe: identical in-flight requests
+    coalesce (across both endpoints for container formats), and decoding
+    stops when the client disconnects or X-Request-Timeout passes.
+
+    Returns the same {"success": true, "data": {...}} envelope as
+    /transcribe; failed_spans is only included for partial results.
+    """
+    deadline = time.monotonic() + x_request_timeout if x_request_timeout else None
+    settings = get_settings()
+    audio_format = x_audio_format.lower()
+    sample_rate = x_sample_rate or settings.sample_rate
+
+    options = {
+        "language": x_language,
+        "model": x_model,
+        "decoding_method": x_decoding_method,
+        "hotwords": parse_hotwords(x_hotwords),
+    }
 
     try:
-        # Save uploaded file
-        saved_path = audio_processor.save_upload(audio.file, audio.filename)
-
-        # Perform transcription
-        result = transcription_service.transcribe(saved_path, language)
-
-        return TranscriptionResponse(
-            success=True,
-            data=TranscriptionData(
-                text=result.text,
-                language=result.language,
-                duration=result.duration,
-                processing_time_ms=result.processing_time_ms
+        if audio_format not in RAW_PCM_FORMATS and not get_audio_processor().validate_format(f"audio.{audio_format}"):
+            supported = ", ".join([*RAW_PCM_FORMATS, *settings.supported_formats])
+            raise TranscriptionError(
+                f"Unsupported audio format. Supported: {supported}",
+                code="INVALID_AUDIO_FORMAT",
+                status_code=400
             )
+
+        result = await _transcribe_coalesced(
+            request,
+            _save_raw_body(request, audio_format, sample_rate, x_channels, options),
+            options,
+            deadline
         )
+    except Exception as e:
+        raise _transcription_http_error(e)
 
-    except TranscriptionError as e:
-        logger.error(f"Transcription error: {e.code} - {e.message}")
-        raise HTTPException(
-            status_code=500,
+    data = {
+        "text": result.text,
+        "language": result.language,
+        "duration": result.duration,
+        "processing_time_ms": result.processing_time_ms,
+        "model": result.model,
+    }
+    if result.partial:
+        data["partial"] = True
+        data["failed_spans"] = [{"start": start, "end": end} for start, end in result.failed_spans]
+    return Response(
+        content=json.dumps({"success": True, "data": data}, ensure_ascii=False, separators=(",", ":")),
+        media_type="application/json"
+    )
+
+
+def _transcription_http_error(error: Exception) -> HTTPException:
+    """Map an error from a single-file transcription to its HTTP response."""
+    if isinstance(error, TranscriptionError):
+        logger.error(f"Transcription error: {error.code} - {error.message}")
+        return HTTPException(
+            status_code=error.status_code,
             detail={
                 "success": False,
                 "error": {
-                    "code": e.code,
-                    "message": e.message
+                    "code": error.code,
+                    "message": error.message
                 }
-            }
+            },
+            headers={"Retry-After": str(error.retry_after)} if error.retry_after else None
         )
 
-    except AudioProcessingError as e:
-        logger.error(f"Audio processing error: {e}")
-        raise HTTPException(
+    if isinstance(error, TempSpaceError):
+        logger.warning(f"Temp space admission rejected: {error}")
+        return HTTPException(
+            status_code=503 if error.retry_after else 507,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "TEMP_SPACE_EXHAUSTED",
+                    "message": str(error)
+                }
+            },
+            headers={"Retry-After": str(error.retry_after)} if error.retry_after else None
+        )
+
+    if isinstance(error, AudioProcessingError):
+        logger.error(f"Audio processing error: {error}")
+        return HTTPException(
             status_code=400,
             detail={
                 "success": False,
                 "error": {
                     "code": "AUDIO_PROCESSING_ERROR",
-                    "message": str(e)
+                    "message": str(error)
                 }
             }
         )
 
-    except Exception as e:
-        logger.exception("Unexpected error during transcription")
-        raise HTTPException(
-            status_code=500,
+    logger.error("Unexpected error during transcription", exc_info=error)
+    return HTTPException(
+        status_code=500,
+        detail={
+            "success": False,
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": "Failed to transcribe audio",
+                "details": str(error)
+            }
+        }
+    )
+
+
+async def _transcribe_coalesced(
+    request: Request,
+    saving: Awaitable[tuple[ExitStack, TempNamespace, Path, str, str]],
+    options: dict,
+    deadline: Optional[float]
+) -> TranscriptionResult:
+    """
+    Transcribe an upload, sharing the work with identical in-flight requests.
+
+    saving stores (and hashes) the upload into its own temp namespace and
+    returns what _save_upload returns. If an
+    identical request is already being transcribed this one waits for its
+    result and drops its copy; otherwise the namespace is handed to a new
+    shared job, which removes it when transcription finishes or fails.
+
+    The request stops waiting when its client disconnects or its deadline
+    passes; a job nobody waits for anymore is cancelled.
+    """
+    save = asyncio.ensure_future(saving)
+    try:
+        stack, temp_ns, saved_path, content_hash, key = await asyncio.shield(save)
+    except asyncio.CancelledError:
+        # The save keeps running in its thread; clean up once it is done
+        save.add_done_callback(_close_saved_upload)
+        raise
+
+    handed_over = False
+
+    def start_job(cancel: CancelToken):
+        nonlocal handed_over
+        handed_over = True
+        return _run_transcription_job(stack, temp_ns, saved_path, content_hash, options, cancel)
+
+    job = asyncio.ensure_future(get_single_flight().run(key, start_job))
+    watcher = asyncio.ensure_future(_watch_request(request, deadline))
+    try:
+        await asyncio.wait({job, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if job.done():
+            return job.result()
+
+        # Detach from the job; it is cancelled if no other request waits for it
+        reason = watcher.result()
+        get_cancellation_stats().record_request(reason)
+        logger.info(f"Request stopped waiting for transcription: {reason}")
+        raise cancelled_error(reason)
+    finally:
+        watcher.cancel()
+        if not job.done():
+            job.cancel()
+            await asyncio.gather(job, return_exceptions=True)
+        if not handed_over:
+            await run_in_threadpool(stack.close)
+
+
+async def _watch_request(request: Request, deadline: Optional[float]) -> str:
+    """
+    Wait until the client disconnects or the deadline passes.
+
+    Returns:
+        Cancellation reason
+    """
+    while True:
+        if await request.is_disconnected():
+            return CLIENT_DISCONNECTED
+        delay = DISCONNECT_POLL_SECONDS
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return DEADLINE_EXCEEDED
+            delay = min(delay, remaining)
+        await asyncio.sleep(delay)
+
+
+def _save_upload(audio: UploadFile, options: dict) -> tuple[ExitStack, TempNamespace, Path, str, str]:
+    """
+    Save an upload into a new temp namespace (runs in the threadpool).
+
+    Returns:
+        (ExitStack owning the namespace, namespace, saved path, content hash, coalescing key)
+    """
+    audio_processor = get_audio_processor()
+    stack = ExitStack()
+    try:
+        temp_ns = stack.enter_context(get_temp_space_manager().namespace(audio.size or 0))
+        hasher = hashlib.sha256()
+        saved_path = audio_processor.save_upload(audio.file, audio.filename, temp_ns.path, hasher)
+        if not audio.size:
+            temp_ns.reserve(saved_path.stat().st_size)
+    except BaseException:
+        stack.close()
+        raise
+
+    content_hash = hasher.hexdigest()
+    key = request_key(content_hash, saved_path.suffix, **options)
+    return stack, temp_ns, saved_path, content_hash, key
+
+
+async def _save_raw_body(
+    request: Request,
+    audio_format: str,
+    sample_rate: int,
+    channels: int,
+    options: dict
+) -> tuple[ExitStack, TempNamespace, Path, str, str]:
+    """
+    Stream a raw request body into a new temp namespace.
+
+    Headerless PCM is written behind a WAV header (so 16kHz mono needs no
+    conversion); container formats are saved as they are. Writes are
+    buffered and done in the threadpool.
+
+    Returns:
+        Same as _save_upload
+    """
+    max_bytes = get_settings().max_file_size_mb * 1024 * 1024
+    declared = int(request.headers.get("content-length") or 0)
+    if declared > max_bytes:
+        raise TranscriptionError(
+            f"Audio file exceeds maximum size of {get_settings().max_file_size_mb}MB",
+            code="FILE_TOO_LARGE",
+            status_code=413
+        )
+
+    pcm = audio_format in RAW_PCM_FORMATS
+    hasher = hashlib.sha256()
+    if pcm:
+        # The same samples at another rate or layout are different audio
+        hasher.update(f"{audio_format}:{sample_rate}:{channels}|".encode())
+
+    stack = ExitStack()
+    try:
+        temp_ns = await run_in_threadpool(stack.enter_context, get_temp_space_manager().namespace(declared))
+        saved_path = temp_ns.file_path(f"{uuid.uuid4()}.{'wav' if pcm else audio_format}")
+        size = 0
+        with open(saved_path, "wb") as f:
+            if pcm:
+                f.write(pcm_wav_header(0, audio_format, sample_rate, channels))
+            buffer = bytearray()
+            async for block in request.stream():
+                size += len(block)
+                if size > max_bytes:
+                    raise TranscriptionError(
+                        f"Audio file exceeds maximum size of {get_settings().max_file_size_mb}MB",
+                        code="FILE_TOO_LARGE",
+                        status_code=413
+                    )
+                hasher.update(block)
+                buffer += block
+                if len(buffer) >= RAW_WRITE_BUFFER_BYTES:
+                    await run_in_threadpool(f.write, buffer)
+                    buffer.clear()
+            await run_in_threadpool(f.write, buffer)
+
+            if pcm:
+                frame_bytes = RAW_PCM_FORMATS[audio_format][0] * channels
+                if size % frame_bytes:
+                    raise TranscriptionError(
+                        f"{audio_format} body is not a whole number of {channels}-channel frames",
+                        code="INVALID_AUDIO_FORMAT",
+                        status_code=400
+                    )
+                f.seek(0)
+                f.write(pcm_wav_header(size, audio_format, sample_rate, channels))
+
+        if size > declared:
+            await run_in_threadpool(temp_ns.reserve, size - declared)
+    except ClientDisconnect:
+        stack.close()
+        get_cancellation_stats().record_request(CLIENT_DISCONNECTED)
+        raise cancelled_error(CLIENT_DISCONNECTED)
+    except BaseException:
+        stack.close()
+        raise
+
+    content_hash = hasher.hexdigest()
+    key = request_key(content_hash, saved_path.suffix, **options)
+    return stack, temp_ns, saved_path, content_hash, key
+
+
+def _close_saved_upload(save: asyncio.Future) -> None:
+    """Remove an upload saved for a request that was cancelled meanwhile."""
+    if not save.cancelled() and save.exception() is None:
+        save.result()[0].close()
+
+
+async def _run_transcription_job(
+    stack: ExitStack,
+    temp_ns: TempNamespace,
+    saved_path: Path,
+    content_hash: str,
+    options: dict,
+    cancel: CancelToken
+) -> TranscriptionResult:
+    """Transcribe a saved upload and remove its temp namespace afterwards."""
+    try:
+        return await run_in_threadpool(
+            get_transcription_service().transcribe,
+            saved_path,
+            temp_namespace=temp_ns,
+            cancel=cancel,
+            content_hash=content_hash,
+            **options
+        )
+    finally:
+        await run_in_threadpool(stack.close)
+
+
+@app.post(
+    "/transcribe/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One JSON line per file as it completes, then a summary line"
+        },
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        413: {"model": ErrorResponse, "description": "Batch too large"},
+        503: {"model": ErrorResponse, "description": "Temp space exhausted"}
+    }
+)
+async def transcribe_batch(
+    request: Request,
+    audios: list[UploadFile] = File(default=[], description="Audio files to transcribe"),
+    archive: Optional[UploadFile] = File(default=None, description="zip or tar archive of audio files"),
+    language: Optional[str] = Form(
+        default=None,
+        description="Language code (auto-detect if not specified)"
+    ),
+    decoding_method: Optional[str] = Form(
+        default=None,
+        description="greedy_search or modified_beam_search (beam search if hotwords are given)"
+    ),
+    hotwords: Optional[str] = Form(
+        default=None,
+        description="Comma or newline separated phrases to bias recognition towards"
+    ),
+    model: Optional[str] = Form(
+        default=None,
+        description="Model name (routed by audio duration per file if not specified)"
+    ),
+    x_request_timeout: Optional[float] = Header(
+        default=None,
+        gt=0,
+        description="Seconds the client will wait; remaining files are skipped once they are up"
+    )
+) -> StreamingResponse:
+    """
+    Transcribe many audio files in one request.
+
+    Accepts several `audios` files and/or one `archive`. Files are decoded
+    concurrently and their chunks are decoded together in batches. Results
+    are streamed back as newline-delimited JSON, one line per file in
+    completion order, followed by a summary line.
+
+    Work stops if the client disconnects; past X-Request-Timeout the
+    summary line reports the batch as cancelled.
+    """
+    cancel = CancelToken.with_timeout(x_request_timeout)
+    settings = get_settings()
+    transcription_service = get_transcription_service()
+    hotword_list = parse_hotwords(hotwords)
+
+    def error(status_code: int, code: str, message: str, retry_after: Optional[int] = None) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
             detail={
                 "success": False,
                 "error": {
-                    "code": "INTERNAL_ERROR",
-                    "message": "Failed to transcribe audio",
-                    "details": str(e)
+                    "code": code,
+                    "message": message
                 }
-            }
+            },
+            headers={"Retry-After": str(retry_after)} if retry_after else None
         )
 
-    finally:
-        # Always cleanup the uploaded file
-        if saved_path:
-            audio_processor.cleanup_file(saved_path)
+    if not audios and archive is None:
+        raise error(400, "MISSING_AUDIO", "Provide audio files or an archive")
+
+    if len(audios) > settings.batch_max_files:
+        raise error(413, "BATCH_TOO_LARGE", f"Batch exceeds {settings.batch_max_files} files")
+
+    max_bytes = settings.batch_max_total_mb * 1024 * 1024
+    upload_bytes = sum(f.size or 0 for f in audios) + ((archive.size or 0) if archive else 0)
+    if upload_bytes > max_bytes:
+        raise error(413, "BATCH_TOO_LARGE", f"Batch exceeds {settings.batch_max_total_mb}MB")
+
+    try:
+        transcription_service.resolve_decoding_method(decoding_method, hotword_list)
+        stack, temp_ns, items, positions, rejected = await run_in_threadpool(
+            _save_batch_uploads, audios, archive, upload_bytes
+        )
+    except TranscriptionError as e:
+        raise error(e.status_code, e.code, e.message)
+    except TempSpaceError as e:
+        raise error(503 if e.retry_after else 507, "TEMP_SPACE_EXHAUSTED", str(e), e.retry_after)
+    except AudioProcessingError as e:
+        raise error(400, "AUDIO_PROCESSING_ERROR", str(e))
+
+    recorded = False
+
+    def stream() -> Iterator[str]:
+        nonlocal recorded
+        start_time = time.time()
+        failed = len(rejected)
+        completed = len(rejected)
+        cancelled = None
+
+        for line in rejected:
+            yield json.dumps(line) + "\n"
+
+        try:
+            for item in transcription_service.transcribe_many(
+                items,
+                language=language,
+                model=model,
+                decoding_method=decoding_method,
+                hotwords=hotword_list,
+                temp_namespace=temp_ns,
+                cancel=cancel
+            ):
+                completed += 1
+                if item.error is not None:
+                    failed += 1
+                    line = {
+                        "index": positions[item.index],
+                        "filename": item.name,
+                        "success": False,
+                        "error": {"code": item.error.code, "message": item.error.message}
+                    }
+                else:
+                    line = {
+                        "index": positions[item.index],
+                        "filename": item.name,
+                        "success": True,
+                        "data": TranscriptionData.from_result(item.result).model_dump()
+                    }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except TranscriptionError as e:
+            # transcribe_many only raises once cancel fires
+            cancelled = e.code
+            get_cancellation_stats().record_request(cancel.reason)
+            recorded = True
+
+        summary = {
+            "done": True,
+            "total": len(items) + len(rejected),
+            "failed": failed,
+            "processing_time_ms": int((time.time() - start_time) * 1000)
+        }
+        if cancelled:
+            summary["cancelled"] = cancelled
+            summary["skipped"] = len(items) + len(rejected) - completed
+        yield json.dumps(summary) + "\n"
+
+    async def stream_while_connected() -> AsyncGenerator[str, None]:
+        # The stream runs in a worker thread, which only sees a disconnect through the token
+        watcher = asyncio.ensure_future(_watch_request(request, None))
+        watcher.add_done_callback(lambda w: w.cancelled() or cancel.cancel(w.result()))
+        lines = stream()
+        finished = False
+        try:
+            async for line in iterate_in_threadpool(lines):
+                yield line
+            finished = True
+        finally:
+            watcher.cancel()
+            # Starlette may cancel the response on disconnect before the watcher notices
+            if not finished:
+                cancel.cancel(CLIENT_DISCONNECTED)
+                if not recorded:
+                    get_cancellation_stats().record_request(cancel.reason)
+
+            def close() -> None:
+                try:
+                    lines.close()
+                finally:
+                    stack.close()
+
+            # Closing waits for the batch's workers, so it runs off the event loop and can't be cancelled
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(close)
+
+    return StreamingResponse(stream_while_connected(), media_type="application/x-ndjson")
+
+
+def _save_batch_uploads(
+    audios: list[UploadFile],
+    archive: Optional[UploadFile],
+    upload_bytes: int
+) -> tuple[ExitStack, TempNamespace, list[tuple[str, Path]], list[int], list[dict]]:
+    """
+    Save batch uploads into a temp namespace that outlives the request handler.
+
+    The returned ExitStack owns the namespace; the response stream closes it.
+
+    Returns:
+        (exit stack, namespace, (name, path) items, request position of each
+        item, error lines for rejected files)
+    """
+    settings = get_settings()
+    audio_processor = get_audio_processor()
+    stack = ExitStack()
+
+    try:
+        temp_ns = stack.enter_context(get_temp_space_manager().namespace(upload_bytes))
+        items: list[tuple[str, Path]] = []
+        positions: list[int] = []
+        rejected: list[dict] = []
+
+        for position, upload in enumerate(audios):
+            if not upload.filename or not audio_processor.validate_format(upload.filename):
+                rejected.append({
+                    "index": position,
+                    "filename": upload.filename or "",
+                    "success": False,
+                    "error": {
+                        "code": "INVALID_AUDIO_FORMAT",
+                        "message": f"Unsupported audio format. Supported: {', '.join(settings.supported_formats)}"
+                    }
+                })
+                continue
+            items.append((upload.filename, audio_processor.save_upload(upload.file, upload.filename, temp_ns.path)))
+            positions.append(position)
+
+        if archive is not None:
+            archive_path = audio_processor.save_upload(archive.file, "archive.bin", temp_ns.path)
+            max_bytes = settings.batch_max_total_mb * 1024 * 1024
+            extracted = audio_processor.extract_archive(
+                archive_path,
+                temp_ns.path,
+                max_files=settings.batch_max_files - len(items),
+                max_bytes=max_bytes
+            )
+            temp_ns.reserve(sum(path.stat().st_size for _, path in extracted))
+            # The archive's share of the upload reservation goes with it
+            archive_bytes = archive_path.stat().st_size
+            audio_processor.cleanup_file(archive_path)
+            temp_ns.release(archive_bytes)
+            positions.extend(range(len(audios), len(audios) + len(extracted)))
+            items.extend(extracted)
+
+        return stack, temp_ns, items, positions, rejected
+
+    except BaseException:
+        stack.close()
+        raise
 
 
 @app.get(
@@ -315,7 +1071,8 @@ async def health_check() -> HealthResponse:
 
     Returns model status and memory usage information.
     """
-    asr_model = get_asr_model()
+    registry = get_model_registry()
+    is_loaded = registry.is_loaded()
 
     # Get memory info
     memory = psutil.virtual_memory()
@@ -323,16 +1080,121 @@ async def health_check() -> HealthResponse:
     available_gb = round(memory.available / (1024 ** 3), 1)
 
     return HealthResponse(
-        status="healthy" if asr_model.is_loaded else "degraded",
+        status="healthy" if is_loaded else "degraded",
         model=ModelStatus(
-            loaded=asr_model.is_loaded,
-            name="parakeet-tdt-0.6b-v3"
+            loaded=is_loaded,
+            name=registry.default_name
         ),
+        models=[RegistryModelStatus(**m) for m in registry.status()],
+        runtime=RuntimeStatus(**registry.runtime_info()),
+        decode=DecodeStatus(**get_chunk_planner().status(), **get_decode_batcher().status()),
+        coalescing=CoalescingStatus(**get_single_flight().status()),
+        cancellation=CancellationStatus(**get_cancellation_stats().status()),
         memory=MemoryStatus(
             used_gb=used_gb,
-            available_gb=available_gb
-        )
+            available_gb=available_gb,
+            **get_memory_governor().status()
+        ),
+        temp=TempStatus(**get_temp_space_manager().usage())
+    )
+
+
+@app.get(
+    "/models",
+    response_model=ModelsResponse
+)
+async def list_models() -> ModelsResponse:
+    """List registered models and their load state."""
+    registry = get_model_registry()
+    return ModelsResponse(
+        default=registry.default_name,
+        budget_mb=registry.settings.model_memory_budget_mb,
+        models=[RegistryModelStatus(**m) for m in registry.status()]
+    )
+
+
+@app.post(
+    "/models/{name}/swap",
+    response_model=ModelsResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Unknown model or model directory outside MODELS_ROOT"},
+        401: {"model": ErrorResponse, "description": "Missing or invalid admin token"},
+        403: {"model": ErrorResponse, "description": "Model swapping is disabled"},
+        500: {"model": ErrorResponse, "description": "Model load failed"}
+    }
+)
+async def swap_model(
+    name: str,
+    model_dir: Optional[str] = Form(
+        default=None,
+        description="New model directory inside MODELS_ROOT (reload current files if not specified)"
+    ),
+    x_admin_token: Optional[str] = Header(
+        default=None,
+        description="ADMIN_TOKEN of the service"
     )
+) -> ModelsResponse:
+    """
+    Hot-swap a registered model without downtime.
+
+    Requires X-Admin-Token (the endpoint is disabled if ADMIN_TOKEN isn't
+    set). The replacement is loaded in the background and swapped in
+    atomically; requests already running on the old model finish on it.
+    """
+    settings = get_settings()
+    registry = get_model_registry()
+
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "FORBIDDEN",
+                    "message": "Model swapping is disabled (ADMIN_TOKEN is not set)"
+                }
+            }
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "UNAUTHORIZED",
+                    "message": "Missing or invalid X-Admin-Token"
+                }
+            }
+        )
+
+    try:
+        await run_in_threadpool(registry.swap, name, Path(model_dir) if model_dir else None)
+    except ModelRegistryError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "error": {
+                    "code": e.code,
+                    "message": str(e)
+                }
+            }
+        )
+    except Exception as e:
+        logger.exception(f"Failed to swap model '{name}'")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "MODEL_LOAD_FAILED",
+                    "message": f"Failed to load model '{name}'",
+                    "details": str(e)
+                }
+            }
+        )
+
+    return await list_models()
 
 
 if __name__ == "__main__":
@@ -4,7 +4,9 @@ ASR Model wrapper using Sherpa-ONNX.
 Lightweight and fast inference on CPU.
 """
 
+import hashlib
 import logging
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -16,58 +18,140 @@ from config import get_settings
 
 logger = logging.getLogger(__name__)
 
+DECODING_METHODS = ("greedy_search", "modified_beam_search")
+
+
+def model_fingerprint(name: str, model_dir: Path) -> str:
+    """
+    Identify the weights a model directory serves.
+
+    Covers the model directory and the size and mtime of its files, so
+    a swap to another directory or to updated files changes it.
+    """
+    parts = [name, str(model_dir.resolve())]
+    for role, path in sorted(get_settings().model_paths(model_dir).items()):
+        try:
+            stat = path.stat()
+            parts.append(f"{role}:{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{role}:{path.name}:missing")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
 
 class ASRModel:
     """Wrapper for Sherpa-ONNX transducer ASR model."""
 
-    _instance: Optional["ASRModel"] = None
-    _recognizer: Optional[sherpa_onnx.OfflineRecognizer] = None
-
-    def __new__(cls) -> "ASRModel":
-        """Singleton pattern for model instance."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        model_dir: Optional[Path] = None,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Registry name of the model (defaults to the configured default model)
+            model_dir: Directory with the model files (defaults to MODEL_DIR)
+            num_threads: Inference threads (defaults to NUM_THREADS)
+        """
+        settings = get_settings()
+        self.name = name or settings.default_model_name
+        self.model_dir = Path(model_dir) if model_dir else settings.model_dir
+        self.num_threads = num_threads or settings.num_threads
+        self._recognizer: Optional[sherpa_onnx.OfflineRecognizer] = None
+        self._beam_recognizer: Optional[sherpa_onnx.OfflineRecognizer] = None
+        self._beam_lock = threading.Lock()
+        self.fingerprint = model_fingerprint(self.name, self.model_dir)
 
     @property
     def is_loaded(self) -> bool:
         """Check if model is loaded."""
         return self._recognizer is not None
 
+    @property
+    def footprint_bytes(self) -> int:
+        """Estimated resident size of the model (sum of its ONNX files per recognizer)."""
+        paths = get_settings().model_paths(self.model_dir)
+        size = sum(p.stat().st_size for p in paths.values() if p.exists())
+        return size * 2 if self._beam_recognizer is not None else size
+
     def load_model(self) -> None:
         """Load the ASR model from ONNX files."""
         if self._recognizer is not None:
-            logger.info("Model already loaded, skipping")
+            logger.info(f"Model '{self.name}' already loaded, skipping")
             return
 
         settings = get_settings()
 
-        logger.info(f"Loading ASR model from: {settings.model_dir}")
+        logger.info(f"Loading ASR model '{self.name}' from: {self.model_dir}")
 
         # Validate model files exist
-        settings.validate_model_files()
+        settings.validate_model_files(self.model_dir)
 
         try:
-            # Create recognizer using from_transducer factory method
-            # model_type="nemo_transducer" required for Parakeet-TDT models
-            self._recognizer = sherpa_onnx.OfflineRecognizer.from_transducer(
-                encoder=str(settings.encoder_path),
-                decoder=str(settings.decoder_path),
-                joiner=str(settings.joiner_path),
-                tokens=str(settings.tokens_path),
-                num_threads=settings.num_threads,
-                provider="cpu",
-                decoding_method="greedy_search",
-                model_type="nemo_transducer",
+            self._recognizer = self._create_recognizer("greedy_search")
+            logger.info(
+                f"Using {self.num_threads} threads, provider {settings.onnx_provider}, "
+                f"{settings.model_quantization} weights"
             )
-            logger.info(f"Using {settings.num_threads} threads for inference")
 
-            logger.info("ASR model loaded successfully")
+            logger.info(f"ASR model '{self.name}' loaded successfully")
 
         except Exception as e:
             logger.error(f"Failed to load ASR model: {e}")
             raise RuntimeError(f"Failed to load ASR model: {e}")
 
+    def _create_recognizer(self, decoding_method: str) -> sherpa_onnx.OfflineRecognizer:
+        """Create a recognizer for the given decoding method."""
+        settings = get_settings()
+        paths = settings.model_paths(self.model_dir)
+
+        # Hotwords are tokenized with the BPE vocabulary, so they are only
+        # available when one is configured
+        hotword_options = {}
+        if decoding_method == "modified_beam_search" and settings.bpe_vocab_path:
+            hotword_options = {
+                "modeling_unit": "bpe",
+                "bpe_vocab": str(settings.bpe_vocab_path),
+                "hotwords_score": settings.hotwords_score,
+            }
+
+        # Create recognizer using from_transducer factory method
+        # model_type="nemo_transducer" required for Parakeet-TDT models
+        return sherpa_onnx.OfflineRecognizer.from_transducer(
+            encoder=str(paths["encoder"]),
+            decoder=str(paths["decoder"]),
+            joiner=str(paths["joiner"]),
+            tokens=str(paths["tokens"]),
+            num_threads=self.num_threads,
+            provider=settings.onnx_provider,
+            decoding_method=decoding_method,
+            max_active_paths=settings.beam_size,
+            model_type="nemo_transducer",
+            **hotword_options,
+        )
+
+    def _get_recognizer(self, decoding_method: str) -> sherpa_onnx.OfflineRecognizer:
+        """
+        Get the recognizer for a decoding method.
+
+        The beam search recognizer is created on first use, so models that
+        only ever serve greedy requests don't pay for it.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded")
+
+        if decoding_method == "greedy_search":
+            return self._recognizer
+
+        if decoding_method not in DECODING_METHODS:
+            raise ValueError(f"Unsupported decoding method: {decoding_method}")
+
+        with self._beam_lock:
+            if self._beam_recognizer is None:
+                logger.info(f"Creating {decoding_method} recognizer for '{self.name}'")
+                self._beam_recognizer = self._create_recognizer(decoding_method)
+            return self._beam_recognizer
+
     def transcribe(self, audio_path: str | Path) -> str:
         """
         Transcribe audio file.
@@ -94,7 +178,7 @@ class ASRModel:
 
             # Create stream and process
             stream = self._recognizer.create_stream()
-            stream.accept_waveform(sample_rate, samples.tolist())
+            stream.accept_waveform(sample_rate, samples)
 
             # Decode
             self._recognizer.decode_stream(stream)
@@ -108,25 +192,66 @@ class ASRModel:
             logger.error(f"Transcription failed: {e}")
             raise RuntimeError(f"Transcription failed: {e}")
 
-    def transcribe_samples(self, samples: np.ndarray, sample_rate: int = 16000) -> str:
+    def transcribe_samples(
+        self,
+        samples: np.ndarray,
+        sample_rate: int = 16000,
+        decoding_method: str = "greedy_search",
+        hotwords: Optional[list[str]] = None
+    ) -> str:
         """
         Transcribe audio samples directly.
 
         Args:
             samples: Audio samples as numpy array (float32)
             sample_rate: Sample rate of audio
+            decoding_method: greedy_search or modified_beam_search
+            hotwords: Phrases to bias recognition towards (beam search only)
 
         Returns:
             Transcribed text
         """
-        if not self.is_loaded:
-            raise RuntimeError("Model not loaded")
+        return self.transcribe_batch([samples], sample_rate, decoding_method, hotwords)[0]
+
+    def transcribe_batch(
+        self,
+        batch: list[np.ndarray],
+        sample_rate: int = 16000,
+        decoding_method: str = "greedy_search",
+        hotwords: Optional[list[str]] = None
+    ) -> list[str]:
+        """
+        Transcribe several utterances with batched decoding.
+
+        Streams are decoded DECODE_BATCH_SIZE at a time, so the encoder and
+        beam search run once per batch instead of once per utterance.
+
+        Args:
+            batch: Audio samples per utterance (float32)
+            sample_rate: Sample rate of audio
+            decoding_method: greedy_search or modified_beam_search
+            hotwords: Phrases to bias recognition towards (beam search only)
+
+        Returns:
+            Transcribed text per utterance, in input order
+        """
+        recognizer = self._get_recognizer(decoding_method)
+        batch_size = get_settings().decode_batch_size
+        hotwords_arg = format_hotwords(hotwords) if decoding_method == "modified_beam_search" else None
 
         try:
-            stream = self._recognizer.create_stream()
-            stream.accept_waveform(sample_rate, samples.tolist())
-            self._recognizer.decode_stream(stream)
-            return stream.result.text.strip()
+            texts: list[str] = []
+            for start in range(0, len(batch), batch_size):
+                streams = []
+                for samples in batch[start:start + batch_size]:
+                    stream = recognizer.create_stream(hotwords_arg)
+                    stream.accept_waveform(sample_rate, samples)
+                    streams.append(stream)
+
+                recognizer.decode_streams(streams)
+                texts.extend(stream.result.text.strip() for stream in streams)
+
+            return texts
 
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
@@ -137,13 +262,19 @@ class ASRModel:
         if self._recognizer is not None:
             del self._recognizer
             self._recognizer = None
-            logger.info("ASR model unloaded")
+            self._beam_recognizer = None
+            logger.info(f"ASR model '{self.name}' unloaded")
 
 
-# Global model instance
-asr_model = ASRModel()
+def format_hotwords(hotwords: Optional[list[str]]) -> Optional[str]:
+    """
+    Format hotword phrases for a Sherpa-ONNX stream.
 
+    Args:
+        hotwords: Phrases such as product or user names
 
-def get_asr_model() -> ASRModel:
-    """Get the ASR model instance."""
-    return asr_model
+    Returns:
+        Phrases joined with "/" (None if there are none)
+    """
+    phrases = [" ".join(p.split()) for p in (hotwords or []) if p.strip()]
+    return "/".join(phrases) if phrases else None
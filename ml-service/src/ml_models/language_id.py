@@ -0,0 +1,87 @@
+"""
+Spoken language identification using Sherpa-ONNX.
+
+Runs a Whisper encoder/decoder on the opening seconds of a recording so
+the language is known before the ASR model decodes it.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+import sherpa_onnx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SpokenLanguageModel:
+    """Wrapper for the Sherpa-ONNX Whisper language identifier."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._slid: Optional[sherpa_onnx.SpokenLanguageIdentification] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_configured(self) -> bool:
+        """Check if encoder and decoder paths are set."""
+        return bool(self.settings.language_id_encoder_path and self.settings.language_id_decoder_path)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Check if model is loaded."""
+        return self._slid is not None
+
+    def load_model(self) -> None:
+        """Load the Whisper language identifier from ONNX files."""
+        if self._slid is not None:
+            return
+
+        encoder = self.settings.language_id_encoder_path
+        decoder = self.settings.language_id_decoder_path
+        if not self.is_configured:
+            raise RuntimeError("LANGUAGE_ID_ENCODER_PATH and LANGUAGE_ID_DECODER_PATH must be set")
+
+        missing = [str(p) for p in (encoder, decoder) if not p.exists()]
+        if missing:
+            raise FileNotFoundError(f"Missing language ID model files: {', '.join(missing)}")
+
+        logger.info(f"Loading spoken language ID model from: {encoder.parent}")
+        config = sherpa_onnx.SpokenLanguageIdentificationConfig(
+            whisper=sherpa_onnx.SpokenLanguageIdentificationWhisperConfig(
+                encoder=str(encoder),
+                decoder=str(decoder),
+            ),
+            num_threads=self.settings.num_threads,
+            provider=self.settings.onnx_provider,
+        )
+        self._slid = sherpa_onnx.SpokenLanguageIdentification(config)
+        logger.info("Spoken language ID model loaded successfully")
+
+    def identify(self, samples: np.ndarray, sample_rate: int) -> str:
+        """
+        Identify the spoken language of an audio buffer.
+
+        Args:
+            samples: Mono float32 samples (a few seconds is enough)
+            sample_rate: Sample rate of audio
+
+        Returns:
+            ISO 639-1 language code as reported by Whisper (may be empty)
+        """
+        with self._lock:
+            if self._slid is None:
+                self.load_model()
+            stream = self._slid.create_stream()
+            stream.accept_waveform(sample_rate=sample_rate, waveform=samples)
+            return self._slid.compute(stream)
+
+    def unload_model(self) -> None:
+        """Unload model to free memory."""
+        with self._lock:
+            if self._slid is not None:
+                self._slid = None
+                logger.info("Spoken language ID model unloaded")
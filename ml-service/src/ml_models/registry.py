@@ -0,0 +1,376 @@
+"""
+Model registry.
+
+Holds several named ASR models, routes requests to them by name or audio
+duration, keeps loaded models under a memory budget (LRU eviction) and
+supports atomic hot-swap with draining of in-flight requests.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from config import get_settings
+from ml_models.asr import ASRModel, model_fingerprint
+from ml_models.tuning import ThreadTuningResult, tune_threads
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistryError(Exception):
+    """Exception raised for unknown models or rejected registry operations."""
+    def __init__(self, message: str, code: str = "UNKNOWN_MODEL"):
+        self.code = code
+        super().__init__(message)
+
+
+@dataclass
+class _ModelEntry:
+    """Loaded model with its usage bookkeeping."""
+    model: ASRModel
+    in_flight: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    draining: bool = False
+
+
+class ModelRegistry:
+    """Registry of named ASR models with LRU memory budgeting and hot-swap."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._cond = threading.Condition()
+        self._model_dirs: dict[str, Path] = {
+            self.settings.default_model_name: self.settings.model_dir,
+            **self.settings.extra_models,
+        }
+        self._active: dict[str, _ModelEntry] = {}
+        self._draining: list[_ModelEntry] = []
+        self._loading: set[str] = set()
+        self.num_threads = self.settings.num_threads
+        self.tuning: Optional[ThreadTuningResult] = None
+
+    @property
+    def default_name(self) -> str:
+        """Name of the default model."""
+        return self.settings.default_model_name
+
+    @property
+    def budget_bytes(self) -> int:
+        """Memory budget for loaded models in bytes."""
+        return self.settings.model_memory_budget_mb * 1024 * 1024
+
+    def names(self) -> list[str]:
+        """Get names of all registered models."""
+        with self._cond:
+            return list(self._model_dirs)
+
+    def is_loaded(self, name: Optional[str] = None) -> bool:
+        """Check if a model (default model if not specified) is loaded."""
+        with self._cond:
+            entry = self._active.get(name or self.default_name)
+            return entry is not None and entry.model.is_loaded
+
+    def resolve(
+        self,
+        name: Optional[str] = None,
+        duration: Optional[float] = None,
+        language: Optional[str] = None
+    ) -> str:
+        """
+        Pick the model for a request.
+
+        An explicit name wins, then a language route. Otherwise the model
+        with the smallest duration route that still covers the audio is
+        used, falling back to the default model.
+
+        Args:
+            name: Requested model name
+            duration: Audio duration in seconds
+            language: Language of the audio, if known before decoding
+
+        Returns:
+            Registered model name
+        """
+        with self._cond:
+            if name:
+                if name not in self._model_dirs:
+                    raise ModelRegistryError(
+                        f"Unknown model '{name}'. Available: {', '.join(self._model_dirs)}"
+                    )
+                return name
+
+            if language:
+                model_name = self.settings.model_language_routes.get(language)
+                if model_name in self._model_dirs:
+                    return model_name
+
+            if duration is not None:
+                routes = sorted(
+                    self.settings.model_duration_routes.items(),
+                    key=lambda route: route[1]
+                )
+                for model_name, max_duration in routes:
+                    if duration <= max_duration and model_name in self._model_dirs:
+                        return model_name
+
+            return self.default_name
+
+    def fingerprint(self, name: str) -> str:
+        """
+        Fingerprint of the weights a request for a model would get, without loading it.
+
+        Args:
+            name: Registered model name (see resolve)
+
+        Returns:
+            ASRModel.fingerprint of the active instance, or of the
+            configured directory if the model isn't loaded
+        """
+        with self._cond:
+            entry = self._active.get(name)
+            if entry is not None:
+                return entry.model.fingerprint
+            model_dir = self._model_dirs[name]
+        return model_fingerprint(name, model_dir)
+
+    @contextmanager
+    def acquire(
+        self,
+        name: Optional[str] = None,
+        duration: Optional[float] = None,
+        language: Optional[str] = None
+    ) -> Iterator[ASRModel]:
+        """
+        Check out a loaded model for the duration of a request.
+
+        Loads the model on demand. A model swapped out while checked out
+        keeps serving until the last request using it releases it.
+
+        Args:
+            name: Requested model name
+            duration: Audio duration in seconds (used for routing)
+            language: Language of the audio (used for routing)
+
+        Yields:
+            Loaded ASRModel
+        """
+        entry = self._checkout(self.resolve(name, duration, language))
+        try:
+            yield entry.model
+        finally:
+            self._release(entry)
+
+    def load(self, name: Optional[str] = None) -> ASRModel:
+        """Load a model (default model if not specified) without checking it out."""
+        entry = self._checkout(self.resolve(name))
+        self._release(entry)
+        return entry.model
+
+    def swap(self, name: str, model_dir: Optional[Path] = None) -> ASRModel:
+        """
+        Atomically replace a registered model with a freshly loaded one.
+
+        The new model is fully loaded before it becomes visible. Requests
+        already running on the old model finish on it; the old model is
+        unloaded once they drain. A load of the same name already in
+        progress (on-demand or another swap) finishes first, so it can't
+        overwrite the swapped-in model.
+
+        Args:
+            name: Registered model name
+            model_dir: New model directory inside MODELS_ROOT (defaults to
+                the current one)
+
+        Returns:
+            Newly loaded ASRModel
+
+        Raises:
+            ModelRegistryError: If name isn't registered or model_dir is
+                outside MODELS_ROOT
+        """
+        if model_dir is not None:
+            model_dir = Path(model_dir).resolve()
+            if not model_dir.is_relative_to(self.settings.models_root.resolve()):
+                raise ModelRegistryError(
+                    f"Model directory must be inside {self.settings.models_root}",
+                    code="INVALID_MODEL_DIR"
+                )
+
+        with self._cond:
+            if name not in self._model_dirs:
+                raise ModelRegistryError(
+                    f"Unknown model '{name}'. Available: {', '.join(self._model_dirs)}"
+                )
+            while name in self._loading:
+                self._cond.wait()
+            model_dir = model_dir or self._model_dirs[name]
+            self._loading.add(name)
+            new_model = ASRModel(name=name, model_dir=model_dir, num_threads=self.num_threads)
+            self._make_room_locked(new_model.footprint_bytes, keep=name)
+
+        try:
+            new_model.load_model()
+        except Exception:
+            with self._cond:
+                self._loading.discard(name)
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._loading.discard(name)
+            self._model_dirs[name] = model_dir
+            self._install_locked(name, new_model)
+            self._cond.notify_all()
+
+        logger.info(f"Model '{name}' swapped in from {model_dir}")
+        return new_model
+
+    def tune_threads(self) -> ThreadTuningResult:
+        """
+        Auto-tune the inference thread count on the default model.
+
+        Models loaded afterwards use the tuned count; already loaded
+        models keep theirs until swapped.
+        """
+        result = tune_threads(self._model_dirs[self.default_name])
+        self.num_threads = result.best_threads
+        self.tuning = result
+        return result
+
+    def runtime_info(self) -> dict:
+        """Get the ONNX Runtime configuration used for new models."""
+        return {
+            "provider": self.settings.onnx_provider,
+            "quantization": self.settings.model_quantization,
+            "num_threads": self.num_threads,
+            "auto_tuned": self.tuning is not None,
+            "tuning_timings_ms": (
+                {str(k): v for k, v in self.tuning.timings_ms.items()} if self.tuning else {}
+            ),
+        }
+
+    def unload_all(self) -> None:
+        """Unload every model, including draining ones."""
+        with self._cond:
+            entries = list(self._active.values()) + self._draining
+            self._active.clear()
+            self._draining.clear()
+        for entry in entries:
+            entry.model.unload_model()
+
+    def status(self) -> list[dict]:
+        """Get status of all registered models."""
+        with self._cond:
+            result = []
+            for name, model_dir in self._model_dirs.items():
+                entry = self._active.get(name)
+                result.append({
+                    "name": name,
+                    "model_dir": str(model_dir),
+                    "loaded": entry is not None and entry.model.is_loaded,
+                    "in_flight": entry.in_flight if entry else 0,
+                    "draining": sum(e.in_flight for e in self._draining if e.model.name == name),
+                    "footprint_mb": round(entry.model.footprint_bytes / (1024 ** 2), 1) if entry else 0.0,
+                })
+            return result
+
+    def _checkout(self, name: str) -> _ModelEntry:
+        """Get a loaded entry for name, loading it if needed, and mark it in use."""
+        while True:
+            with self._cond:
+                entry = self._active.get(name)
+                if entry is not None:
+                    entry.in_flight += 1
+                    entry.last_used = time.monotonic()
+                    return entry
+                if name in self._loading:
+                    self._cond.wait()
+                    continue
+                self._loading.add(name)
+                model = ASRModel(
+                    name=name,
+                    model_dir=self._model_dirs[name],
+                    num_threads=self.num_threads
+                )
+                self._make_room_locked(model.footprint_bytes, keep=name)
+
+            # Load outside the lock so other models keep serving
+            try:
+                model.load_model()
+            except Exception:
+                with self._cond:
+                    self._loading.discard(name)
+                    self._cond.notify_all()
+                raise
+
+            with self._cond:
+                self._loading.discard(name)
+                self._install_locked(name, model)
+                self._cond.notify_all()
+
+    def _release(self, entry: _ModelEntry) -> None:
+        """Mark an entry as no longer used by a request."""
+        with self._cond:
+            entry.in_flight -= 1
+            entry.last_used = time.monotonic()
+            if entry.draining and entry.in_flight == 0:
+                self._draining.remove(entry)
+                entry.model.unload_model()
+                logger.info(f"Drained and unloaded previous '{entry.model.name}' model")
+
+    def _install_locked(self, name: str, model: ASRModel) -> None:
+        """Make model the active one for name, retiring any model it replaces."""
+        old_entry = self._active.get(name)
+        self._active[name] = _ModelEntry(model=model)
+        if old_entry is not None:
+            self._retire_locked(old_entry)
+
+    def _retire_locked(self, entry: _ModelEntry) -> None:
+        """Unload an entry now, or once its in-flight requests finish."""
+        if entry.in_flight == 0:
+            entry.model.unload_model()
+        else:
+            entry.draining = True
+            self._draining.append(entry)
+
+    def _make_room_locked(self, needed_bytes: int, keep: str) -> None:
+        """Evict least recently used idle models until needed_bytes fits the budget."""
+        loaded = sum(e.model.footprint_bytes for e in self._active.values())
+        loaded += sum(e.model.footprint_bytes for e in self._draining)
+
+        candidates = sorted(
+            (
+                (entry.last_used, name)
+                for name, entry in self._active.items()
+                if name != keep and entry.in_flight == 0
+            )
+        )
+        for _, name in candidates:
+            if loaded + needed_bytes <= self.budget_bytes:
+                break
+            entry = self._active.pop(name)
+            loaded -= entry.model.footprint_bytes
+            entry.model.unload_model()
+            logger.info(f"Evicted model '{name}' to stay within memory budget")
+
+        if loaded + needed_bytes > self.budget_bytes:
+            logger.warning(
+                f"Model memory budget exceeded: {(loaded + needed_bytes) / (1024 ** 2):.0f}MB "
+                f"> {self.settings.model_memory_budget_mb}MB (all other models are busy)"
+            )
+
+
+# Module-level instance
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get model registry instance."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
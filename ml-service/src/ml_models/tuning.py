@@ -0,0 +1,130 @@
+"""
+Inference thread auto-tuning.
+
+Benchmarks a few thread counts on a calibration clip and picks the
+fastest one for the host CPU.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+from config import get_settings
+from ml_models.asr import ASRModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ThreadTuningResult:
+    """Result of a thread auto-tuning run."""
+    best_threads: int
+    timings_ms: dict[int, float] = field(default_factory=dict)
+    clip_seconds: float = 0.0
+
+
+def default_thread_candidates(cpu_count: Optional[int] = None) -> list[int]:
+    """
+    Get thread counts worth benchmarking on this host.
+
+    Powers of two up to the CPU count, plus half and all cores.
+    """
+    cpu_count = max(1, cpu_count or os.cpu_count() or 1)
+    candidates = {cpu_count, max(1, cpu_count // 2)}
+    n = 1
+    while n < cpu_count:
+        candidates.add(n)
+        n *= 2
+    return sorted(c for c in candidates if c <= 32)
+
+
+def load_calibration_clip() -> np.ndarray:
+    """
+    Load the calibration clip, or synthesize one if none is configured.
+
+    Encoder cost depends on audio length rather than content, so low-level
+    noise is a usable stand-in when no real clip is available.
+    """
+    settings = get_settings()
+    num_samples = settings.auto_tune_clip_seconds * settings.sample_rate
+
+    if settings.calibration_audio_path and settings.calibration_audio_path.exists():
+        samples, sample_rate = sf.read(str(settings.calibration_audio_path), dtype="float32")
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if sample_rate != settings.sample_rate:
+            logger.warning(
+                f"Calibration clip is {sample_rate}Hz, expected {settings.sample_rate}Hz; "
+                "using synthetic audio instead"
+            )
+        else:
+            return np.ascontiguousarray(samples[:num_samples], dtype=np.float32)
+
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(num_samples) * 0.01).astype(np.float32)
+
+
+def tune_threads(
+    model_dir: Optional[Path] = None,
+    candidates: Optional[list[int]] = None,
+    runs: int = 2
+) -> ThreadTuningResult:
+    """
+    Benchmark thread counts and return the fastest.
+
+    Each candidate gets its own recognizer, one warm-up decode and the
+    best of `runs` timed decodes.
+
+    Args:
+        model_dir: Model directory to benchmark (defaults to MODEL_DIR)
+        candidates: Thread counts to try (defaults to settings or host CPU count)
+        runs: Timed decodes per candidate
+
+    Returns:
+        ThreadTuningResult with the best thread count and all timings
+    """
+    settings = get_settings()
+    candidates = candidates or settings.auto_tune_candidates or default_thread_candidates()
+    clip = load_calibration_clip()
+    clip_seconds = len(clip) / settings.sample_rate
+
+    timings_ms: dict[int, float] = {}
+    for num_threads in candidates:
+        model = ASRModel(name="auto-tune", model_dir=model_dir, num_threads=num_threads)
+        try:
+            model.load_model()
+            model.transcribe_samples(clip, settings.sample_rate)
+
+            best = float("inf")
+            for _ in range(runs):
+                start = time.perf_counter()
+                model.transcribe_samples(clip, settings.sample_rate)
+                best = min(best, time.perf_counter() - start)
+
+            timings_ms[num_threads] = round(best * 1000, 1)
+            logger.info(
+                f"Auto-tune: {num_threads} threads -> {timings_ms[num_threads]}ms "
+                f"(RTF {best / clip_seconds:.3f})"
+            )
+        except Exception as e:
+            logger.warning(f"Auto-tune: {num_threads} threads failed: {e}")
+        finally:
+            model.unload_model()
+
+    if not timings_ms:
+        logger.warning("Auto-tune produced no timings, keeping configured thread count")
+        return ThreadTuningResult(best_threads=settings.num_threads, clip_seconds=clip_seconds)
+
+    best_threads = min(timings_ms, key=timings_ms.get)
+    logger.info(f"Auto-tune selected {best_threads} threads")
+    return ThreadTuningResult(
+        best_threads=best_threads,
+        timings_ms=timings_ms,
+        clip_seconds=clip_seconds
+    )
@@ -6,11 +6,61 @@ from services.audio_processor import (
     get_audio_processor,
     cleanup_temp_directory
 )
+from services.cancellation import (
+    CancelToken,
+    CancellationStats,
+    OperationCancelled,
+    get_cancellation_stats
+)
+from services.checkpoints import (
+    ChunkCheckpoint,
+    ChunkCheckpointStore,
+    get_checkpoint_store
+)
+from services.chunk_planner import (
+    ChunkPlan,
+    ChunkPlanner,
+    get_chunk_planner
+)
+from services.coalescing import (
+    SingleFlight,
+    get_single_flight,
+    request_key
+)
+from services.decode_batching import (
+    DecodeBatcher,
+    get_decode_batcher
+)
+from services.language_id import (
+    LanguageDetection,
+    LanguageIdentifier,
+    get_language_identifier
+)
+from services.memory_governor import (
+    MemoryBudgetError,
+    MemoryGovernor,
+    MemoryPlan,
+    MemoryReservation,
+    get_memory_governor
+)
+from services.preprocessing import (
+    AudioPreprocessor,
+    FileLevels,
+    get_audio_preprocessor
+)
+from services.temp_storage import (
+    TempNamespace,
+    TempSpaceError,
+    TempSpaceManager,
+    get_temp_space_manager
+)
 from services.transcription import (
+    BatchItemResult,
     TranscriptionService,
     TranscriptionResult,
     TranscriptionError,
-    get_transcription_service
+    get_transcription_service,
+    parse_hotwords
 )
 
 __all__ = [
@@ -18,8 +68,40 @@ __all__ = [
     "AudioProcessingError",
     "get_audio_processor",
     "cleanup_temp_directory",
+    "CancelToken",
+    "CancellationStats",
+    "OperationCancelled",
+    "get_cancellation_stats",
+    "ChunkCheckpoint",
+    "ChunkCheckpointStore",
+    "get_checkpoint_store",
+    "ChunkPlan",
+    "ChunkPlanner",
+    "get_chunk_planner",
+    "SingleFlight",
+    "get_single_flight",
+    "request_key",
+    "DecodeBatcher",
+    "get_decode_batcher",
+    "LanguageDetection",
+    "LanguageIdentifier",
+    "get_language_identifier",
+    "MemoryBudgetError",
+    "MemoryGovernor",
+    "MemoryPlan",
+    "MemoryReservation",
+    "get_memory_governor",
+    "AudioPreprocessor",
+    "FileLevels",
+    "get_audio_preprocessor",
+    "TempNamespace",
+    "TempSpaceError",
+    "TempSpaceManager",
+    "get_temp_space_manager",
+    "BatchItemResult",
     "TranscriptionService",
     "TranscriptionResult",
     "TranscriptionError",
-    "get_transcription_service"
+    "get_transcription_service",
+    "parse_hotwords"
 ]
@@ -4,10 +4,16 @@ Audio processing utilities.
 Handles audio conversion, resampling, and format validation.
 """
 
+import hashlib
 import logging
+import shutil
+import struct
+import subprocess
+import tarfile
 import uuid
+import zipfile
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Iterator, Optional
 
 import librosa
 import soundfile as sf
@@ -15,9 +21,20 @@ import numpy as np
 from pydub import AudioSegment
 
 from config import get_settings
+from services.resampling import resample, resample_blocks, to_mono
+from services.temp_storage import get_temp_space_manager
 
 logger = logging.getLogger(__name__)
 
+# Audio decoded per step by streaming conversion
+STREAM_BLOCK_SECONDS = 30
+
+# Headerless PCM accepted by the raw endpoint: name -> (sample width, WAV format tag)
+RAW_PCM_FORMATS = {
+    "pcm_s16le": (2, 1),
+    "f32le": (4, 3),
+}
+
 
 class AudioProcessingError(Exception):
     """Exception raised for audio processing errors."""
@@ -60,13 +77,21 @@ class AudioProcessor:
         ext = Path(filename).suffix.lower().lstrip(".")
         return ext in self.settings.supported_formats
 
-    def save_upload(self, file: BinaryIO, filename: str) -> Path:
+    def save_upload(
+        self,
+        file: BinaryIO,
+        filename: str,
+        directory: Optional[Path] = None,
+        hasher: Optional["hashlib._Hash"] = None
+    ) -> Path:
         """
         Save uploaded file to temp directory.
 
         Args:
             file: File-like object
             filename: Original filename
+            directory: Target directory (defaults to TEMP_DIR)
+            hasher: hashlib object updated with the content while copying
 
         Returns:
             Path to saved file
@@ -76,115 +101,308 @@ class AudioProcessor:
             ext = ".wav"
 
         unique_name = f"{uuid.uuid4()}{ext}"
-        file_path = self.settings.temp_dir / unique_name
+        file_path = (directory or self.settings.temp_dir) / unique_name
 
         try:
-            content = file.read()
             with open(file_path, "wb") as f:
-                f.write(content)
+                if hasher is None:
+                    shutil.copyfileobj(file, f, 1024 * 1024)
+                else:
+                    while block := file.read(1024 * 1024):
+                        hasher.update(block)
+                        f.write(block)
             logger.debug(f"Saved upload to: {file_path}")
             return file_path
         except Exception as e:
             logger.error(f"Failed to save upload: {e}")
             raise AudioProcessingError(f"Failed to save upload: {e}")
 
-    def convert_to_wav(self, input_path: Path) -> Path:
+    def source_format(self, file_path: Path) -> Optional[tuple[int, int]]:
+        """
+        Get the sample rate and channel count of a file libsndfile can read.
+
+        Args:
+            file_path: Path to audio file
+
+        Returns:
+            (sample rate, channels), or None if the file needs ffmpeg
+        """
+        try:
+            info = sf.info(str(file_path))
+            return info.samplerate, info.channels
+        except Exception:
+            return None
+
+    def convert_to_wav(
+        self,
+        input_path: Path,
+        output_dir: Optional[Path] = None,
+        streaming: bool = False
+    ) -> Path:
         """
         Convert audio to 16kHz mono WAV format.
 
+        Files libsndfile can read that are already mono at the target rate
+        are used as-is (the input path is returned). Everything else is
+        decoded once and goes through a single resampling pass, or with
+        streaming, is converted block by block so memory use doesn't grow
+        with the duration.
+
         Args:
             input_path: Path to input audio file
+            output_dir: Directory for the converted file (defaults to the input's)
+            streaming: Convert in STREAM_BLOCK_SECONDS blocks
 
         Returns:
-            Path to converted WAV file
+            Path to converted WAV file (input_path if no conversion was needed)
         """
+        target_sr = self.settings.sample_rate
+
+        # Fast path: WAV/FLAC/... already in the target format
+        try:
+            info = sf.info(str(input_path))
+            if info.samplerate == target_sr and info.channels == 1:
+                logger.debug(f"Audio already {target_sr}Hz mono, skipping conversion: {input_path}")
+                return input_path
+        except Exception:
+            info = None
+
         output_path = input_path.with_suffix(".converted.wav")
+        if output_dir is not None:
+            output_path = output_dir / f"{uuid.uuid4()}.converted.wav"
+
+        if streaming:
+            self._convert_streaming(input_path, output_path, info.samplerate if info is not None else None)
+            logger.debug(f"Converted to WAV (streaming): {output_path}")
+            return output_path
 
         try:
-            # Try using pydub first (handles more formats via ffmpeg)
-            audio = AudioSegment.from_file(str(input_path))
+            if info is not None:
+                # libsndfile can decode it, no need for ffmpeg
+                samples, sample_rate = sf.read(str(input_path), dtype="float32", always_2d=True)
+            else:
+                # Pydub handles more formats via ffmpeg
+                samples, sample_rate = self._decode_with_pydub(input_path)
 
-            # Convert to mono
-            audio = audio.set_channels(1)
+        except Exception as e:
+            logger.warning(f"Decoding failed, trying librosa: {e}")
 
-            # Resample to 16kHz
-            audio = audio.set_frame_rate(self.settings.sample_rate)
+            try:
+                # Fallback to librosa, keeping the native rate for our resampler
+                samples, sample_rate = librosa.load(str(input_path), sr=None, mono=True)
+            except Exception as e2:
+                logger.error(f"All conversion methods failed: {e2}")
+                raise AudioProcessingError(f"Failed to convert audio: {e2}")
 
-            # Export as WAV
-            audio.export(str(output_path), format="wav")
+        try:
+            samples = resample(
+                to_mono(samples),
+                sample_rate,
+                target_sr,
+                self.settings.resample_quality
+            )
+            np.clip(samples, -1.0, 1.0, out=samples)
+            sf.write(str(output_path), samples, target_sr, subtype="PCM_16")
 
             logger.debug(f"Converted to WAV: {output_path}")
             return output_path
 
         except Exception as e:
-            logger.warning(f"Pydub conversion failed, trying librosa: {e}")
+            logger.error(f"Failed to write converted audio: {e}")
+            raise AudioProcessingError(f"Failed to convert audio: {e}")
 
-            try:
-                # Fallback to librosa
-                y, sr = librosa.load(
-                    str(input_path),
-                    sr=self.settings.sample_rate,
-                    mono=True
-                )
+    def _convert_streaming(self, input_path: Path, output_path: Path, sample_rate: Optional[int]) -> None:
+        """
+        Convert without holding the whole file in memory.
 
-                sf.write(str(output_path), y, self.settings.sample_rate)
-                logger.debug(f"Converted to WAV using librosa: {output_path}")
-                return output_path
+        libsndfile formats are read in blocks and resampled as a stream;
+        anything else (sample_rate None) is piped through ffmpeg, which
+        writes the 16-bit mono WAV itself.
+        """
+        target_sr = self.settings.sample_rate
 
-            except Exception as e2:
-                logger.error(f"All conversion methods failed: {e2}")
-                raise AudioProcessingError(f"Failed to convert audio: {e2}")
+        if sample_rate is None:
+            command = [
+                AudioSegment.converter, "-nostdin", "-v", "error", "-y", "-i", str(input_path),
+                "-ac", "1", "-ar", str(target_sr), "-c:a", "pcm_s16le", str(output_path)
+            ]
+            try:
+                subprocess.run(command, check=True, capture_output=True)
+            except subprocess.CalledProcessError as e:
+                message = e.stderr.decode(errors="replace").strip()
+                logger.error(f"ffmpeg conversion failed: {message}")
+                raise AudioProcessingError(f"Failed to convert audio: {message}")
+            except OSError as e:
+                logger.error(f"ffmpeg unavailable: {e}")
+                raise AudioProcessingError(f"Failed to convert audio: {e}")
+            return
 
-    def split_audio(self, audio_path: Path, chunk_duration: int) -> list[Path]:
+        try:
+            blocks = (
+                to_mono(block)
+                for block in sf.blocks(
+                    str(input_path),
+                    blocksize=STREAM_BLOCK_SECONDS * sample_rate,
+                    dtype="float32",
+                    always_2d=True
+                )
+            )
+            with sf.SoundFile(str(output_path), "w", samplerate=target_sr, channels=1, subtype="PCM_16") as out:
+                for samples in resample_blocks(blocks, sample_rate, target_sr, self.settings.resample_quality):
+                    out.write(np.clip(samples, -1.0, 1.0))
+        except Exception as e:
+            logger.error(f"Streaming conversion failed: {e}")
+            raise AudioProcessingError(f"Failed to convert audio: {e}")
+
+    def _decode_with_pydub(self, input_path: Path) -> tuple[np.ndarray, int]:
+        """Decode audio with pydub/ffmpeg into (frames, channels) float32 samples."""
+        audio = AudioSegment.from_file(str(input_path))
+        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+        samples /= float(1 << (8 * audio.sample_width - 1))
+        return samples.reshape(-1, audio.channels), audio.frame_rate
+
+    def extract_archive(
+        self,
+        archive_path: Path,
+        directory: Path,
+        max_files: int,
+        max_bytes: int
+    ) -> list[tuple[str, Path]]:
         """
-        Split audio into chunks.
+        Extract supported audio files from a zip or tar archive.
+
+        Members are written under generated names, so archive paths can't
+        escape the target directory. Unsupported files are skipped.
 
         Args:
-            audio_path: Path to audio file
-            chunk_duration: Duration of each chunk in seconds
+            archive_path: Path to the archive
+            directory: Target directory
+            max_files: Maximum number of audio files to extract
+            max_bytes: Maximum total uncompressed size
 
         Returns:
-            List of paths to chunk files
+            List of (member name, extracted path)
         """
-        chunks = []
+        extracted: list[tuple[str, Path]] = []
+        total_bytes = 0
+
+        def target_for(name: str) -> Path:
+            if len(extracted) >= max_files:
+                raise AudioProcessingError(f"Archive contains more than {max_files} audio files")
+            return directory / f"{uuid.uuid4()}{Path(name).suffix.lower()}"
+
+        def account(size: int) -> None:
+            nonlocal total_bytes
+            total_bytes += size
+            if total_bytes > max_bytes:
+                raise AudioProcessingError(
+                    f"Archive exceeds {max_bytes // (1024 ** 2)}MB uncompressed"
+                )
 
         try:
-            # Load audio
-            y, sr = librosa.load(
-                str(audio_path),
-                sr=self.settings.sample_rate,
-                mono=True
-            )
+            if zipfile.is_zipfile(archive_path):
+                with zipfile.ZipFile(archive_path) as archive:
+                    for member in archive.infolist():
+                        if member.is_dir() or not self.validate_format(member.filename):
+                            continue
+                        account(member.file_size)
+                        target = target_for(member.filename)
+                        with archive.open(member) as src, open(target, "wb") as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+                        extracted.append((member.filename, target))
+
+            elif tarfile.is_tarfile(archive_path):
+                with tarfile.open(archive_path) as archive:
+                    for member in archive:
+                        if not member.isfile() or not self.validate_format(member.name):
+                            continue
+                        account(member.size)
+                        target = target_for(member.name)
+                        src = archive.extractfile(member)
+                        with src, open(target, "wb") as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+                        extracted.append((member.name, target))
+
+            else:
+                raise AudioProcessingError("Archive must be a zip or tar file")
+
+        except AudioProcessingError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to extract archive: {e}")
+            raise AudioProcessingError(f"Failed to extract archive: {e}")
 
-            total_samples = len(y)
-            chunk_samples = chunk_duration * sr
-            num_chunks = int(np.ceil(total_samples / chunk_samples))
+        logger.info(f"Extracted {len(extracted)} audio files from archive")
+        return extracted
 
-            logger.info(f"Splitting audio into {num_chunks} chunks")
+    def load_samples(self, file_path: Path, max_seconds: Optional[float] = None) -> np.ndarray:
+        """
+        Load a converted WAV file as mono float32 samples.
 
-            for i in range(num_chunks):
-                start = i * chunk_samples
-                end = min((i + 1) * chunk_samples, total_samples)
+        Args:
+            file_path: Path to WAV file
+            max_seconds: Only load this much from the start of the file
 
-                chunk_audio = y[start:end]
+        Returns:
+            Audio samples
+        """
+        frames = int(max_seconds * self.settings.sample_rate) if max_seconds else -1
+        try:
+            samples, _ = sf.read(str(file_path), frames=frames, dtype="float32")
+            if samples.ndim > 1:
+                samples = samples.mean(axis=1, dtype=np.float32)
+            return samples
+        except Exception as e:
+            logger.error(f"Failed to load samples: {e}")
+            raise AudioProcessingError(f"Failed to load samples: {e}")
 
-                chunk_path = audio_path.parent / f"{audio_path.stem}_chunk_{i:04d}.wav"
-                sf.write(str(chunk_path), chunk_audio, sr)
+    def iter_chunks(self, wav_path: Path, chunk_duration: int) -> Iterator[np.ndarray]:
+        """
+        Iterate over fixed-length chunks of a converted file without loading it whole.
+
+        Mono 16-bit and float32 WAV files are memory-mapped copy-on-write, so
+        float32 chunks are views of the mapping (in-place preprocessing never
+        writes to the file) and 16-bit chunks are converted one at a time.
+        Anything else is read in chunk-sized blocks.
 
-                chunks.append(chunk_path)
-                logger.debug(f"Created chunk {i+1}/{num_chunks}: {chunk_path}")
+        Args:
+            wav_path: Path to converted audio file
+            chunk_duration: Duration of each chunk in seconds
 
-            return chunks
+        Yields:
+            Mono float32 samples per chunk
+        """
+        chunk_samples = chunk_duration * self.settings.sample_rate
 
+        try:
+            info = sf.info(str(wav_path))
+            layout = _pcm_layout(wav_path, info) if info.samplerate == self.settings.sample_rate else None
+        except Exception as e:
+            logger.error(f"Failed to read audio: {e}")
+            raise AudioProcessingError(f"Failed to read audio: {e}")
+
+        if layout is not None:
+            offset, frames, dtype = layout
+            logger.info(f"Streaming {int(np.ceil(frames / chunk_samples))} chunks from memory map")
+            if frames == 0:
+                return
+            mapped = np.memmap(wav_path, dtype=dtype, mode="c", offset=offset, shape=(frames,))
+            scale = np.float32(1 / 32768) if dtype == "<i2" else None
+            for start in range(0, frames, chunk_samples):
+                chunk = mapped[start:start + chunk_samples]
+                yield chunk * scale if scale is not None else chunk
+            return
+
+        logger.info(f"Streaming chunks from {info.format}/{info.subtype} blocks")
+        try:
+            blocksize = chunk_duration * info.samplerate
+            for block in sf.blocks(str(wav_path), blocksize=blocksize, dtype="float32", always_2d=True):
+                yield resample(
+                    to_mono(block), info.samplerate, self.settings.sample_rate, self.settings.resample_quality
+                )
         except Exception as e:
-            # Clean up any created chunks on error
-            for chunk in chunks:
-                try:
-                    chunk.unlink()
-                except Exception:
-                    pass
-            logger.error(f"Failed to split audio: {e}")
-            raise AudioProcessingError(f"Failed to split audio: {e}")
+            logger.error(f"Failed to read audio: {e}")
+            raise AudioProcessingError(f"Failed to read audio: {e}")
 
     def cleanup_file(self, file_path: Path) -> None:
         """
@@ -213,29 +431,68 @@ class AudioProcessor:
 
 def cleanup_temp_directory() -> int:
     """
-    Clean all files in temp directory.
+    Remove orphaned files from the temp directory.
+
+    Files belonging to requests still running in this or another live
+    worker are kept.
 
     Returns:
-        Number of files removed
+        Number of orphaned namespaces and files removed
     """
-    settings = get_settings()
-    temp_dir = settings.temp_dir
+    return get_temp_space_manager().reap_orphans()
 
-    if not temp_dir.exists():
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        return 0
 
-    count = 0
-    for file_path in temp_dir.iterdir():
-        if file_path.is_file():
-            try:
-                file_path.unlink()
-                count += 1
-            except Exception as e:
-                logger.warning(f"Failed to remove temp file {file_path}: {e}")
+def _pcm_layout(wav_path: Path, info) -> Optional[tuple[int, int, str]]:
+    """
+    Locate the samples of a mono 16-bit or float32 WAV file.
 
-    logger.info(f"Cleaned up {count} files from temp directory")
-    return count
+    Args:
+        wav_path: Path to audio file
+        info: soundfile info for the file
+
+    Returns:
+        (data offset, frames, dtype), or None if the file can't be mapped
+    """
+    dtype = {"PCM_16": "<i2", "FLOAT": "<f4"}.get(info.subtype)
+    if info.format != "WAV" or info.channels != 1 or dtype is None:
+        return None
+
+    with open(wav_path, "rb") as f:
+        if f.read(4) != b"RIFF" or f.read(8)[4:] != b"WAVE":
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = header[:4], int.from_bytes(header[4:], "little")
+            if chunk_id == b"data":
+                frames = min(size // np.dtype(dtype).itemsize, info.frames)
+                return f.tell(), frames, dtype
+            # RIFF chunks are padded to an even size
+            f.seek(size + (size & 1), 1)
+
+
+def pcm_wav_header(data_bytes: int, pcm_format: str, sample_rate: int, channels: int) -> bytes:
+    """
+    Build the 44-byte WAV header for headerless PCM samples.
+
+    Args:
+        data_bytes: Size of the samples that follow
+        pcm_format: Key of RAW_PCM_FORMATS
+        sample_rate: Sample rate of the samples
+        channels: Interleaved channels
+
+    Returns:
+        Header bytes
+    """
+    sample_width, format_tag = RAW_PCM_FORMATS[pcm_format]
+    block_align = sample_width * channels
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, format_tag, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b"data", data_bytes
+    )
 
 
 # Module-level instance
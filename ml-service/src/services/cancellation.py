@@ -0,0 +1,116 @@
+"""
+Cooperative cancellation.
+
+Decoding runs in worker threads, which can't be interrupted. Instead the
+pipeline checks a CancelToken at every chunk and batch boundary (and while
+waiting for a decode slot), so work for a client that disconnected or ran
+past its deadline stops at the next boundary and releases its temp space
+and recognizer slot on the way out.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CLIENT_DISCONNECTED = "client_disconnected"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+ABANDONED = "abandoned"
+
+
+class OperationCancelled(Exception):
+    """Raised at a checkpoint once the operation's token is cancelled."""
+    def __init__(self, reason: str):
+        self.reason = reason
+        # Audio already decoded when the operation stopped (set by the decoder)
+        self.decoded_seconds = 0.0
+        super().__init__(f"Operation cancelled: {reason}")
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with an optional deadline."""
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Args:
+            deadline: time.monotonic() value after which the token counts as cancelled
+        """
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> "CancelToken":
+        """Create a token that expires after seconds (never if None)."""
+        return cls(time.monotonic() + seconds if seconds is not None else None)
+
+    def cancel(self, reason: str) -> None:
+        """Cancel the token (the first reason wins)."""
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the token was cancelled, or None if it wasn't."""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if the token is cancelled or past its deadline."""
+        return self.reason is not None
+
+    def check(self) -> None:
+        """Raise OperationCancelled if the token is cancelled."""
+        reason = self.reason
+        if reason is not None:
+            raise OperationCancelled(reason)
+
+
+class CancellationStats:
+    """Counters for cancelled requests and aborted work."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Counter[str] = Counter()
+        self.aborted_jobs = 0
+        self.skipped_audio_seconds = 0.0
+
+    def record_request(self, reason: str) -> None:
+        """Count a request that stopped waiting for its result."""
+        with self._lock:
+            self._requests[reason] += 1
+
+    def record_abort(self, skipped_seconds: float) -> None:
+        """Count a job stopped before it finished, and the audio it didn't decode."""
+        with self._lock:
+            self.aborted_jobs += 1
+            self.skipped_audio_seconds += max(0.0, skipped_seconds)
+        logger.info(f"Transcription aborted, {skipped_seconds:.0f}s of audio left undecoded")
+
+    def status(self) -> dict:
+        """Get cancellation counters."""
+        with self._lock:
+            return {
+                "client_disconnected": self._requests[CLIENT_DISCONNECTED],
+                "deadline_exceeded": self._requests[DEADLINE_EXCEEDED],
+                "aborted_jobs": self.aborted_jobs,
+                "skipped_audio_seconds": round(self.skipped_audio_seconds, 1),
+            }
+
+
+# Module-level instance
+_cancellation_stats: Optional[CancellationStats] = None
+
+
+def get_cancellation_stats() -> CancellationStats:
+    """Get cancellation counters instance."""
+    global _cancellation_stats
+    if _cancellation_stats is None:
+        _cancellation_stats = CancellationStats()
+    return _cancellation_stats
@@ -0,0 +1,218 @@
+"""
+Chunk result checkpoints.
+
+Long transcriptions append each decoded chunk's text to a checkpoint file
+keyed by the audio content, the model weights and every option that
+affects decoding. When the same job is retried (after a failure,
+cancellation or a lost response) chunks already in the checkpoint are not
+decoded again. A job that completes without failed chunks removes its
+checkpoint; the rest are plain JSON lines that expire after
+CHECKPOINT_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkCheckpoint:
+    """Decoded chunk texts of one job, appended as chunks complete."""
+
+    def __init__(self, path: Path, chunk_seconds: int, done: dict[int, str]):
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+        self.done = done
+        self._lock = threading.Lock()
+
+    def record(self, results: list[tuple[int, str]]) -> None:
+        """
+        Append decoded chunks.
+
+        Args:
+            results: (chunk index, text) pairs
+        """
+        if not results:
+            return
+        lines = "".join(
+            json.dumps({"chunk": index, "text": text}, ensure_ascii=False) + "\n"
+            for index, text in results
+        )
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.warning(f"Failed to write checkpoint {self.path.name}: {e}")
+
+    def discard(self) -> None:
+        """Remove the checkpoint once its job no longer needs it."""
+        with self._lock:
+            try:
+                self.path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to remove checkpoint {self.path.name}: {e}")
+
+
+class ChunkCheckpointStore:
+    """Directory of chunk checkpoints, one JSON lines file per job."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.root = self.settings.checkpoint_dir
+        self._enabled: Optional[bool] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Check if checkpoints are on and the directory is usable."""
+        if self._enabled is None:
+            self._enabled = self.settings.checkpoint_min_seconds > 0
+            if self._enabled:
+                try:
+                    self.root.mkdir(parents=True, exist_ok=True)
+                except OSError as e:
+                    logger.warning(f"Chunk checkpoints disabled, can't create {self.root}: {e}")
+                    self._enabled = False
+        return self._enabled
+
+    def open(
+        self,
+        content_hash: str,
+        model_fingerprint: str,
+        decoding_method: str,
+        hotwords: Optional[list[str]],
+        chunk_seconds: int
+    ) -> Optional[ChunkCheckpoint]:
+        """
+        Open (or start) the checkpoint of a job.
+
+        An existing checkpoint keeps the chunk length it was started with,
+        so the caller must chunk the audio with checkpoint.chunk_seconds.
+
+        Args:
+            content_hash: Hex digest of the uploaded bytes
+            model_fingerprint: Fingerprint of the model instance (see
+                ASRModel.fingerprint), so a hot-swapped model starts over
+            decoding_method: Resolved decoding method
+            hotwords: Hotword phrases
+            chunk_seconds: Chunk length for a new checkpoint
+
+        Returns:
+            ChunkCheckpoint, or None if checkpoints are unavailable
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(content_hash, model_fingerprint, decoding_method, hotwords)
+        try:
+            header, done, torn = self._read(path)
+            if header is None:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps({"chunk_seconds": chunk_seconds}) + "\n")
+                return ChunkCheckpoint(path, chunk_seconds, {})
+            if torn:
+                # Don't let the next record join a line cut off by a crash
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+        except OSError as e:
+            logger.warning(f"Failed to open checkpoint {path.name}: {e}")
+            return None
+
+        logger.info(f"Resuming from checkpoint: {len(done)} chunks already decoded")
+        return ChunkCheckpoint(path, header["chunk_seconds"], done)
+
+    def chunk_seconds(
+        self,
+        content_hash: str,
+        model_fingerprint: str,
+        decoding_method: str,
+        hotwords: Optional[list[str]]
+    ) -> Optional[int]:
+        """
+        Chunk length of an existing checkpoint, without opening it.
+
+        Lets a request reserve memory for the chunks it will resume with.
+        Arguments are as for open.
+
+        Returns:
+            chunk_seconds from the checkpoint's header, or None if there is none
+        """
+        if not self.enabled:
+            return None
+        try:
+            header, _, _ = self._read(self._path(content_hash, model_fingerprint, decoding_method, hotwords))
+        except OSError:
+            return None
+        return header["chunk_seconds"] if header is not None else None
+
+    def _path(
+        self,
+        content_hash: str,
+        model_fingerprint: str,
+        decoding_method: str,
+        hotwords: Optional[list[str]]
+    ) -> Path:
+        """Checkpoint file of a job."""
+        key = hashlib.sha256(
+            "|".join([content_hash, model_fingerprint, decoding_method, "/".join(hotwords or [])]).encode()
+        ).hexdigest()
+        return self.root / f"{key}.jsonl"
+
+    def _read(self, path: Path) -> tuple[Optional[dict], dict[int, str], bool]:
+        """Parse a checkpoint file into (header, decoded chunks, ends with a torn line)."""
+        try:
+            content = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None, {}, False
+
+        header = None
+        done: dict[int, str] = {}
+        for line in content.splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "chunk_seconds" in record:
+                header = record
+            elif "chunk" in record:
+                done[record["chunk"]] = record["text"]
+        return header, done, bool(content) and not content.endswith("\n")
+
+    def reap(self) -> int:
+        """
+        Remove checkpoints not written to for CHECKPOINT_TTL_SECONDS.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.enabled:
+            return 0
+        cutoff = time.time() - self.settings.checkpoint_ttl_seconds
+        removed = 0
+        for path in self.root.glob("*.jsonl"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+# Module-level instance
+_checkpoint_store: Optional[ChunkCheckpointStore] = None
+
+
+def get_checkpoint_store() -> ChunkCheckpointStore:
+    """Get chunk checkpoint store instance."""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = ChunkCheckpointStore()
+    return _checkpoint_store
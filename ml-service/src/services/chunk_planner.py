@@ -0,0 +1,209 @@
+"""
+Adaptive chunk planning.
+
+Every recognizer call goes through a decode slot (DECODE_WORKERS of them),
+which gives the planner the number of free workers, the queue of waiting
+calls and a measured real-time factor. From those it picks, per file, how
+long the chunks are and how many of them are decoded in parallel: short
+chunks spread over free workers when the service is idle (latency), long
+chunks on one worker when it is saturated (less per-chunk overhead).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from config import get_settings
+from ml_models.registry import get_model_registry
+from services.cancellation import CancelToken
+
+logger = logging.getLogger(__name__)
+
+# Real-time factor assumed until the first decode is measured
+INITIAL_RTF = 0.1
+
+# Weight of the newest measurement in the real-time factor average
+RTF_SMOOTHING = 0.2
+
+# Files that decode faster than this on one worker aren't worth splitting
+MIN_SPLIT_SECONDS = 1.0
+
+# How often a cancellable caller waiting for a slot rechecks its token
+CANCEL_POLL_SECONDS = 0.2
+
+
+@dataclass
+class SlotUsage:
+    """Audio decoded under a decode slot (callers that batch late update it)."""
+    audio_seconds: float
+
+
+@dataclass
+class ChunkPlan:
+    """Chunking decision for one file."""
+    chunk_seconds: int
+    parallelism: int
+    batch_size: Optional[int] = None  # DECODE_BATCH_SIZE if not set
+
+
+class ChunkPlanner:
+    """Decode slots, real-time factor tracking and per-file chunk planning."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._waiting = 0
+        self._pending_audio = 0.0
+        self.rtf = INITIAL_RTF
+        self._measured = 0
+
+    @property
+    def workers(self) -> int:
+        """Number of concurrent recognizer calls allowed."""
+        if self.settings.decode_workers:
+            return self.settings.decode_workers
+        return max(1, (os.cpu_count() or 1) // get_model_registry().num_threads)
+
+    @property
+    def throughput_chunk_seconds(self) -> int:
+        """Chunk length for throughput-oriented work (batches share decode calls across files)."""
+        if not self.settings.adaptive_chunking:
+            return self.settings.chunk_size_seconds
+        return self.settings.max_chunk_seconds
+
+    @contextmanager
+    def decode_slot(self, audio_seconds: float, cancel: Optional[CancelToken] = None) -> Iterator[SlotUsage]:
+        """
+        Hold a recognizer worker for one decode call and measure it.
+
+        Args:
+            audio_seconds: Audio decoded in the call (for RTF and queue accounting)
+            cancel: Token that stops the wait for a free worker
+
+        Yields:
+            SlotUsage; raise its audio_seconds if the call decodes more audio
+
+        Raises:
+            OperationCancelled: If cancel fires before a worker is free
+        """
+        with self._cond:
+            self._waiting += 1
+            self._pending_audio += audio_seconds
+            try:
+                while self._busy >= self.workers:
+                    if cancel is None:
+                        self._cond.wait()
+                    else:
+                        cancel.check()
+                        self._cond.wait(CANCEL_POLL_SECONDS)
+                if cancel is not None:
+                    cancel.check()
+            except BaseException:
+                self._waiting -= 1
+                self._pending_audio -= audio_seconds
+                raise
+            self._waiting -= 1
+            self._busy += 1
+
+        usage = SlotUsage(audio_seconds)
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            yield usage
+            succeeded = True
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self._busy -= 1
+                self._pending_audio -= audio_seconds
+                if succeeded and usage.audio_seconds > 0:
+                    self._record(elapsed / usage.audio_seconds)
+                self._cond.notify()
+
+    def _record(self, rtf: float) -> None:
+        """Fold a measured real-time factor into the average (lock held)."""
+        if self._measured == 0:
+            self.rtf = rtf
+        else:
+            self.rtf += RTF_SMOOTHING * (rtf - self.rtf)
+        self._measured += 1
+
+    def plan(self, duration: float) -> ChunkPlan:
+        """
+        Choose chunk length and parallelism for a file.
+
+        Pressure is the share of expected wall time this file would spend
+        behind already queued audio (0 idle, towards 1 saturated). Free
+        workers are used in proportion to 1 - pressure, and chunks grow from
+        MIN_CHUNK_SECONDS towards MAX_CHUNK_SECONDS with pressure.
+
+        Args:
+            duration: Audio duration in seconds
+
+        Returns:
+            ChunkPlan
+        """
+        if not self.settings.adaptive_chunking:
+            return ChunkPlan(self.settings.chunk_size_seconds, 1)
+
+        min_chunk = self.settings.min_chunk_seconds
+        max_chunk = max(min_chunk, self.settings.max_chunk_seconds)
+
+        with self._cond:
+            workers = self.workers
+            free = max(0, workers - self._busy)
+            queued_audio = self._pending_audio
+            rtf = self.rtf
+
+        expected = duration * rtf
+        backlog = queued_audio * rtf / workers
+        pressure = backlog / (backlog + expected) if backlog + expected > 0 else 0.0
+
+        parallelism = 1
+        if expected >= MIN_SPLIT_SECONDS:
+            parallelism = max(1, min(round(free * (1 - pressure)), math.ceil(duration / min_chunk)))
+
+        floor = min_chunk + (max_chunk - min_chunk) * pressure
+        if parallelism > 1:
+            # A multiple of parallelism chunks, so no worker idles on the last round
+            rounds = math.ceil(duration / (parallelism * max_chunk))
+            chunk_seconds = max(math.ceil(duration / (parallelism * rounds)), floor)
+        else:
+            chunk_seconds = max_chunk
+        chunk_seconds = int(min(max(chunk_seconds, min_chunk), max_chunk))
+
+        logger.debug(
+            f"Chunk plan for {duration:.0f}s: {chunk_seconds}s x{parallelism} "
+            f"(free {free}/{workers}, pressure {pressure:.2f}, rtf {rtf:.3f})"
+        )
+        return ChunkPlan(chunk_seconds, parallelism)
+
+    def status(self) -> dict:
+        """Get decode worker and speed information."""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "busy": self._busy,
+                "waiting": self._waiting,
+                "queued_audio_seconds": round(self._pending_audio, 1),
+                "rtf": round(self.rtf, 4),
+                "adaptive_chunking": self.settings.adaptive_chunking,
+            }
+
+
+# Module-level instance
+_chunk_planner: Optional[ChunkPlanner] = None
+
+
+def get_chunk_planner() -> ChunkPlanner:
+    """Get chunk planner instance."""
+    global _chunk_planner
+    if _chunk_planner is None:
+        _chunk_planner = ChunkPlanner()
+    return _chunk_planner
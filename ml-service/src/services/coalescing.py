@@ -0,0 +1,139 @@
+"""
+Request coalescing.
+
+Identical uploads that arrive while the first one is still being
+transcribed attach to the running job instead of starting their own.
+The job runs as its own task: subscribers wait on it through a shield, so
+a subscriber that disconnects or is cancelled doesn't cancel the job for
+the others. Once the last subscriber is gone the job's CancelToken fires
+and the job stops at its next checkpoint.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from config import get_settings
+from services.cancellation import ABANDONED, CancelToken
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def request_key(
+    content_hash: str,
+    extension: str,
+    language: Optional[str] = None,
+    model: Optional[str] = None,
+    decoding_method: Optional[str] = None,
+    hotwords: Optional[list[str]] = None
+) -> str:
+    """
+    Build the coalescing key of a transcription request.
+
+    Two requests share a job only if both the audio bytes and every option
+    that affects the result are identical.
+
+    Args:
+        content_hash: Hex digest of the uploaded bytes
+        extension: Upload file extension (selects the decoder)
+        language, model, decoding_method, hotwords: Transcription options
+
+    Returns:
+        Key string
+    """
+    return "|".join([
+        content_hash,
+        extension,
+        language or "",
+        model or "",
+        decoding_method or "",
+        "/".join(hotwords or []),
+    ])
+
+
+@dataclass
+class _Job:
+    """A running shared computation."""
+    task: asyncio.Future
+    cancel: CancelToken
+    subscribers: int = 0
+
+
+class SingleFlight:
+    """Runs at most one job per key; concurrent callers with the same key share it."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._jobs: dict[str, _Job] = {}
+        self.coalesced_total = 0
+
+    async def run(self, key: Optional[str], start: Callable[[CancelToken], Awaitable[T]]) -> T:
+        """
+        Run a job, or attach to the one already running for key.
+
+        start is only called (synchronously, before any await) when no job
+        for key is running; it gets the job's CancelToken and must return
+        the awaitable that does the work. Cancelling this call detaches the
+        caller, and cancels the token if no other caller is waiting.
+
+        Args:
+            key: Coalescing key (None never coalesces)
+            start: Factory for the job
+
+        Returns:
+            Result of the shared job
+        """
+        if key is not None and not self.settings.coalesce_requests:
+            key = None
+
+        job = self._jobs.get(key) if key is not None else None
+        if job is None:
+            cancel = CancelToken()
+            job = _Job(asyncio.ensure_future(start(cancel)), cancel)
+            if key is not None:
+                self._jobs[key] = job
+            job.task.add_done_callback(lambda _: self._forget(key, job))
+        else:
+            self.coalesced_total += 1
+            logger.info(f"Attached to in-flight transcription ({job.subscribers} waiting)")
+
+        job.subscribers += 1
+        try:
+            return await asyncio.shield(job.task)
+        finally:
+            job.subscribers -= 1
+            if job.subscribers == 0 and not job.task.done():
+                logger.info("All subscribers left an in-flight transcription, cancelling it")
+                job.cancel.cancel(ABANDONED)
+                # A new identical request must not attach to the stopping job
+                if key is not None and self._jobs.get(key) is job:
+                    del self._jobs[key]
+
+    def _forget(self, key: Optional[str], job: _Job) -> None:
+        """Drop a finished job (and retrieve its exception so it isn't reported as unhandled)."""
+        if key is not None and self._jobs.get(key) is job:
+            del self._jobs[key]
+        if not job.task.cancelled():
+            job.task.exception()
+
+    def status(self) -> dict:
+        """Get coalescing information."""
+        return {
+            "in_flight": len(self._jobs),
+            "coalesced_total": self.coalesced_total,
+        }
+
+
+# Module-level instance
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get request coalescer instance."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,180 @@
+"""
+Cross-request decode batching.
+
+Short uploads (voice notes) are decoded in one recognizer call each, so
+under load every request ran its own encoder pass. Requests for the same
+model, decoding method and hotwords now share calls: the first one becomes
+the leader of an open batch and waits for a decode slot as before; requests
+that arrive while it waits join the batch instead of queueing for a slot of
+their own. When the slot frees up the leader closes the batch and decodes
+all of it with one decode_streams call.
+
+Nobody waits for company: an idle service decodes a request as soon as it
+arrives, and batches only form from requests that would have queued anyway.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+from config import get_settings
+from ml_models.asr import ASRModel, format_hotwords
+from services.cancellation import CancelToken, OperationCancelled
+from services.chunk_planner import CANCEL_POLL_SECONDS, get_chunk_planner
+
+logger = logging.getLogger(__name__)
+
+# Longer clips decode alone: decode_streams pads every stream to the longest
+BATCHABLE_SECONDS = 30
+
+# Result handed to followers whose leader was cancelled before decoding
+_REJOIN = object()
+
+
+@dataclass
+class _OpenBatch:
+    """Requests waiting for their leader to get a decode slot."""
+    items: list[tuple[np.ndarray, Future]] = field(default_factory=list)
+
+
+class DecodeBatcher:
+    """Decodes concurrent short requests for the same model in shared calls."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.chunk_planner = get_chunk_planner()
+        self._lock = threading.Lock()
+        self._open: dict[tuple, _OpenBatch] = {}
+        self.batched_total = 0
+
+    def transcribe(
+        self,
+        asr_model: ASRModel,
+        samples: np.ndarray,
+        decoding_method: str,
+        hotwords: Optional[list[str]],
+        decode: Callable[[list[np.ndarray]], list[Optional[str]]],
+        cancel: Optional[CancelToken] = None
+    ) -> str:
+        """
+        Decode one utterance, sharing the recognizer call with concurrent requests.
+
+        Args:
+            asr_model: Model the caller holds a lease on
+            samples: Audio samples (float32, SAMPLE_RATE)
+            decoding_method: greedy_search or modified_beam_search
+            hotwords: Phrases to bias recognition towards
+            decode: Decodes a batch of utterances, None for those that failed
+            cancel: Token that stops the wait
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            OperationCancelled: If cancel fires before the audio is decoded
+            RuntimeError: If the audio failed to decode
+        """
+        sample_rate = self.settings.sample_rate
+        seconds = samples.size / sample_rate
+        if seconds > BATCHABLE_SECONDS:
+            with self.chunk_planner.decode_slot(seconds, cancel):
+                return self._result(decode([samples])[0])
+
+        hotwords_arg = format_hotwords(hotwords) if decoding_method == "modified_beam_search" else None
+        key = (id(asr_model), decoding_method, hotwords_arg)
+        while True:
+            future: Future = Future()
+            with self._lock:
+                batch = self._open.get(key)
+                leader = batch is None or len(batch.items) >= self.settings.decode_batch_size
+                if leader:
+                    batch = _OpenBatch()
+                    self._open[key] = batch
+                batch.items.append((samples, future))
+
+            if leader:
+                return self._lead(key, batch, future, seconds, decode, cancel)
+
+            result = self._follow(future, cancel)
+            if result is not _REJOIN:
+                return self._result(result)
+
+    def _lead(
+        self,
+        key: tuple,
+        batch: _OpenBatch,
+        own: Future,
+        seconds: float,
+        decode: Callable[[list[np.ndarray]], list[Optional[str]]],
+        cancel: Optional[CancelToken]
+    ) -> str:
+        """Wait for a decode slot, then decode everything that joined meanwhile."""
+        items: Optional[list[tuple[np.ndarray, Future]]] = None
+        try:
+            with self.chunk_planner.decode_slot(seconds, cancel) as usage:
+                with self._lock:
+                    if self._open.get(key) is batch:
+                        del self._open[key]
+                    # Followers that were cancelled while waiting drop out
+                    items = [(s, f) for s, f in batch.items if f.set_running_or_notify_cancel()]
+                    if len(items) > 1:
+                        self.batched_total += len(items)
+                usage.audio_seconds = sum(s.size for s, _ in items) / self.settings.sample_rate
+                try:
+                    texts = decode([s for s, _ in items])
+                except BaseException as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    raise
+                for (_, future), text in zip(items, texts):
+                    future.set_result(text)
+        except OperationCancelled:
+            if items is not None:
+                raise
+            # Cancelled before the batch was closed: its followers start over
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                followers = [f for _, f in batch.items if f is not own]
+            for future in followers:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(_REJOIN)
+            raise
+        return self._result(own.result())
+
+    def _follow(self, future: Future, cancel: Optional[CancelToken]):
+        """Wait for the leader to decode this request."""
+        while True:
+            if cancel is not None and cancel.cancelled and future.cancel():
+                cancel.check()
+            try:
+                return future.result(timeout=CANCEL_POLL_SECONDS if cancel is not None else None)
+            except TimeoutError:
+                continue
+
+    @staticmethod
+    def _result(text: Optional[str]) -> str:
+        """Text of a decoded request."""
+        if text is None:
+            raise RuntimeError("Transcription failed")
+        return text
+
+    def status(self) -> dict:
+        """Get cross-request batching information."""
+        return {"batched_requests_total": self.batched_total}
+
+
+# Module-level instance
+_decode_batcher: Optional[DecodeBatcher] = None
+
+
+def get_decode_batcher() -> DecodeBatcher:
+    """Get decode batcher instance."""
+    global _decode_batcher
+    if _decode_batcher is None:
+        _decode_batcher = DecodeBatcher()
+    return _decode_batcher
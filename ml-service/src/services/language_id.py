@@ -0,0 +1,312 @@
+"""
+Language identification.
+
+Two modes:
+- text: a vectorized classifier over the transcript. A single codepoint
+  histogram gives the writing system and the distinctive letters of each
+  language; function-word profiles separate languages that share both.
+- audio: a Whisper spoken-language model on the opening seconds, so the
+  language is known before decoding (and can route the request to a model
+  via MODEL_LANGUAGE_ROUTES). Falls back to text mode on failure.
+
+Each request resolves its language at most once per source (RequestLanguage).
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from config import get_settings
+from ml_models.language_id import SpokenLanguageModel
+
+logger = logging.getLogger(__name__)
+
+# Only this much of a transcript is classified; more text doesn't change the answer
+MAX_SAMPLE_CHARS = 4000
+
+_LATIN, _GREEK, _CYRILLIC = 1, 2, 3
+
+# Letters specific to (or much more common in) each language
+_LANGUAGE_LETTERS = {
+    "bg": "ъѝ",
+    "cs": "ěščřžýáíéůúťďň",
+    "da": "æøå",
+    "de": "äöüß",
+    "el": "",
+    "en": "",
+    "es": "ñáéíóúü",
+    "et": "õäöüšž",
+    "fi": "äö",
+    "fr": "éèêàçùâîôûëïœ",
+    "hr": "čćšžđ",
+    "hu": "őűáéíóöúü",
+    "it": "àèéìòù",
+    "lt": "ąčęėįšųūž",
+    "lv": "āčēģīķļņšūž",
+    "mt": "ċġħżàèìòù",
+    "nl": "ëïé",
+    "pl": "ąćęłńóśźż",
+    "pt": "ãõçáéíóúâêôà",
+    "ro": "ăâîșțşţ",
+    "ru": "ыэёъ",
+    "sk": "äľĺŕôščžýáíéúťďň",
+    "sl": "čšž",
+    "sv": "åäö",
+    "uk": "іїєґ",
+}
+
+# Frequent function words
+_LANGUAGE_WORDS = {
+    "bg": "и в не че на да се е аз той с как това по но те ние за от са",
+    "cs": "je se na to že a v s jsem ale jak tak co by už pro není mě jsou když",
+    "da": "og at det er en på jeg ikke for med har den af til vi som de men et så",
+    "de": "der die das und ist nicht ich sie es ein eine zu mit auf den dem sich auch wir aber",
+    "el": "",
+    "en": "the and of to is that it was for you with this have are not but what be they we",
+    "es": "el la los las que y es en de un una por con para no lo se del pero muy",
+    "et": "ja on ei et see ta oli ka aga kui mis ma ning või nii veel siis olen seda kes",
+    "fi": "ja on ei se että oli mutta kun minä sinä hän tämä niin myös ovat voi jos sen ole vain kuin mitä olet nyt kanssa",
+    "fr": "le la les et est des un une je que qui pas dans pour ce il nous vous sur avec",
+    "hr": "je i u se da na su za ne to od ali kao sam što bi ću će smo biti",
+    "hu": "a az és hogy nem egy is van meg de ez csak már mint volt ha még vagy kell nagyon",
+    "it": "il la che e è di un una per non con sono del della gli lo ma anche questo mi",
+    "lt": "ir kad yra į su tai bet kaip ar iš ne aš jis buvo dar mes tik už apie labai",
+    "lv": "un ir ka ar par no uz tas bet kā vai es arī to viņš nav mēs jau tā būs",
+    "mt": "il u li ta hija huwa ma għal minn din dan jien aħna kien fuq bħala ukoll imma kif",
+    "nl": "de het een en van is dat niet ik je op te zijn met voor maar wat ook er hij",
+    "pl": "nie się jest to że na w i z do jak ale co tak czy ja jestem już o mnie",
+    "pt": "o a os as que e é de do da em um uma não para com por se mas você",
+    "ro": "și în de la că nu este o un pe cu care mai sunt din pentru dar se ce ai",
+    "ru": "и в не что на я он с как это по но они мы все так был уже или есть",
+    "sk": "je sa na to že a v s som ale ako tak čo by už pre nie ma sú keď",
+    "sl": "je in se da na v ki za pa so ne to bi sem tudi kot ali smo že samo",
+    "sv": "och att det är som en på jag inte för med har den av till vi om men ett så",
+    "uk": "і в не що на я він з як це та але вони ми все так був вже або є",
+}
+
+# Writing system of each language
+_LANGUAGE_SCRIPTS = {language: _LATIN for language in _LANGUAGE_LETTERS}
+_LANGUAGE_SCRIPTS.update({"bg": _CYRILLIC, "ru": _CYRILLIC, "uk": _CYRILLIC, "el": _GREEK})
+
+# Reported when a script has no distinguishing evidence
+_SCRIPT_DEFAULTS = {_LATIN: "en", _CYRILLIC: "ru", _GREEK: "el"}
+
+_LANGUAGES = tuple(_LANGUAGE_LETTERS)
+_LANGUAGE_SCRIPT_IDS = np.array([_LANGUAGE_SCRIPTS[language] for language in _LANGUAGES])
+_TABLE_SIZE = 0x500
+_WORD_RE = re.compile(r"\w+")
+
+
+def _build_script_table() -> np.ndarray:
+    """Map codepoints below _TABLE_SIZE to a script id (0 for non-letters)."""
+    table = np.zeros(_TABLE_SIZE, dtype=np.intp)
+    for start, end, script in (
+        (0x41, 0x5A, _LATIN), (0x61, 0x7A, _LATIN), (0xC0, 0x24F, _LATIN),
+        (0x370, 0x3FF, _GREEK), (0x400, 0x4FF, _CYRILLIC),
+    ):
+        table[start:end + 1] = script
+    table[[0xD7, 0xF7]] = 0  # multiplication and division signs
+    return table
+
+
+def _build_weights(features: dict[str, list[str]], index: dict[str, int]) -> np.ndarray:
+    """Build a (feature, language) matrix, weighting shared features down."""
+    weights = np.zeros((len(index), len(_LANGUAGES)), dtype=np.float32)
+    for column, language in enumerate(_LANGUAGES):
+        for feature in features[language]:
+            weights[index[feature], column] = 1.0
+    shared = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, shared, out=weights, where=shared > 0)
+
+
+_SCRIPT_TABLE = _build_script_table()
+_CHAR_WEIGHTS = _build_weights(
+    {language: list(letters) for language, letters in _LANGUAGE_LETTERS.items()},
+    {chr(cp): cp for cp in range(_TABLE_SIZE)}
+)
+# Only the distinctive letters carry weight; scoring skips the other rows
+_CHAR_ROWS = np.flatnonzero(_CHAR_WEIGHTS.any(axis=1))
+_CHAR_WEIGHTS = _CHAR_WEIGHTS[_CHAR_ROWS]
+_WORD_INDEX = {
+    word: i for i, word in enumerate(sorted({w for words in _LANGUAGE_WORDS.values() for w in words.split()}))
+}
+_WORD_WEIGHTS = _build_weights(
+    {language: words.split() for language, words in _LANGUAGE_WORDS.items()},
+    _WORD_INDEX
+)
+
+
+@dataclass
+class LanguageDetection:
+    """Identified language of a request."""
+    language: str
+    confidence: float
+    source: str  # "request", "audio", "text" or "default"
+
+
+class LanguageIdentifier:
+    """Text and spoken language identification."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.spoken_model = SpokenLanguageModel()
+        allowed = set(self.settings.language_id_languages)
+        self._allowed = np.array([language in allowed for language in _LANGUAGES])
+        self._audio_disabled = False
+
+    @property
+    def audio_enabled(self) -> bool:
+        """Check if audio language identification is configured and working."""
+        return (
+            self.settings.language_id_mode == "audio"
+            and self.spoken_model.is_configured
+            and not self._audio_disabled
+        )
+
+    def detect_text(self, text: str) -> LanguageDetection:
+        """
+        Identify the language of a transcript.
+
+        Args:
+            text: Transcribed text
+
+        Returns:
+            LanguageDetection (source "default" if text has no letters)
+        """
+        sample = text[:MAX_SAMPLE_CHARS].lower()
+        codepoints = np.frombuffer(sample.encode("utf-32-le"), dtype="<u4")
+        codepoints = np.where(codepoints < _TABLE_SIZE, codepoints, 0)
+
+        script_counts = np.bincount(_SCRIPT_TABLE[codepoints], minlength=4)
+        script_counts[0] = 0
+        if not script_counts.any():
+            return LanguageDetection(self.settings.default_language, 0.0, "default")
+        script = int(script_counts.argmax())
+
+        histogram = np.bincount(codepoints, minlength=_TABLE_SIZE)[_CHAR_ROWS]
+        scores = histogram.astype(np.float32) @ _CHAR_WEIGHTS
+        words = [_WORD_INDEX[w] for w in _WORD_RE.findall(sample) if w in _WORD_INDEX]
+        if words:
+            scores += np.bincount(words, minlength=len(_WORD_INDEX)).astype(np.float32) @ _WORD_WEIGHTS
+
+        candidates = self._allowed & (_LANGUAGE_SCRIPT_IDS == script)
+        if candidates.sum() == 1:
+            return LanguageDetection(_LANGUAGES[int(candidates.argmax())], 1.0, "text")
+
+        scores = np.where(candidates, scores, 0.0)
+        total = float(scores.sum())
+        if total == 0.0:
+            return LanguageDetection(self._script_default(script, candidates), 0.0, "text")
+
+        best = int(scores.argmax())
+        return LanguageDetection(_LANGUAGES[best], round(float(scores[best]) / total, 3), "text")
+
+    def _script_default(self, script: int, candidates: np.ndarray) -> str:
+        """Pick the language reported for a script without other evidence."""
+        default = _SCRIPT_DEFAULTS[script]
+        if candidates[_LANGUAGES.index(default)]:
+            return default
+        if candidates.any():
+            return _LANGUAGES[int(candidates.argmax())]
+        return self.settings.default_language
+
+    def detect_audio(self, samples: np.ndarray, sample_rate: int) -> Optional[LanguageDetection]:
+        """
+        Identify the spoken language from the opening seconds of audio.
+
+        Args:
+            samples: Mono float32 samples (only LANGUAGE_ID_AUDIO_SECONDS are used)
+            sample_rate: Sample rate of audio
+
+        Returns:
+            LanguageDetection, or None if audio mode is off, failed or the
+            language isn't one of LANGUAGE_ID_LANGUAGES
+        """
+        if not self.audio_enabled or samples.size == 0:
+            return None
+
+        head = samples[:int(self.settings.language_id_audio_seconds * sample_rate)]
+        try:
+            language = self.spoken_model.identify(head, sample_rate)
+        except Exception as e:
+            # A broken model shouldn't fail every request; fall back to text mode
+            logger.error(f"Spoken language ID failed, falling back to text mode: {e}")
+            self._audio_disabled = True
+            return None
+
+        if language not in self.settings.language_id_languages:
+            logger.debug(f"Spoken language '{language}' not in LANGUAGE_ID_LANGUAGES, ignoring")
+            return None
+        return LanguageDetection(language, 1.0, "audio")
+
+    def request(self, hint: Optional[str] = None) -> "RequestLanguage":
+        """Start language resolution for one request or batch file."""
+        return RequestLanguage(self, hint)
+
+
+class RequestLanguage:
+    """Language of one request, identified at most once per source."""
+
+    def __init__(self, identifier: LanguageIdentifier, hint: Optional[str] = None):
+        self._identifier = identifier
+        self._audio_checked = False
+        self._detection: Optional[LanguageDetection] = (
+            LanguageDetection(hint, 1.0, "request") if hint else None
+        )
+
+    @property
+    def wants_audio(self) -> bool:
+        """Check if audio should be passed to observe_audio before decoding."""
+        return self._detection is None and not self._audio_checked and self._identifier.audio_enabled
+
+    @property
+    def known(self) -> Optional[str]:
+        """Language known so far (before decoding: from the request or audio)."""
+        return self._detection.language if self._detection else None
+
+    def observe_audio(self, samples: np.ndarray, sample_rate: int) -> Optional[str]:
+        """
+        Identify the language from audio, once per request.
+
+        Args:
+            samples: Mono float32 samples starting at the beginning of the recording
+            sample_rate: Sample rate of audio
+
+        Returns:
+            Language known so far
+        """
+        if self.wants_audio:
+            self._audio_checked = True
+            self._detection = self._identifier.detect_audio(samples, sample_rate)
+            if self._detection:
+                logger.info(f"Spoken language: {self._detection.language}")
+        return self.known
+
+    def resolve(self, text: str) -> LanguageDetection:
+        """
+        Get the final language, classifying the transcript if still unknown.
+
+        Args:
+            text: Full transcript
+
+        Returns:
+            LanguageDetection
+        """
+        if self._detection is None:
+            self._detection = self._identifier.detect_text(text)
+        return self._detection
+
+
+# Module-level instance
+_language_identifier: Optional[LanguageIdentifier] = None
+
+
+def get_language_identifier() -> LanguageIdentifier:
+    """Get language identifier instance."""
+    global _language_identifier
+    if _language_identifier is None:
+        _language_identifier = LanguageIdentifier()
+    return _language_identifier
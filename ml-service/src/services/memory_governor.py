@@ -0,0 +1,346 @@
+"""
+Memory-budgeted admission.
+
+Before a transcription decodes anything it reserves an estimate of its
+peak memory: the larger of the conversion phase (whole-file decode,
+downmix and resample) and the decode phase (the audio and inference
+working memory of the chunks in flight). Reservations are admitted against
+MEMORY_BUDGET_MB, counting the live RSS of the process so an underestimate
+or a freshly loaded model can't push it past the budget unnoticed.
+
+A request that doesn't fit first tries cheaper ways to run (streaming
+conversion, then short chunks decoded one at a time), then waits for
+memory up to MEMORY_ADMISSION_TIMEOUT_SECONDS before failing with 503.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import psutil
+
+from config import get_settings
+from services.audio_processor import STREAM_BLOCK_SECONDS
+from services.cancellation import CancelToken
+from services.chunk_planner import ChunkPlan
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Share of the container (or host) memory used when MEMORY_BUDGET_MB is 0
+AUTO_BUDGET_FRACTION = 0.8
+
+# cgroup v2 and v1 memory limits of the container
+CGROUP_LIMIT_FILES = (
+    Path("/sys/fs/cgroup/memory.max"),
+    Path("/sys/fs/cgroup/memory/memory.limit_in_bytes"),
+)
+
+# Source format assumed for files libsndfile can't read (ffmpeg decodes them)
+ASSUMED_SOURCE_FORMAT = (48000, 2)
+
+# Preprocessing copies of the audio (DC offset, trim, normalization)
+PREPROCESS_COPIES = 2
+
+# Inference working memory (features, encoder activations) per byte of float32 audio
+INFERENCE_BYTES_PER_AUDIO_BYTE = 4
+
+# Resident memory of an ffmpeg conversion process
+FFMPEG_PROCESS_BYTES = 64 * MB
+
+# How often a waiting request re-reads RSS and rechecks its cancel token
+MEMORY_POLL_SECONDS = 0.5
+
+
+class MemoryBudgetError(Exception):
+    """
+    Exception raised when the memory budget can't fit a request.
+
+    retry_after is None when the request could never fit the budget.
+    """
+    def __init__(self, message: str, retry_after: Optional[int] = 5):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+@dataclass
+class MemoryPlan:
+    """One way to run a request and the peak memory it needs."""
+    plan: Optional[ChunkPlan]
+    chunked: bool
+    streaming: bool
+    nbytes: int
+
+
+class MemoryReservation:
+    """Admitted share of the memory budget, held until released."""
+
+    def __init__(self, governor: "MemoryGovernor", memory_plan: MemoryPlan):
+        self.governor = governor
+        self.memory_plan = memory_plan
+        self._held = memory_plan.nbytes
+        self._lock = threading.Lock()
+
+    def release(self, nbytes: Optional[int] = None) -> None:
+        """
+        Return the reservation, or part of it (idempotent).
+
+        Args:
+            nbytes: Bytes no longer needed (None returns everything still held)
+        """
+        with self._lock:
+            nbytes = self._held if nbytes is None else min(nbytes, self._held)
+            self._held -= nbytes
+        if nbytes > 0:
+            self.governor._release(nbytes)
+
+
+class MemoryGovernor:
+    """Admits requests while their estimated peak memory fits the budget."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._cond = threading.Condition()
+        self._process = psutil.Process()
+        self._reserved = 0
+        self._waiting = 0
+        self._idle_rss = self._rss()
+        self.degraded_total = 0
+        self.rejected_total = 0
+        self.budget_bytes = self._budget()
+
+    def _budget(self) -> int:
+        """MEMORY_BUDGET_MB, or a share of the container or host memory."""
+        if self.settings.memory_budget_mb:
+            return self.settings.memory_budget_mb * MB
+
+        limit = psutil.virtual_memory().total
+        for path in CGROUP_LIMIT_FILES:
+            try:
+                value = path.read_text().strip()
+            except OSError:
+                continue
+            if value.isdigit():
+                limit = min(limit, int(value))
+        return int(limit * AUTO_BUDGET_FRACTION)
+
+    def _rss(self) -> int:
+        """Resident memory of this process."""
+        return self._process.memory_info().rss
+
+    def estimate(
+        self,
+        duration: float,
+        source_format: Optional[tuple[int, int]],
+        plan: Optional[ChunkPlan],
+        chunked: bool,
+        streaming: bool,
+        held_seconds: float = 0.0
+    ) -> int:
+        """
+        Estimate the peak memory of a request.
+
+        Args:
+            duration: Audio duration in seconds
+            source_format: (sample rate, channels) of a libsndfile-readable
+                upload, None for formats that need ffmpeg
+            plan: Chunk plan the audio is decoded with (None counts
+                conversion only)
+            chunked: Whether the audio is decoded in chunks
+            streaming: Whether conversion is streamed
+            held_seconds: Decoded audio kept in memory after conversion (a
+                batch file's chunks waiting for the recognizer)
+
+        Returns:
+            Peak bytes
+        """
+        sample_rate = self.settings.sample_rate
+        native = source_format is not None
+        source_rate, channels = source_format or ASSUMED_SOURCE_FORMAT
+
+        conversion = 0
+        if source_format != (sample_rate, 1):
+            if streaming and native:
+                # Block, its downmix and its resampled output
+                conversion = STREAM_BLOCK_SECONDS * (source_rate * channels + source_rate + sample_rate) * 4
+            elif streaming:
+                conversion = FFMPEG_PROCESS_BYTES
+            else:
+                frames = duration * source_rate
+                conversion = frames * channels * 4 + duration * sample_rate * (4 + 2)
+                if channels > 1:
+                    conversion += frames * 4
+                if not native:
+                    # pydub's raw bytes and sample array next to the float copy
+                    conversion += frames * channels * 4
+
+        if plan is None:
+            decoded_seconds = 0.0
+        elif chunked:
+            num_chunks = math.ceil(duration / plan.chunk_seconds)
+            batch_size = min(
+                plan.batch_size or self.settings.decode_batch_size,
+                math.ceil(num_chunks / plan.parallelism)
+            )
+            # Batches in flight plus the one prepared next
+            decoded_seconds = min(duration, (plan.parallelism + 1) * batch_size * plan.chunk_seconds)
+        else:
+            decoded_seconds = duration
+        decode = decoded_seconds * sample_rate * 4 * (1 + PREPROCESS_COPIES + INFERENCE_BYTES_PER_AUDIO_BYTE)
+
+        held = held_seconds * sample_rate * 4
+
+        return int(max(conversion, decode, held))
+
+    def options(
+        self,
+        duration: float,
+        source_format: Optional[tuple[int, int]],
+        plan: Optional[ChunkPlan] = None,
+        chunked: bool = False,
+        held_seconds: float = 0.0
+    ) -> list[MemoryPlan]:
+        """
+        List ways to run a request, preferred first, each cheaper than the last.
+
+        The planner's plan with whole-file conversion comes first, then
+        streaming conversion, then MIN_CHUNK_SECONDS chunks decoded one at
+        a time. Without a plan only conversion is covered.
+
+        Args:
+            duration: Audio duration in seconds
+            source_format: See estimate
+            plan: Chunk plan chosen by the planner
+            chunked: Whether the planner's plan decodes in chunks
+            held_seconds: See estimate
+
+        Returns:
+            MemoryPlan list
+        """
+        candidates = [(plan, chunked, False), (plan, chunked, True)]
+        if plan is not None:
+            min_chunk = min(self.settings.min_chunk_seconds, plan.chunk_seconds)
+            candidates.append((ChunkPlan(min_chunk, 1, batch_size=1), duration > min_chunk, True))
+
+        options: list[MemoryPlan] = []
+        for candidate_plan, candidate_chunked, streaming in candidates:
+            nbytes = self.estimate(
+                duration, source_format, candidate_plan, candidate_chunked, streaming, held_seconds
+            )
+            if not options or nbytes < options[-1].nbytes:
+                options.append(MemoryPlan(candidate_plan, candidate_chunked, streaming, nbytes))
+        return options
+
+    def admit(self, options: list[MemoryPlan], cancel: Optional[CancelToken] = None) -> MemoryReservation:
+        """
+        Reserve memory for the first option that fits, waiting if none does.
+
+        Args:
+            options: Ways to run the request, preferred first (see options)
+            cancel: Token that stops the wait
+
+        Returns:
+            MemoryReservation; its memory_plan is the option admitted
+
+        Raises:
+            MemoryBudgetError: If even the cheapest option exceeds the budget,
+                or nothing fits within the admission timeout
+            OperationCancelled: If cancel fires while waiting
+        """
+        cheapest = options[-1]
+        if cheapest.nbytes > self.budget_bytes:
+            self.rejected_total += 1
+            raise MemoryBudgetError(
+                f"Request needs {cheapest.nbytes // MB}MB of memory, "
+                f"more than the {self.budget_bytes // MB}MB budget",
+                retry_after=None
+            )
+
+        timeout = self.settings.memory_admission_timeout_seconds
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    available = self.budget_bytes - self._in_use()
+                    admitted = next((option for option in options if option.nbytes <= available), None)
+                    # Alone, a request runs however tight memory is: nobody will free any
+                    if admitted is None and self._reserved == 0:
+                        admitted = cheapest
+                    if admitted is not None:
+                        break
+                    if cancel is not None:
+                        cancel.check()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_total += 1
+                        raise MemoryBudgetError(
+                            "Memory budget exhausted, retry later",
+                            retry_after=max(1, int(timeout))
+                        )
+                    self._cond.wait(min(remaining, MEMORY_POLL_SECONDS))
+            finally:
+                self._waiting -= 1
+            self._reserved += admitted.nbytes
+
+        if admitted is not options[0]:
+            self.degraded_total += 1
+            chunking = f", {admitted.plan.chunk_seconds}s chunks x1" if admitted.plan is not options[0].plan else ""
+            logger.info(
+                f"Memory pressure: streaming conversion{chunking} "
+                f"({admitted.nbytes // MB}MB instead of {options[0].nbytes // MB}MB)"
+            )
+        return MemoryReservation(self, admitted)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for memory."""
+        return self._waiting
+
+    def _in_use(self) -> int:
+        """
+        Memory counted against the budget (lock held).
+
+        Reservations sit on top of the RSS last seen with none held (models
+        and runtime); live RSS takes over when it is higher, e.g. because
+        a model was loaded or an estimate was low.
+        """
+        rss = self._rss()
+        if self._reserved == 0:
+            self._idle_rss = rss
+        return max(rss, self._idle_rss + self._reserved)
+
+    def _release(self, nbytes: int) -> None:
+        """Return reserved memory and wake waiting requests."""
+        with self._cond:
+            self._reserved -= nbytes
+            self._cond.notify_all()
+
+    def status(self) -> dict:
+        """Get memory budget information."""
+        with self._cond:
+            return {
+                "budget_mb": round(self.budget_bytes / MB, 1),
+                "rss_mb": round(self._rss() / MB, 1),
+                "reserved_mb": round(self._reserved / MB, 1),
+                "waiting": self._waiting,
+                "degraded_total": self.degraded_total,
+                "rejected_total": self.rejected_total,
+            }
+
+
+# Module-level instance
+_memory_governor: Optional[MemoryGovernor] = None
+
+
+def get_memory_governor() -> MemoryGovernor:
+    """Get memory governor instance."""
+    global _memory_governor
+    if _memory_governor is None:
+        _memory_governor = MemoryGovernor()
+    return _memory_governor
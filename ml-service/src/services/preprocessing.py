@@ -0,0 +1,329 @@
+"""
+Waveform preprocessing before inference.
+
+Vectorized DC removal, edge silence trimming and loudness normalization
+on float32 buffers, applied in place right before the ASR model.
+
+Chunked files are measured once as a whole (FileLevels) and every chunk
+is processed with the file's levels, so only the file's edges are trimmed
+and all chunks get the same gain.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileLevels:
+    """Preprocessing parameters measured over a whole file."""
+    dc_offset: float
+    # Span of samples kept after trimming
+    start: int
+    end: int
+    gain: float
+
+
+class AudioPreprocessor:
+    """In-place waveform cleanup for ASR input."""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    def process(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> np.ndarray:
+        """
+        Run the configured preprocessing steps.
+
+        DC removal and normalization modify the buffer in place; trimming
+        returns a view into it, so no audio is copied unless the input is
+        read-only or not float32.
+
+        Args:
+            samples: Mono audio samples
+            sample_rate: Sample rate of audio (defaults to SAMPLE_RATE)
+
+        Returns:
+            Processed samples (may be empty if the buffer is all silence)
+        """
+        sample_rate = sample_rate or self.settings.sample_rate
+
+        if samples.dtype != np.float32 or not samples.flags.writeable:
+            samples = samples.astype(np.float32)
+
+        if samples.size == 0:
+            return samples
+
+        if self.settings.remove_dc_offset:
+            remove_dc_offset(samples)
+
+        if self.settings.trim_silence:
+            start, end = trim_bounds(
+                samples,
+                sample_rate,
+                top_db=self.settings.trim_top_db,
+                frame_ms=self.settings.trim_frame_ms,
+                padding_ms=self.settings.trim_padding_ms
+            )
+            if start > 0 or end < samples.size:
+                logger.debug(
+                    f"Trimmed {start / sample_rate:.2f}s leading and "
+                    f"{(samples.size - end) / sample_rate:.2f}s trailing silence"
+                )
+            samples = samples[start:end]
+
+        if self.settings.normalization != "none" and samples.size:
+            normalize(
+                samples,
+                mode=self.settings.normalization,
+                target_dbfs=self.settings.normalization_target_dbfs,
+                max_gain_db=self.settings.normalization_max_gain_db
+            )
+
+        return samples
+
+    def measure(self, chunks: Iterable[np.ndarray], sample_rate: Optional[int] = None) -> FileLevels:
+        """
+        Measure the preprocessing levels of a file from its chunks.
+
+        Only per-frame sums are kept, so the file is never in memory whole.
+
+        Args:
+            chunks: Mono float32 chunks covering the file, in order
+            sample_rate: Sample rate of audio (defaults to SAMPLE_RATE)
+
+        Returns:
+            FileLevels for process_chunk
+        """
+        sample_rate = sample_rate or self.settings.sample_rate
+        frame = max(1, sample_rate * self.settings.trim_frame_ms // 1000)
+
+        total = 0
+        total_sum = 0.0
+        high, low = -np.inf, np.inf
+        frame_sums: list[np.ndarray] = []
+        frame_squares: list[np.ndarray] = []
+        carry = np.empty(0, dtype=np.float32)
+        for chunk in chunks:
+            if chunk.size == 0:
+                continue
+            total += chunk.size
+            total_sum += float(chunk.sum(dtype=np.float64))
+            high = max(high, float(chunk.max()))
+            low = min(low, float(chunk.min()))
+            # Frames run on across chunk boundaries
+            buffer = np.concatenate([carry, chunk]) if carry.size else chunk
+            num_frames = buffer.size // frame
+            frames = buffer[:num_frames * frame].reshape(num_frames, frame)
+            frame_sums.append(frames.sum(axis=1, dtype=np.float64))
+            frame_squares.append(np.einsum("ij,ij->i", frames, frames).astype(np.float64))
+            carry = buffer[num_frames * frame:].copy()
+
+        if total == 0:
+            return FileLevels(0.0, 0, 0, 1.0)
+
+        dc_offset = total_sum / total if self.settings.remove_dc_offset else 0.0
+        sums = np.concatenate(frame_sums)
+        # Mean square of each frame with the offset removed
+        energy = (np.concatenate(frame_squares) - 2 * dc_offset * sums) / frame + dc_offset ** 2
+
+        start, end = 0, total
+        if self.settings.trim_silence and energy.size:
+            start, end = voiced_span(
+                energy, frame, total, sample_rate,
+                top_db=self.settings.trim_top_db,
+                padding_ms=self.settings.trim_padding_ms
+            )
+            if start > 0 or end < total:
+                logger.debug(
+                    f"Trimmed {start / sample_rate:.2f}s leading and "
+                    f"{(total - end) / sample_rate:.2f}s trailing silence"
+                )
+
+        gain = 1.0
+        if self.settings.normalization != "none" and end > start:
+            peak = max(high - dc_offset, dc_offset - low)
+            kept = energy[start // frame:-(-end // frame)]
+            rms = float(np.sqrt(max(kept.mean(), 0.0))) if kept.size else peak
+            gain = normalization_gain(
+                peak, rms,
+                mode=self.settings.normalization,
+                target_dbfs=self.settings.normalization_target_dbfs,
+                max_gain_db=self.settings.normalization_max_gain_db
+            )
+
+        return FileLevels(dc_offset, start, end, gain)
+
+    def process_chunk(self, chunk: np.ndarray, offset: int, levels: FileLevels) -> np.ndarray:
+        """
+        Preprocess one chunk of a file with the file's levels.
+
+        Like process, this works in place and trims by returning a view.
+
+        Args:
+            chunk: Mono audio samples of the chunk
+            offset: Index of the chunk's first sample in the file
+            levels: Levels measured over the file (see measure)
+
+        Returns:
+            Processed samples (empty if the chunk lies outside the kept span)
+        """
+        if chunk.dtype != np.float32 or not chunk.flags.writeable:
+            chunk = chunk.astype(np.float32)
+
+        samples = chunk[max(0, levels.start - offset):max(0, levels.end - offset)]
+        if samples.size == 0:
+            return samples
+
+        if levels.dc_offset:
+            samples -= np.float32(levels.dc_offset)
+        if levels.gain != 1.0:
+            samples *= np.float32(levels.gain)
+        return samples
+
+
+def remove_dc_offset(samples: np.ndarray) -> None:
+    """Subtract the mean from samples in place."""
+    samples -= np.float32(samples.mean(dtype=np.float64))
+
+
+def trim_bounds(
+    samples: np.ndarray,
+    sample_rate: int,
+    top_db: float = 40.0,
+    frame_ms: int = 25,
+    padding_ms: int = 200
+) -> tuple[int, int]:
+    """
+    Find the non-silent span of a buffer by frame energy.
+
+    Frames whose mean-square energy is more than top_db below the loudest
+    frame count as silence. Only leading and trailing silence is cut.
+
+    Args:
+        samples: Mono audio samples
+        sample_rate: Sample rate of audio
+        top_db: Silence threshold below the loudest frame, in dB
+        frame_ms: Analysis frame length
+        padding_ms: Audio kept around the detected span
+
+    Returns:
+        (start, end) sample indices of the span to keep
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    num_frames = samples.size // frame
+    if num_frames == 0:
+        return 0, samples.size
+
+    frames = samples[:num_frames * frame].reshape(num_frames, frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+    return voiced_span(energy, frame, samples.size, sample_rate, top_db, padding_ms)
+
+
+def voiced_span(
+    energy: np.ndarray,
+    frame: int,
+    total: int,
+    sample_rate: int,
+    top_db: float = 40.0,
+    padding_ms: int = 200
+) -> tuple[int, int]:
+    """
+    Find the non-silent span from per-frame mean-square energy.
+
+    Args:
+        energy: Mean-square energy of each whole frame
+        frame: Frame length in samples
+        total: Number of samples (the partial last frame isn't in energy)
+        sample_rate: Sample rate of audio
+        top_db: Silence threshold below the loudest frame, in dB
+        padding_ms: Audio kept around the detected span
+
+    Returns:
+        (start, end) sample indices of the span to keep
+    """
+    num_frames = energy.size
+    peak = energy.max()
+    if peak <= 0:
+        return 0, 0
+
+    voiced = np.flatnonzero(energy > peak * 10 ** (-top_db / 10))
+    padding = sample_rate * padding_ms // 1000
+
+    start = max(0, int(voiced[0]) * frame - padding)
+    if voiced[-1] == num_frames - 1:
+        end = total
+    else:
+        end = min(total, (int(voiced[-1]) + 1) * frame + padding)
+    return start, end
+
+
+def normalize(
+    samples: np.ndarray,
+    mode: str = "peak",
+    target_dbfs: float = -3.0,
+    max_gain_db: float = 30.0
+) -> None:
+    """
+    Scale samples in place to a target peak or RMS level.
+
+    Gain is capped at max_gain_db so near-silent noise isn't blown up, and
+    RMS normalization never pushes the peak above full scale.
+
+    Args:
+        samples: Mono audio samples
+        mode: "peak" or "rms"
+        target_dbfs: Target level in dBFS
+        max_gain_db: Maximum applied gain in dB
+    """
+    peak = float(np.abs(samples).max())
+    rms = float(np.sqrt(np.dot(samples, samples) / samples.size)) if mode == "rms" else peak
+    gain = normalization_gain(peak, rms, mode, target_dbfs, max_gain_db)
+    if gain != 1.0:
+        samples *= np.float32(gain)
+
+
+def normalization_gain(
+    peak: float,
+    rms: float,
+    mode: str = "peak",
+    target_dbfs: float = -3.0,
+    max_gain_db: float = 30.0
+) -> float:
+    """
+    Gain that brings audio with the given peak and RMS to the target level.
+
+    Args:
+        peak: Peak absolute amplitude
+        rms: RMS amplitude (used in "rms" mode)
+        mode: "peak" or "rms"
+        target_dbfs: Target level in dBFS
+        max_gain_db: Maximum applied gain in dB
+
+    Returns:
+        Linear gain (1.0 for silence)
+    """
+    if peak == 0.0:
+        return 1.0
+
+    target = 10 ** (target_dbfs / 20)
+    if mode == "rms" and rms > 0:
+        gain = min(target / rms, 1.0 / peak)
+    else:
+        gain = target / peak
+
+    return min(gain, 10 ** (max_gain_db / 20))
+
+
+# Module-level instance
+audio_preprocessor = AudioPreprocessor()
+
+
+def get_audio_preprocessor() -> AudioPreprocessor:
+    """Get audio preprocessor instance."""
+    return audio_preprocessor
@@ -0,0 +1,112 @@
+"""
+Resampling stage.
+
+The single place audio changes sample rate, with selectable quality.
+"""
+
+import logging
+from math import gcd
+from typing import Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RESAMPLE_QUALITIES = ("soxr", "polyphase", "linear")
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """
+    Mix (frames, channels) audio down to mono float32.
+
+    Args:
+        samples: 1-D mono or 2-D (frames, channels) samples
+
+    Returns:
+        1-D float32 samples (the input itself if already mono float32)
+    """
+    if samples.ndim > 1:
+        if samples.shape[1] == 1:
+            samples = samples[:, 0]
+        else:
+            samples = samples.mean(axis=1, dtype=np.float32)
+    return samples.astype(np.float32, copy=False)
+
+
+def resample(
+    samples: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+    quality: str = "soxr"
+) -> np.ndarray:
+    """
+    Resample mono audio.
+
+    Returns the input unchanged when the rates already match.
+
+    Args:
+        samples: Mono float32 samples
+        orig_sr: Sample rate of samples
+        target_sr: Desired sample rate
+        quality: "soxr" (high quality), "polyphase" (scipy) or "linear" (fastest)
+
+    Returns:
+        Resampled float32 samples
+    """
+    if orig_sr == target_sr:
+        return samples
+
+    logger.debug(f"Resampling {orig_sr}Hz -> {target_sr}Hz ({quality})")
+
+    if quality == "soxr":
+        import soxr
+        resampled = soxr.resample(samples, orig_sr, target_sr, quality="HQ")
+
+    elif quality == "polyphase":
+        from scipy.signal import resample_poly
+        divisor = gcd(orig_sr, target_sr)
+        resampled = resample_poly(samples, target_sr // divisor, orig_sr // divisor)
+
+    elif quality == "linear":
+        num_out = int(round(samples.size * target_sr / orig_sr))
+        positions = np.arange(num_out, dtype=np.float64) * (orig_sr / target_sr)
+        resampled = np.interp(positions, np.arange(samples.size), samples)
+
+    else:
+        raise ValueError(f"Unsupported resample quality: {quality}")
+
+    return resampled.astype(np.float32, copy=False)
+
+
+def resample_blocks(
+    blocks: Iterable[np.ndarray],
+    orig_sr: int,
+    target_sr: int,
+    quality: str = "soxr"
+) -> Iterator[np.ndarray]:
+    """
+    Resample mono audio that arrives in blocks.
+
+    soxr keeps its filter state between blocks, so the output is the same
+    as resampling the whole signal at once; polyphase and linear resample
+    each block on its own.
+
+    Args:
+        blocks: Mono float32 sample blocks
+        orig_sr: Sample rate of the blocks
+        target_sr: Desired sample rate
+        quality: "soxr" (high quality), "polyphase" (scipy) or "linear" (fastest)
+
+    Yields:
+        Resampled float32 blocks
+    """
+    if orig_sr == target_sr or quality != "soxr":
+        for block in blocks:
+            yield resample(block, orig_sr, target_sr, quality)
+        return
+
+    import soxr
+    stream = soxr.ResampleStream(orig_sr, target_sr, 1, dtype="float32", quality="HQ")
+    for block in blocks:
+        yield stream.resample_chunk(np.ascontiguousarray(block, dtype=np.float32))
+    yield stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
@@ -0,0 +1,264 @@
+"""
+Temporary storage management.
+
+Gives every request its own temp namespace, enforces a global byte quota
+(admission control), prefers tmpfs when it is large enough and reaps
+namespaces left behind by crashed workers.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import psutil
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TempSpaceError(Exception):
+    """
+    Exception raised when the temp space quota can't fit a request.
+
+    retry_after is None when the request could never fit the quota.
+    """
+    def __init__(self, message: str, retry_after: Optional[int] = 5):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class TempNamespace:
+    """Per-request temp directory with its share of the byte quota."""
+
+    def __init__(self, manager: "TempSpaceManager", path: Path):
+        self.manager = manager
+        self.path = path
+        self.reserved_bytes = 0
+
+    def reserve(self, nbytes: int) -> None:
+        """
+        Reserve additional quota for files this request will write.
+
+        Args:
+            nbytes: Additional bytes needed
+
+        Raises:
+            TempSpaceError: If the quota stays exhausted past the admission timeout
+        """
+        if nbytes <= 0:
+            return
+        self.manager._reserve(nbytes)
+        self.reserved_bytes += nbytes
+
+    def release(self, nbytes: int) -> None:
+        """
+        Return quota for files this request has already deleted.
+
+        Args:
+            nbytes: Bytes to return (capped at what is reserved)
+        """
+        nbytes = min(nbytes, self.reserved_bytes)
+        if nbytes <= 0:
+            return
+        self.manager._release(nbytes)
+        self.reserved_bytes -= nbytes
+
+    def file_path(self, filename: str) -> Path:
+        """Get a path for a file inside this namespace."""
+        return self.path / filename
+
+
+class TempSpaceManager:
+    """Quota-bounded temp storage shared by all requests of a worker."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._cond = threading.Condition()
+        self._reserved = 0
+        self._namespaces: set[Path] = set()
+        # Global temp space quota in bytes (a share of it in CLI worker processes)
+        self.quota_bytes = self.settings.temp_quota_mb * 1024 * 1024
+        self.root, self.on_tmpfs = self._choose_root()
+
+    def _choose_root(self) -> tuple[Path, bool]:
+        """Use tmpfs if it exists, is writable and can hold the whole quota."""
+        if self.settings.temp_prefer_tmpfs:
+            tmpfs_root = self.settings.tmpfs_dir / "ml-service"
+            try:
+                tmpfs_root.mkdir(parents=True, exist_ok=True)
+                free = shutil.disk_usage(tmpfs_root).free
+                if os.access(tmpfs_root, os.W_OK) and free >= self.quota_bytes:
+                    logger.info(f"Using tmpfs for temp files: {tmpfs_root}")
+                    return tmpfs_root, True
+                logger.info(
+                    f"tmpfs too small for temp quota ({free // (1024 ** 2)}MB free), "
+                    f"using {self.settings.temp_dir}"
+                )
+            except OSError as e:
+                logger.debug(f"tmpfs unavailable: {e}")
+
+        self.settings.temp_dir.mkdir(parents=True, exist_ok=True)
+        return self.settings.temp_dir, False
+
+    @contextmanager
+    def namespace(self, initial_bytes: int = 0) -> Iterator[TempNamespace]:
+        """
+        Open a temp namespace for one request.
+
+        Everything written inside it is removed on exit, together with its
+        quota reservation.
+
+        Args:
+            initial_bytes: Quota to reserve up front (e.g. the upload size)
+
+        Yields:
+            TempNamespace
+        """
+        path = self.root / f"{os.getpid()}-{uuid.uuid4().hex}"
+        ns = TempNamespace(self, path)
+
+        # Register before creating so the reaper never sees it as orphaned
+        with self._cond:
+            self._namespaces.add(path)
+
+        try:
+            path.mkdir(parents=True)
+            ns.reserve(initial_bytes)
+            yield ns
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+            with self._cond:
+                self._namespaces.discard(path)
+                self._reserved -= ns.reserved_bytes
+                self._cond.notify_all()
+
+    def estimate_request_bytes(self, duration: float) -> int:
+        """
+        Estimate temp space a request needs beyond its upload.
+
+        The converted 16-bit WAV plus 10% headroom. Long audio is streamed
+        from that file in chunks, so it needs no extra space.
+        """
+        return int(duration * self.settings.sample_rate * 2 * 1.1)
+
+    def _reserve(self, nbytes: int) -> None:
+        """Reserve quota, waiting up to the admission timeout for space."""
+        if nbytes > self.quota_bytes:
+            raise TempSpaceError(
+                f"Request needs {nbytes // (1024 ** 2)}MB of temp space, "
+                f"more than the {self.quota_bytes // (1024 * 1024)}MB quota",
+                retry_after=None
+            )
+
+        deadline = time.monotonic() + self.settings.temp_admission_timeout_seconds
+        with self._cond:
+            while self._reserved + nbytes > self.quota_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TempSpaceError(
+                        "Temp space quota exhausted, retry later",
+                        retry_after=max(1, int(self.settings.temp_admission_timeout_seconds))
+                    )
+                self._cond.wait(remaining)
+            self._reserved += nbytes
+
+    def _release(self, nbytes: int) -> None:
+        """Return reserved quota and wake waiting requests."""
+        with self._cond:
+            self._reserved -= nbytes
+            self._cond.notify_all()
+
+    def reap_orphans(self, max_age_seconds: Optional[int] = None) -> int:
+        """
+        Remove temp files no live request owns.
+
+        A namespace is orphaned if its owning process is gone, was started
+        after the namespace was created (PID reuse after a restart), or it
+        is older than max_age_seconds. Loose files from older versions are
+        removed by age only.
+
+        Args:
+            max_age_seconds: Age limit (defaults to TEMP_ORPHAN_MAX_AGE_SECONDS)
+
+        Returns:
+            Number of namespaces and files removed
+        """
+        max_age = max_age_seconds if max_age_seconds is not None else self.settings.temp_orphan_max_age_seconds
+        now = time.time()
+        removed = 0
+
+        roots = {self.root, self.settings.temp_dir}
+        for root in roots:
+            if not root.exists():
+                continue
+            for entry in root.iterdir():
+                try:
+                    with self._cond:
+                        if entry in self._namespaces:
+                            continue
+                    mtime = entry.stat().st_mtime
+                    if entry.is_dir():
+                        if not self._is_orphaned(entry, mtime) and now - mtime < max_age:
+                            continue
+                        shutil.rmtree(entry, ignore_errors=True)
+                    elif now - mtime >= max_age:
+                        entry.unlink()
+                    else:
+                        continue
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.warning(f"Failed to remove orphaned temp entry {entry}: {e}")
+
+        if removed:
+            logger.info(f"Reaped {removed} orphaned temp entries")
+        return removed
+
+    def _is_orphaned(self, path: Path, mtime: float) -> bool:
+        """Check whether the process that created a namespace is gone."""
+        pid_part = path.name.split("-", 1)[0]
+        if not pid_part.isdigit():
+            return False
+        pid = int(pid_part)
+        if pid == os.getpid():
+            return True
+        try:
+            return psutil.Process(pid).create_time() > mtime
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.Error:
+            return False
+
+    def usage(self) -> dict:
+        """Get temp space usage information."""
+        with self._cond:
+            reserved = self._reserved
+            active = len(self._namespaces)
+        return {
+            "root": str(self.root),
+            "tmpfs": self.on_tmpfs,
+            "active_requests": active,
+            "reserved_mb": round(reserved / (1024 ** 2), 1),
+            "quota_mb": self.quota_bytes // (1024 * 1024),
+            "free_disk_mb": round(shutil.disk_usage(self.root).free / (1024 ** 2), 1),
+        }
+
+
+# Module-level instance
+_temp_space_manager: Optional[TempSpaceManager] = None
+
+
+def get_temp_space_manager() -> TempSpaceManager:
+    """Get temp space manager instance."""
+    global _temp_space_manager
+    if _temp_space_manager is None:
+        _temp_space_manager = TempSpaceManager()
+    return _temp_space_manager
@@ -5,20 +5,48 @@ Orchestrates audio processing and ASR inference with chunking support.
 """
 
 import logging
+import math
+import re
 import time
-from dataclasses import dataclass
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional, TypeVar
+
+import numpy as np
 
 from config import get_settings
-from ml_models.asr import get_asr_model
+from ml_models.asr import ASRModel, DECODING_METHODS
+from ml_models.registry import get_model_registry, ModelRegistryError
 from services.audio_processor import (
     get_audio_processor,
     AudioProcessingError
 )
+from services.cancellation import (
+    CancelToken,
+    OperationCancelled,
+    CLIENT_DISCONNECTED,
+    DEADLINE_EXCEEDED,
+    get_cancellation_stats
+)
+from services.checkpoints import ChunkCheckpoint, get_checkpoint_store
+from services.chunk_planner import ChunkPlan, get_chunk_planner
+from services.decode_batching import get_decode_batcher
+from services.language_id import RequestLanguage, get_language_identifier
+from services.memory_governor import (
+    MEMORY_POLL_SECONDS,
+    MemoryBudgetError,
+    MemoryReservation,
+    get_memory_governor
+)
+from services.preprocessing import get_audio_preprocessor
+from services.temp_storage import TempNamespace, TempSpaceError, get_temp_space_manager
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 @dataclass
 class TranscriptionResult:
@@ -28,35 +56,107 @@ class TranscriptionResult:
     duration: float
     chunks_processed: int
     processing_time_ms: int
+    model: str
+    # (start, end) seconds of audio whose chunks failed to decode
+    failed_spans: list[tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        """Check if parts of the audio are missing from the text."""
+        return bool(self.failed_spans)
 
 
 class TranscriptionError(Exception):
     """Exception raised for transcription errors."""
-    def __init__(self, message: str, code: str = "TRANSCRIPTION_FAILED"):
+    def __init__(
+        self,
+        message: str,
+        code: str = "TRANSCRIPTION_FAILED",
+        status_code: int = 500,
+        retry_after: Optional[int] = None
+    ):
         self.message = message
         self.code = code
+        self.status_code = status_code
+        self.retry_after = retry_after
         super().__init__(message)
 
 
+@dataclass
+class BatchItemResult:
+    """Outcome of one file in a batch transcription."""
+    index: int
+    name: str
+    result: Optional[TranscriptionResult] = None
+    error: Optional[TranscriptionError] = None
+
+    @classmethod
+    def failed(cls, index: int, name: str, error: TranscriptionError) -> "BatchItemResult":
+        return cls(index=index, name=name, error=error)
+
+
+@dataclass
+class _BatchFile:
+    """A batch file whose chunks are waiting to be decoded."""
+    duration: float
+    model_name: str
+    chunks: list[np.ndarray]
+    texts: list[str]
+    start_time: float
+    language: RequestLanguage
+    chunk_seconds: int
+    # Memory of the chunks, returned as they are decoded
+    reservation: Optional[MemoryReservation] = None
+    index: int = 0
+    name: str = ""
+    remaining: int = 0
+    queued: int = 0
+    failed_chunks: list[int] = field(default_factory=list)
+
+
+_EMPTY_CHUNK = np.zeros(0, dtype=np.float32)
+
+
 class TranscriptionService:
     """Service for transcribing audio files."""
 
     def __init__(self):
         self.settings = get_settings()
         self.audio_processor = get_audio_processor()
-        self.asr_model = get_asr_model()
+        self.preprocessor = get_audio_preprocessor()
+        self.model_registry = get_model_registry()
+        self.language_identifier = get_language_identifier()
+        self.chunk_planner = get_chunk_planner()
+        self.cancellation_stats = get_cancellation_stats()
+        self.checkpoint_store = get_checkpoint_store()
+        self.memory_governor = get_memory_governor()
+        self.decode_batcher = get_decode_batcher()
 
     def transcribe(
         self,
         audio_path: Path,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        decoding_method: Optional[str] = None,
+        hotwords: Optional[list[str]] = None,
+        temp_namespace: Optional[TempNamespace] = None,
+        cancel: Optional[CancelToken] = None,
+        content_hash: Optional[str] = None
     ) -> TranscriptionResult:
         """
-        Transcribe audio file with automatic chunking.
+        Transcribe audio file with adaptive chunking.
 
         Args:
             audio_path: Path to audio file
-            language: Optional language code (currently ignored, model auto-detects)
+            language: Optional language code (identified if not specified)
+            model: Optional model name (routed by duration if not specified)
+            decoding_method: Optional decoding method (beam search if hotwords are given)
+            hotwords: Optional phrases to bias recognition towards
+            temp_namespace: Temp namespace holding audio_path; its quota
+                reservation is grown to cover the converted file
+            cancel: Token checked between steps and chunk batches
+            content_hash: Hex digest of the upload; enables chunk checkpoints
+                for long audio, so a retried job skips decoded chunks
 
         Returns:
             TranscriptionResult with text and metadata
@@ -64,117 +164,694 @@ class TranscriptionService:
         start_time = time.time()
         temp_files: list[Path] = []
         converted_path: Optional[Path] = None
-        chunks: list[Path] = []
+        request_language = self.language_identifier.request(language)
+        cancel = cancel or CancelToken()
+        duration = 0.0
+        reservation: Optional[MemoryReservation] = None
 
         try:
-            # Get audio duration
-            duration = self.audio_processor.get_audio_duration(audio_path)
-            logger.info(f"Audio duration: {duration:.1f} seconds")
-
-            # Validate duration
-            if duration > self.settings.max_audio_duration_seconds:
-                raise TranscriptionError(
-                    f"Audio too long. Maximum duration is {self.settings.max_audio_duration_seconds // 60} minutes.",
-                    code="AUDIO_TOO_LONG"
+            decoding_method = self.resolve_decoding_method(decoding_method, hotwords)
+            sample_rate = self.settings.sample_rate
+
+            # Get and validate audio duration
+            duration = self._probe_duration(audio_path)
+
+            plan = self.chunk_planner.plan(duration)
+            needs_chunking = duration > plan.chunk_seconds
+            checkpointed = bool(content_hash) and needs_chunking and duration >= self.settings.checkpoint_min_seconds
+            if checkpointed:
+                # A resumed job keeps its checkpoint's chunk length, so admit for that
+                model_name = self.model_registry.resolve(model, duration, request_language.known)
+                resume_seconds = self.checkpoint_store.chunk_seconds(
+                    content_hash, self.model_registry.fingerprint(model_name), decoding_method, hotwords
                 )
-
-            if duration < 0.1:
-                raise TranscriptionError(
-                    "Audio file appears to be empty or too short.",
-                    code="AUDIO_TOO_SHORT"
+                if resume_seconds is not None:
+                    plan = replace(plan, chunk_seconds=resume_seconds)
+            if temp_namespace is not None:
+                temp_namespace.reserve(
+                    get_temp_space_manager().estimate_request_bytes(duration)
                 )
 
-            # Convert to WAV format
-            converted_path = self.audio_processor.convert_to_wav(audio_path)
-            temp_files.append(converted_path)
-
-            # Determine if chunking is needed
-            needs_chunking = duration > self.settings.chunk_size_seconds
-
-            if needs_chunking:
-                # Split into chunks
-                chunks = self.audio_processor.split_audio(
-                    converted_path,
-                    self.settings.chunk_size_seconds
-                )
-                temp_files.extend(chunks)
-
-                # Transcribe each chunk
-                texts = []
-                for i, chunk_path in enumerate(chunks):
-                    logger.info(f"Transcribing chunk {i+1}/{len(chunks)}")
-                    text = self.asr_model.transcribe(chunk_path)
-                    if text:
-                        texts.append(text)
-
-                full_text = " ".join(texts)
-                chunks_processed = len(chunks)
+            # Admit against the memory budget, on a cheaper plan if memory is tight
+            reservation = self.memory_governor.admit(
+                self.memory_governor.options(
+                    duration, self.audio_processor.source_format(audio_path), plan, needs_chunking
+                ),
+                cancel
+            )
+            memory_plan = reservation.memory_plan
+            plan, needs_chunking = memory_plan.plan, memory_plan.chunked
 
-            else:
-                # Transcribe directly
-                full_text = self.asr_model.transcribe(converted_path)
-                chunks_processed = 1
+            # Convert to WAV format
+            converted_path = self.audio_processor.convert_to_wav(audio_path, streaming=memory_plan.streaming)
+            if converted_path != audio_path:
+                temp_files.append(converted_path)
+            cancel.check()
+
+            # Identify the language before decoding when audio mode is on
+            samples = None
+            if not needs_chunking:
+                samples = self._load_for_inference(converted_path)
+                request_language.observe_audio(samples, sample_rate)
+            elif request_language.wants_audio:
+                # Load extra audio so leading silence can be trimmed off
+                head = self._load_for_inference(converted_path, self.settings.language_id_audio_seconds * 2)
+                request_language.observe_audio(head, sample_rate)
+            cancel.check()
+
+            failed_spans: list[tuple[float, float]] = []
+            with self.model_registry.acquire(model, duration, request_language.known) as asr_model:
+                if needs_chunking:
+                    checkpoint = None
+                    if checkpointed:
+                        checkpoint = self.checkpoint_store.open(
+                            content_hash, asr_model.fingerprint, decoding_method, hotwords, plan.chunk_seconds
+                        )
+                    if checkpoint is not None and checkpoint.chunk_seconds > plan.chunk_seconds:
+                        # Admitted on a cheaper plan (or routed to another model after
+                        # language ID): longer chunks would overrun the reservation
+                        logger.info(
+                            f"Not resuming {checkpoint.chunk_seconds}s-chunk checkpoint, "
+                            f"admitted for {plan.chunk_seconds}s chunks"
+                        )
+                        checkpoint = None
+                    if checkpoint is not None:
+                        plan = replace(plan, chunk_seconds=checkpoint.chunk_seconds)
+                    full_text, chunks_processed, failed_spans = self._decode_chunks(
+                        asr_model, converted_path, duration, plan, decoding_method, hotwords, cancel, checkpoint
+                    )
+                    # A partial result keeps its checkpoint so a retry only decodes the failed chunks
+                    if checkpoint is not None and not failed_spans:
+                        checkpoint.discard()
+
+                else:
+                    # Transcribe directly, sharing the call with concurrent short requests
+                    full_text = ""
+                    if samples.size:
+                        full_text = self.decode_batcher.transcribe(
+                            asr_model, samples, decoding_method, hotwords,
+                            lambda batch: self._decode_isolated(asr_model, batch, decoding_method, hotwords),
+                            cancel
+                        )
+                    chunks_processed = 1
+
+                model_name = asr_model.name
 
             # Calculate processing time
             processing_time_ms = int((time.time() - start_time) * 1000)
 
-            # Detect language (simplified - could be enhanced)
-            detected_language = self._detect_language(full_text) if not language else language
+            detected_language = request_language.resolve(full_text)
 
             logger.info(
                 f"Transcription complete: {len(full_text)} chars, "
-                f"{chunks_processed} chunks, {processing_time_ms}ms"
+                f"{chunks_processed} chunks, {processing_time_ms}ms, model {model_name}, "
+                f"language {detected_language.language} ({detected_language.source})"
             )
 
             return TranscriptionResult(
                 text=full_text.strip(),
-                language=detected_language,
+                language=detected_language.language,
                 duration=duration,
                 chunks_processed=chunks_processed,
-                processing_time_ms=processing_time_ms
+                processing_time_ms=processing_time_ms,
+                model=model_name,
+                failed_spans=failed_spans
             )
 
-        except TranscriptionError:
-            raise
-        except AudioProcessingError as e:
-            raise TranscriptionError(str(e), code="AUDIO_PROCESSING_ERROR")
+        except OperationCancelled as e:
+            self.cancellation_stats.record_abort(duration - e.decoded_seconds)
+            raise self._to_transcription_error(e)
         except Exception as e:
-            logger.exception("Unexpected transcription error")
-            raise TranscriptionError(
-                f"Failed to transcribe audio: {str(e)}",
-                code="TRANSCRIPTION_FAILED"
-            )
+            raise self._to_transcription_error(e)
         finally:
+            if reservation is not None:
+                reservation.release()
             # Cleanup temporary files
             self.audio_processor.cleanup_files(temp_files)
 
-    def _detect_language(self, text: str) -> str:
+    def _decode_chunks(
+        self,
+        asr_model: ASRModel,
+        wav_path: Path,
+        duration: float,
+        plan: ChunkPlan,
+        decoding_method: str,
+        hotwords: Optional[list[str]],
+        cancel: CancelToken,
+        checkpoint: Optional[ChunkCheckpoint] = None
+    ) -> tuple[str, int, list[tuple[float, float]]]:
+        """
+        Decode a long file chunk by chunk.
+
+        Chunks are streamed from the converted file and decoded in batches.
+        With a parallel plan, batches are sized to spread the file over
+        plan.parallelism decode slots and run concurrently while the next
+        chunks are preprocessed; only the batches in flight are in memory.
+        cancel is checked before every chunk and decode call.
+
+        A chunk that keeps failing to decode is left out of the text and
+        reported as a failed span instead of failing the file. Chunks in
+        checkpoint are not decoded again; newly decoded ones are added to it.
+
+        Returns:
+            (full text, number of chunks, failed (start, end) spans)
+
+        Raises:
+            TranscriptionError: If every decoded chunk failed
+        """
+        sample_rate = self.settings.sample_rate
+        num_chunks = math.ceil(duration / plan.chunk_seconds)
+        batch_size = min(
+            plan.batch_size or self.settings.decode_batch_size,
+            math.ceil(num_chunks / plan.parallelism)
+        )
+        done = checkpoint.done if checkpoint is not None else {}
+        texts: dict[int, str] = dict(done)
+        failed: list[int] = []
+        chunks_processed = 0
+        decoded_samples = 0
+
+        logger.info(
+            f"Decoding ~{num_chunks} chunks of {plan.chunk_seconds}s, "
+            f"{plan.parallelism} in parallel, batches of {batch_size}"
+        )
+
+        def batches() -> Iterator[list[tuple[int, np.ndarray]]]:
+            nonlocal chunks_processed
+            batch = []
+            for index, samples in enumerate(self._preprocessed_chunks(wav_path, plan.chunk_seconds)):
+                cancel.check()
+                chunks_processed += 1
+                if index in done:
+                    continue
+                if samples.size:
+                    batch.append((index, samples))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        def decode(batch: list[tuple[int, np.ndarray]]) -> list[tuple[int, Optional[str]]]:
+            nonlocal decoded_samples
+            batch_samples = sum(samples.size for _, samples in batch)
+            with self.chunk_planner.decode_slot(batch_samples / sample_rate, cancel):
+                batch_texts = self._decode_isolated(
+                    asr_model, [samples for _, samples in batch], decoding_method, hotwords
+                )
+            decoded_samples += batch_samples
+            results = [(index, text) for (index, _), text in zip(batch, batch_texts)]
+            if checkpoint is not None:
+                checkpoint.record([(index, text) for index, text in results if text is not None])
+            return results
+
+        def collect(results: list[tuple[int, Optional[str]]]) -> None:
+            for index, text in results:
+                if text is None:
+                    failed.append(index)
+                else:
+                    texts[index] = text
+
+        try:
+            if plan.parallelism == 1:
+                for batch in batches():
+                    collect(decode(batch))
+            else:
+                with ThreadPoolExecutor(max_workers=plan.parallelism, thread_name_prefix="chunk-decode") as pool:
+                    in_flight: deque[Future] = deque()
+                    for batch in batches():
+                        if len(in_flight) >= plan.parallelism:
+                            collect(in_flight.popleft().result())
+                        in_flight.append(pool.submit(decode, batch))
+                    while in_flight:
+                        collect(in_flight.popleft().result())
+        except OperationCancelled as e:
+            e.decoded_seconds = decoded_samples / sample_rate
+            raise
+
+        if done:
+            logger.info(f"Reused {len(done)} of {chunks_processed} chunks from checkpoint")
+        if failed:
+            if not texts:
+                raise TranscriptionError("Failed to transcribe audio: no chunk could be decoded")
+            logger.warning(f"{len(failed)} of {chunks_processed} chunks failed, returning a partial transcript")
+
+        full_text = " ".join(texts[index] for index in sorted(texts) if texts[index])
+        return full_text, chunks_processed, _failed_spans(failed, plan.chunk_seconds, duration)
+
+    def _decode_isolated(
+        self,
+        asr_model: ASRModel,
+        batch: list[np.ndarray],
+        decoding_method: str,
+        hotwords: Optional[list[str]]
+    ) -> list[Optional[str]]:
+        """
+        Decode a batch so that a failing chunk doesn't take the others with it.
+
+        If the batch call fails, its chunks are decoded one by one, each with
+        CHUNK_RETRIES retries.
+
+        Returns:
+            Text per chunk, None for chunks that failed
+        """
+        sample_rate = self.settings.sample_rate
+        if len(batch) > 1:
+            try:
+                return asr_model.transcribe_batch(batch, sample_rate, decoding_method, hotwords)
+            except Exception as e:
+                logger.warning(f"Decoding a batch of {len(batch)} chunks failed, decoding them one by one: {e}")
+
+        texts: list[Optional[str]] = []
+        for samples in batch:
+            try:
+                texts.append(self._with_retries(
+                    lambda: asr_model.transcribe_samples(samples, sample_rate, decoding_method, hotwords)
+                ))
+            except Exception as e:
+                logger.error(f"Chunk failed after {self.settings.chunk_retries + 1} attempts: {e}")
+                texts.append(None)
+        return texts
+
+    def _with_retries(self, decode: Callable[[], T]) -> T:
+        """Run a decode call, retrying it up to CHUNK_RETRIES times."""
+        for attempt in range(self.settings.chunk_retries):
+            try:
+                return decode()
+            except Exception as e:
+                logger.warning(f"Decode failed, retrying ({attempt + 1}/{self.settings.chunk_retries}): {e}")
+        return decode()
+
+    def transcribe_many(
+        self,
+        items: list[tuple[str, Path]],
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        decoding_method: Optional[str] = None,
+        hotwords: Optional[list[str]] = None,
+        temp_namespace: Optional[TempNamespace] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> Iterator[BatchItemResult]:
+        """
+        Transcribe many files, yielding each result as soon as it is ready.
+
+        Files are decoded and resampled concurrently (BATCH_DECODE_WORKERS),
+        and chunks from different files are decoded together in batches of
+        DECODE_BATCH_SIZE streams per model. A failing file doesn't affect
+        the others.
+
+        Args:
+            items: (name, path) pairs; name is only used for reporting
+            language: Optional language code (auto-detect if not specified)
+            model: Optional model name (routed by duration per file if not specified)
+            decoding_method: Optional decoding method (beam search if hotwords are given)
+            hotwords: Optional phrases to bias recognition towards
+            temp_namespace: Temp namespace for converted files (defaults to
+                the directory of each input file)
+            cancel: Token checked between files and decode batches
+
+        Yields:
+            BatchItemResult per file, in completion order
+
+        Raises:
+            TranscriptionError: If cancel fires (results yielded so far stand)
+        """
+        decoding_method = self.resolve_decoding_method(decoding_method, hotwords)
+        cancel = cancel or CancelToken()
+        workers = self.settings.batch_decode_workers
+        pending: dict[str, list[tuple[int, int, np.ndarray]]] = defaultdict(list)
+        files: dict[int, _BatchFile] = {}
+        queue = iter(enumerate(items))
+        running: dict[Future, tuple[int, str]] = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-decode") as pool:
+                def submit_next() -> None:
+                    nxt = next(queue, None) if not cancel.cancelled else None
+                    if nxt is not None:
+                        index, (name, path) = nxt
+                        future = pool.submit(self._prepare_file, path, model, language, temp_namespace, cancel)
+                        running[future] = (index, name)
+
+                try:
+                    # Keep a bounded window of decoded files waiting for the recognizer
+                    for _ in range(workers * 2):
+                        submit_next()
+
+                    while running:
+                        done, _ = wait(running, timeout=MEMORY_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                        cancel.check()
+                        if not done:
+                            # Files waiting for memory may need what the pending chunks hold
+                            if self.memory_governor.waiting:
+                                yield from self._decode_pending(
+                                    pending, files, decoding_method, hotwords, cancel, flush=True
+                                )
+                            continue
+                        for future in done:
+                            index, name = running.pop(future)
+                            submit_next()
+
+                            try:
+                                batch_file = future.result()
+                            except OperationCancelled:
+                                raise
+                            except Exception as e:
+                                yield BatchItemResult.failed(index, name, self._to_transcription_error(e))
+                                continue
+
+                            batch_file.index = index
+                            batch_file.name = name
+                            files[index] = batch_file
+                            for chunk_index, samples in enumerate(batch_file.chunks):
+                                if samples.size:
+                                    pending[batch_file.model_name].append((index, chunk_index, samples))
+                                    batch_file.remaining += 1
+                            batch_file.queued = batch_file.remaining
+
+                            if batch_file.remaining == 0:
+                                yield self._finish_batch_file(files.pop(index))
+
+                        yield from self._decode_pending(
+                            pending, files, decoding_method, hotwords, cancel, flush=not running
+                        )
+                finally:
+                    # Return held memory before the pool waits for its workers, which may be waiting for it
+                    for future in running:
+                        future.cancel()
+                    for batch_file in files.values():
+                        batch_file.reservation.release()
+        except OperationCancelled as e:
+            undecoded = sum(samples.size for segments in pending.values() for _, _, samples in segments)
+            self.cancellation_stats.record_abort(undecoded / self.settings.sample_rate)
+            raise self._to_transcription_error(e)
+        finally:
+            # Files the pool finished after the batch stopped
+            for future in running:
+                if not future.cancelled() and future.exception() is None:
+                    future.result().reservation.release()
+
+    def _prepare_file(
+        self,
+        audio_path: Path,
+        model: Optional[str],
+        language: Optional[str],
+        temp_namespace: Optional[TempNamespace],
+        cancel: CancelToken
+    ) -> "_BatchFile":
+        """Probe, convert, load and chunk one file of a batch (runs in a worker thread)."""
+        cancel.check()
+        start_time = time.time()
+        duration = self._probe_duration(audio_path)
+
+        reserved = 0
+        if temp_namespace is not None:
+            reserved = get_temp_space_manager().estimate_request_bytes(duration)
+            temp_namespace.reserve(reserved)
+
+        # The reservation covers conversion and then the file's chunks until they are decoded
+        reservation = self.memory_governor.admit(
+            self.memory_governor.options(
+                duration, self.audio_processor.source_format(audio_path), held_seconds=duration
+            ),
+            cancel
+        )
+        try:
+            converted_path = self.audio_processor.convert_to_wav(
+                audio_path,
+                temp_namespace.path if temp_namespace is not None else None,
+                streaming=reservation.memory_plan.streaming
+            )
+            try:
+                # Converted files are 16-bit, so these chunks are copies and the
+                # file can be deleted; unconverted float32 inputs are mapped views
+                chunk_seconds = self.chunk_planner.throughput_chunk_seconds
+                chunks = list(self._preprocessed_chunks(converted_path, chunk_seconds))
+            finally:
+                if converted_path != audio_path:
+                    self.audio_processor.cleanup_file(converted_path)
+                if temp_namespace is not None:
+                    temp_namespace.release(reserved)
+        except BaseException:
+            reservation.release()
+            raise
+
+        request_language = self.language_identifier.request(language)
+        if chunks:
+            request_language.observe_audio(chunks[0], self.settings.sample_rate)
+
+        return _BatchFile(
+            duration=duration,
+            model_name=self.model_registry.resolve(model, duration, request_language.known),
+            chunks=chunks,
+            texts=[""] * len(chunks),
+            start_time=start_time,
+            language=request_language,
+            chunk_seconds=chunk_seconds,
+            reservation=reservation
+        )
+
+    def _decode_pending(
+        self,
+        pending: dict[str, list[tuple[int, int, np.ndarray]]],
+        files: dict[int, "_BatchFile"],
+        decoding_method: str,
+        hotwords: Optional[list[str]],
+        cancel: CancelToken,
+        flush: bool
+    ) -> Iterator[BatchItemResult]:
+        """Decode full batches of pending chunks (all of them if flush) and yield finished files."""
+        batch_size = self.settings.decode_batch_size
+
+        for model_name, segments in pending.items():
+            while len(segments) >= batch_size or (flush and segments):
+                cancel.check()
+                batch = segments[:batch_size]
+                del segments[:batch_size]
+
+                try:
+                    audio_seconds = sum(samples.size for _, _, samples in batch) / self.settings.sample_rate
+                    with self.model_registry.acquire(model_name) as asr_model, \
+                            self.chunk_planner.decode_slot(audio_seconds, cancel):
+                        texts = self._decode_isolated(
+                            asr_model,
+                            [samples for _, _, samples in batch],
+                            decoding_method,
+                            hotwords
+                        )
+                except OperationCancelled:
+                    segments[:0] = batch
+                    raise
+                except Exception as e:
+                    error = self._to_transcription_error(e)
+                    for index in dict.fromkeys(index for index, _, _ in batch):
+                        batch_file = files.pop(index, None)
+                        if batch_file is not None:
+                            for other in pending.values():
+                                other[:] = [segment for segment in other if segment[0] != index]
+                            batch_file.reservation.release()
+                            yield BatchItemResult.failed(index, batch_file.name, error)
+                    continue
+
+                for (index, chunk_index, samples), text in zip(batch, texts):
+                    batch_file = files.get(index)
+                    if batch_file is None:
+                        continue
+                    if text is None:
+                        batch_file.failed_chunks.append(chunk_index)
+                    else:
+                        batch_file.texts[chunk_index] = text
+                    batch_file.chunks[chunk_index] = _EMPTY_CHUNK
+                    batch_file.reservation.release(samples.nbytes)
+                    batch_file.remaining -= 1
+                    if batch_file.remaining == 0:
+                        yield self._finish_batch_file(files.pop(index))
+
+    def _finish_batch_file(self, batch_file: "_BatchFile") -> BatchItemResult:
+        """Build the result for a batch file whose chunks are all decoded."""
+        batch_file.reservation.release()
+        if batch_file.failed_chunks and len(batch_file.failed_chunks) == batch_file.queued:
+            return BatchItemResult.failed(
+                batch_file.index,
+                batch_file.name,
+                TranscriptionError("Failed to transcribe audio: no chunk could be decoded")
+            )
+        full_text = " ".join(text for text in batch_file.texts if text).strip()
+        return BatchItemResult(
+            index=batch_file.index,
+            name=batch_file.name,
+            result=TranscriptionResult(
+                text=full_text,
+                language=batch_file.language.resolve(full_text).language,
+                duration=batch_file.duration,
+                chunks_processed=len(batch_file.texts),
+                processing_time_ms=int((time.time() - batch_file.start_time) * 1000),
+                model=batch_file.model_name,
+                failed_spans=_failed_spans(batch_file.failed_chunks, batch_file.chunk_seconds, batch_file.duration)
+            )
+        )
+
+    def _probe_duration(self, audio_path: Path) -> float:
+        """Get audio duration and check it is within limits."""
+        duration = self.audio_processor.get_audio_duration(audio_path)
+        logger.info(f"Audio duration: {duration:.1f} seconds")
+
+        if duration > self.settings.max_audio_duration_seconds:
+            raise TranscriptionError(
+                f"Audio too long. Maximum duration is {self.settings.max_audio_duration_seconds // 60} minutes.",
+                code="AUDIO_TOO_LONG"
+            )
+
+        if duration < 0.1:
+            raise TranscriptionError(
+                "Audio file appears to be empty or too short.",
+                code="AUDIO_TOO_SHORT"
+            )
+
+        return duration
+
+    def _to_transcription_error(self, error: Exception) -> TranscriptionError:
+        """Map an exception from the pipeline to a TranscriptionError."""
+        if isinstance(error, TranscriptionError):
+            return error
+        if isinstance(error, TempSpaceError):
+            return TranscriptionError(
+                str(error),
+                code="TEMP_SPACE_EXHAUSTED",
+                status_code=503 if error.retry_after else 507,
+                retry_after=error.retry_after
+            )
+        if isinstance(error, MemoryBudgetError):
+            return TranscriptionError(
+                str(error),
+                code="MEMORY_EXHAUSTED",
+                status_code=503 if error.retry_after else 507,
+                retry_after=error.retry_after
+            )
+        if isinstance(error, ModelRegistryError):
+            return TranscriptionError(str(error), code=error.code, status_code=400)
+        if isinstance(error, AudioProcessingError):
+            return TranscriptionError(str(error), code="AUDIO_PROCESSING_ERROR")
+        if isinstance(error, OperationCancelled):
+            return cancelled_error(error.reason)
+
+        logger.error("Unexpected transcription error", exc_info=error)
+        return TranscriptionError(
+            f"Failed to transcribe audio: {str(error)}",
+            code="TRANSCRIPTION_FAILED"
+        )
+
+    def _preprocessed_chunks(self, wav_path: Path, chunk_seconds: int) -> Iterator[np.ndarray]:
         """
-        Simple language detection based on character analysis.
+        Stream the chunks of a converted file, preprocessed as one piece.
+
+        The file is read twice: once to measure its DC offset, edge silence
+        and normalization gain, then chunk by chunk with those levels.
+        """
+        levels = self.preprocessor.measure(
+            self.audio_processor.iter_chunks(wav_path, chunk_seconds), self.settings.sample_rate
+        )
+        offset = 0
+        for chunk in self.audio_processor.iter_chunks(wav_path, chunk_seconds):
+            yield self.preprocessor.process_chunk(chunk, offset, levels)
+            offset += chunk.size
+
+    def _load_for_inference(self, wav_path: Path, max_seconds: Optional[float] = None) -> np.ndarray:
+        """Load a converted WAV file (or its start) and preprocess it for the ASR model."""
+        samples = self.audio_processor.load_samples(wav_path, max_seconds)
+        return self.preprocessor.process(samples, self.settings.sample_rate)
+
+    def resolve_decoding_method(
+        self,
+        decoding_method: Optional[str],
+        hotwords: Optional[list[str]]
+    ) -> str:
+        """
+        Pick and validate the decoding method for a request.
 
         Args:
-            text: Transcribed text
+            decoding_method: Requested decoding method
+            hotwords: Requested hotword phrases
 
         Returns:
-            ISO 639-1 language code
+            Decoding method name
         """
-        if not text:
-            return "en"
+        if not decoding_method:
+            decoding_method = "modified_beam_search" if hotwords else self.settings.decoding_method
+
+        if decoding_method not in DECODING_METHODS:
+            raise TranscriptionError(
+                f"Unsupported decoding method. Supported: {', '.join(DECODING_METHODS)}",
+                code="INVALID_DECODING_METHOD",
+                status_code=400
+            )
+
+        if hotwords:
+            if decoding_method != "modified_beam_search":
+                raise TranscriptionError(
+                    "Hotwords require modified_beam_search decoding.",
+                    code="INVALID_DECODING_METHOD",
+                    status_code=400
+                )
+            if not self.settings.bpe_vocab_path:
+                raise TranscriptionError(
+                    "Hotwords are not enabled on this service (BPE_VOCAB_PATH is not set).",
+                    code="INVALID_HOTWORDS",
+                    status_code=400
+                )
+            if len(hotwords) > self.settings.max_hotwords:
+                raise TranscriptionError(
+                    f"Too many hotwords. Maximum is {self.settings.max_hotwords}.",
+                    code="INVALID_HOTWORDS",
+                    status_code=400
+                )
+
+        return decoding_method
+
+
+def _failed_spans(chunk_indices: list[int], chunk_seconds: int, duration: float) -> list[tuple[float, float]]:
+    """Merge failed chunk indices into (start, end) spans in seconds."""
+    spans: list[tuple[float, float]] = []
+    for index in sorted(chunk_indices):
+        start = float(index * chunk_seconds)
+        end = min(start + chunk_seconds, duration)
+        if spans and spans[-1][1] == start:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def cancelled_error(reason: str) -> TranscriptionError:
+    """
+    Build the error reported for cancelled work.
+
+    Args:
+        reason: Cancellation reason (see services.cancellation)
 
-        # Count Cyrillic characters
-        cyrillic_count = sum(1 for c in text if "\u0400" <= c <= "\u04ff")
-        total_alpha = sum(1 for c in text if c.isalpha())
+    Returns:
+        TranscriptionError (504 past the deadline, 499 otherwise)
+    """
+    if reason == DEADLINE_EXCEEDED:
+        return TranscriptionError("Request deadline exceeded.", code="DEADLINE_EXCEEDED", status_code=504)
+    if reason == CLIENT_DISCONNECTED:
+        return TranscriptionError("Client disconnected.", code="CLIENT_DISCONNECTED", status_code=499)
+    return TranscriptionError("Transcription cancelled.", code="CANCELLED", status_code=499)
 
-        if total_alpha == 0:
-            return "en"
 
-        cyrillic_ratio = cyrillic_count / total_alpha
+def parse_hotwords(value: Optional[str]) -> list[str]:
+    """
+    Parse a hotwords form field.
 
-        # Simple heuristic: >30% Cyrillic = Russian
-        if cyrillic_ratio > 0.3:
-            return "ru"
+    Args:
+        value: Comma or newline separated phrases
 
-        return "en"
+    Returns:
+        List of non-empty phrases
+    """
+    if not value:
+        return []
+    return [phrase.strip() for phrase in re.split(r"[,\n]", value) if phrase.strip()]
 
 
 # Module-level instance
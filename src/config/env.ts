@@ -105,6 +105,17 @@ export const config = {
 
   // ML Service URL for voice transcription
   mlServiceUrl: process.env.ML_SERVICE_URL || null,
+  mlService: {
+    maxConcurrency: getEnvAsNumber('ML_SERVICE_MAX_CONCURRENCY', 4),
+    timeoutMs: getEnvAsNumber('ML_SERVICE_TIMEOUT_MS', 120000),
+    maxRetries: getEnvAsNumber('ML_SERVICE_MAX_RETRIES', 3),
+    retryBudgetRatio: getEnvAsNumber('ML_SERVICE_RETRY_BUDGET_RATIO', 0.2),
+    retryMaxDelayMs: getEnvAsNumber('ML_SERVICE_RETRY_MAX_DELAY_MS', 30000),
+    // multipart (POST /transcribe) or raw (Opus bytes to POST /transcribe/raw)
+    transport: (getEnvOrDefault('ML_SERVICE_TRANSPORT', 'multipart') === 'raw' ? 'raw' : 'multipart') as
+      | 'multipart'
+      | 'raw',
+  },
 
   // GitHub Integration
   github: {
@@ -115,11 +115,15 @@ async function main(): Promise<void> {
 
   // Initialize ML Service client (optional) - for voice transcription
   const mlServiceClient = config.mlServiceUrl
-    ? new MLServiceClient(config.mlServiceUrl)
+    ? new MLServiceClient(config.mlServiceUrl, config.mlService)
     : null;
 
   if (mlServiceClient) {
-    log('info', 'ML Service client initialized', { url: config.mlServiceUrl });
+    log('info', 'ML Service client initialized', {
+      url: config.mlServiceUrl,
+      transport: config.mlService.transport,
+      maxConcurrency: config.mlService.maxConcurrency,
+    });
     const isHealthy = await mlServiceClient.healthCheck();
     if (isHealthy) {
       log('info', 'ML Service is healthy');
@@ -33,59 +33,197 @@ interface HealthResponse {
   };
 }
 
+/**
+ * multipart: POST /transcribe with a form upload.
+ * raw: POST /transcribe/raw with the audio bytes as the body and metadata in headers.
+ */
+export type MLServiceTransport = 'multipart' | 'raw';
+
+export interface MLServiceClientOptions {
+  /** Requests in flight to the service at once; the rest wait in the client */
+  maxConcurrency: number;
+  /** Per-attempt timeout */
+  timeoutMs: number;
+  /** Retries per request (on top of the first attempt) */
+  maxRetries: number;
+  /** Retries allowed as a share of requests, so a struggling service isn't flooded */
+  retryBudgetRatio: number;
+  /** Base of the exponential backoff */
+  retryBaseDelayMs: number;
+  /**
+   * Longest wait before a retry; a longer Retry-After fails the request instead.
+   * Keep it at or above the service's MEMORY_ADMISSION_TIMEOUT_SECONDS, which is
+   * the Retry-After of its memory 503s.
+   */
+  retryMaxDelayMs: number;
+  transport: MLServiceTransport;
+}
+
+const DEFAULT_OPTIONS: MLServiceClientOptions = {
+  maxConcurrency: 4,
+  timeoutMs: 120_000,
+  maxRetries: 3,
+  retryBudgetRatio: 0.2,
+  retryBaseDelayMs: 500,
+  retryMaxDelayMs: 30_000,
+  transport: 'multipart',
+};
+
+// Retries available before any request has deposited into the budget
+const RETRY_BUDGET_RESERVE = 10;
+
+// Overload and gateway errors; a 504 means the service already spent the whole timeout on the file
+const RETRYABLE_STATUSES = new Set([429, 502, 503]);
+
+const RAW_AUDIO_FORMATS: Record<string, string> = {
+  ogg: 'ogg',
+  oga: 'ogg',
+  opus: 'opus',
+};
+
+class MLServiceError extends Error {
+  constructor(
+    message: string,
+    public readonly status: number | null,
+    public readonly retryAfterMs: number | null = null,
+    public readonly timedOut = false
+  ) {
+    super(message);
+    this.name = 'MLServiceError';
+  }
+
+  /** Connection errors and overload responses; a timed out attempt would only time out again */
+  get retryable(): boolean {
+    if (this.status === null) return !this.timedOut;
+    return RETRYABLE_STATUSES.has(this.status);
+  }
+}
+
+class Semaphore {
+  private waiters: (() => void)[] = [];
+
+  constructor(private available: number) {}
+
+  async acquire(): Promise<void> {
+    if (this.available > 0) {
+      this.available--;
+      return;
+    }
+    await new Promise<void>((resolve) => this.waiters.push(resolve));
+  }
+
+  release(): void {
+    const next = this.waiters.shift();
+    if (next) {
+      next();
+    } else {
+      this.available++;
+    }
+  }
+
+  get queued(): number {
+    return this.waiters.length;
+  }
+}
+
+/**
+ * Token bucket shared by all requests: every request deposits
+ * retryBudgetRatio tokens, every retry spends one.
+ */
+class RetryBudget {
+  private tokens = RETRY_BUDGET_RESERVE;
+
+  constructor(private ratio: number) {}
+
+  deposit(): void {
+    this.tokens = Math.min(RETRY_BUDGET_RESERVE, this.tokens + this.ratio);
+  }
+
+  tryWithdraw(): boolean {
+    if (this.tokens < 1) return false;
+    this.tokens--;
+    return true;
+  }
+}
+
+function parseRetryAfter(value: string | null): number | null {
+  if (!value) return null;
+  const seconds = Number(value);
+  if (!isNaN(seconds)) return Math.max(0, seconds * 1000);
+  const date = Date.parse(value);
+  return isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+function sleep(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
 export class MLServiceClient {
-  constructor(private baseUrl: string) {}
+  private options: MLServiceClientOptions;
+  private slots: Semaphore;
+  private retryBudget: RetryBudget;
+  private rawUnsupported = false;
 
-  async transcribe(audioBuffer: Buffer, filename: string): Promise<TranscriptionResult> {
-    const formData = new FormData();
-    const blob = new Blob([new Uint8Array(audioBuffer)], { type: 'audio/ogg' });
-    formData.append('audio', blob, filename);
+  constructor(
+    private baseUrl: string,
+    options: Partial<MLServiceClientOptions> = {}
+  ) {
+    this.options = { ...DEFAULT_OPTIONS, ...options };
+    this.slots = new Semaphore(Math.max(1, this.options.maxConcurrency));
+    this.retryBudget = new RetryBudget(this.options.retryBudgetRatio);
+  }
 
+  async transcribe(audioBuffer: Buffer, filename: string): Promise<TranscriptionResult> {
     log('info', 'Sending audio for transcription', {
       filename,
       size: audioBuffer.length,
       baseUrl: this.baseUrl,
+      queued: this.slots.queued,
     });
 
-    const response = await fetch(`${this.baseUrl}/transcribe`, {
-      method: 'POST',
-      body: formData,
-    });
+    this.retryBudget.deposit();
 
-    if (!response.ok) {
-      let errorMessage = 'Transcription failed';
+    for (let attempt = 0; ; attempt++) {
       try {
-        const errorData = (await response.json()) as ErrorResponse;
-        errorMessage = errorData.error?.message || errorMessage;
-        log('error', 'Transcription failed', {
-          code: errorData.error?.code,
-          message: errorData.error?.message,
-          details: errorData.error?.details,
-        });
-      } catch {
-        log('error', 'Transcription failed with non-JSON response', {
-          status: response.status,
-          statusText: response.statusText,
+        const result = await this.withSlot(() => this.send(audioBuffer, filename));
+
+        log('info', 'Transcription completed', {
+          textLength: result.text.length,
+          language: result.language,
+          duration: result.duration,
+          processingTime: result.processing_time_ms,
+          attempts: attempt + 1,
         });
-      }
-      throw new Error(errorMessage);
-    }
 
-    const result = (await response.json()) as TranscriptionResponse;
+        return result;
+      } catch (error) {
+        if (!(error instanceof MLServiceError) || !error.retryable || attempt >= this.options.maxRetries) {
+          throw error;
+        }
 
-    log('info', 'Transcription completed', {
-      textLength: result.data.text.length,
-      language: result.data.language,
-      duration: result.data.duration,
-      processingTime: result.data.processing_time_ms,
-    });
+        const delayMs = error.retryAfterMs ?? this.backoff(attempt);
+        if (delayMs > this.options.retryMaxDelayMs) {
+          throw error;
+        }
+        if (!this.retryBudget.tryWithdraw()) {
+          log('warn', 'Transcription retry budget exhausted', { error: error.message });
+          throw error;
+        }
 
-    return result.data;
+        log('warn', 'Transcription attempt failed, retrying', {
+          attempt: attempt + 1,
+          status: error.status,
+          error: error.message,
+          delayMs: Math.round(delayMs),
+        });
+        await sleep(delayMs);
+      }
+    }
   }
 
   async healthCheck(): Promise<boolean> {
     try {
-      const response = await fetch(`${this.baseUrl}/health`);
+      const response = await fetch(`${this.baseUrl}/health`, { keepalive: true });
       if (!response.ok) {
         return false;
       }
@@ -99,4 +237,94 @@ export class MLServiceClient {
       return false;
     }
   }
+
+  private async withSlot<T>(fn: () => Promise<T>): Promise<T> {
+    await this.slots.acquire();
+    try {
+      return await fn();
+    } finally {
+      this.slots.release();
+    }
+  }
+
+  /** Full-jitter exponential backoff */
+  private backoff(attempt: number): number {
+    const cap = Math.min(this.options.retryMaxDelayMs, this.options.retryBaseDelayMs * 2 ** attempt);
+    return Math.random() * cap;
+  }
+
+  private async send(audioBuffer: Buffer, filename: string): Promise<TranscriptionResult> {
+    const extension = filename.split('.').pop()?.toLowerCase() ?? '';
+    const rawFormat = RAW_AUDIO_FORMATS[extension];
+
+    if (this.options.transport === 'raw' && rawFormat && !this.rawUnsupported) {
+      try {
+        return await this.post('/transcribe/raw', new Uint8Array(audioBuffer), {
+          'Content-Type': 'application/octet-stream',
+          'X-Audio-Format': rawFormat,
+        });
+      } catch (error) {
+        if (!(error instanceof MLServiceError) || (error.status !== 404 && error.status !== 405)) {
+          throw error;
+        }
+        log('warn', 'ML Service has no raw transcription endpoint, using multipart uploads');
+        this.rawUnsupported = true;
+      }
+    }
+
+    const formData = new FormData();
+    const blob = new Blob([new Uint8Array(audioBuffer)], { type: 'audio/ogg' });
+    formData.append('audio', blob, filename);
+    return this.post('/transcribe', formData);
+  }
+
+  private async post(
+    path: string,
+    body: BodyInit,
+    headers?: Record<string, string>
+  ): Promise<TranscriptionResult> {
+    let response: Response;
+    try {
+      // Bun pools keep-alive connections per origin; keepalive keeps them reused
+      response = await fetch(`${this.baseUrl}${path}`, {
+        method: 'POST',
+        body,
+        // Lets the service stop decoding once this attempt has timed out
+        headers: { ...headers, 'X-Request-Timeout': String(this.options.timeoutMs / 1000) },
+        keepalive: true,
+        signal: AbortSignal.timeout(this.options.timeoutMs),
+      });
+    } catch (error) {
+      // AbortSignal.timeout rejects with a TimeoutError DOMException
+      const timedOut = (error as { name?: string } | null)?.name === 'TimeoutError';
+      throw new MLServiceError(error instanceof Error ? error.message : String(error), null, null, timedOut);
+    }
+
+    if (!response.ok) {
+      let errorMessage = 'Transcription failed';
+      try {
+        const errorData = (await response.json()) as ErrorResponse;
+        errorMessage = errorData.error?.message || errorMessage;
+        log('error', 'Transcription failed', {
+          status: response.status,
+          code: errorData.error?.code,
+          message: errorData.error?.message,
+          details: errorData.error?.details,
+        });
+      } catch {
+        log('error', 'Transcription failed with non-JSON response', {
+          status: response.status,
+          statusText: response.statusText,
+        });
+      }
+      throw new MLServiceError(
+        errorMessage,
+        response.status,
+        parseRetryAfter(response.headers.get('Retry-After'))
+      );
+    }
+
+    const result = (await response.json()) as TranscriptionResponse;
+    return result.data;
+  }
 }